@@ -1,41 +1,116 @@
-from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import Response
+from datetime import datetime, timezone
+from typing import List, Optional
+from pydantic import TypeAdapter
+import os
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from db.database import get_db
-from api.dto import LoginData, UserCreate, UserResponse, UserJWTResponse
-from dao import UserDAO
+from api.dto import BulkUserCreate, BulkUserResponse, BulkUserResult, LoginData, RefreshRequest, RevokeAccessRequest, TokenResponse, UserCreate, UserResponse, UserJWTResponse
+from dao import UserDAO, RefreshTokenDAO
+from dao.user_dao import users_version
+from cache import TTLCache
 from security import create_access_token, verify_token, require_admin
+from security.jwt_handler import ACCESS_TOKEN_TTL
+from security.passwords import HashPoolBusy
+from security.revocation import revocations
+from monitoring import TimedRoute
 
-router = APIRouter(tags=["Authentication"])
+router = APIRouter(tags=["Authentication"], route_class=TimedRoute)
 
+# Rendered /users pages keyed by the users version stamp, so any user change on any worker retires them
+users_pages = TTLCache(maxsize=256, ttl=float(os.environ.get("APP_USERS_PAGE_TTL", "5")), name="users_page")
+_user_list = TypeAdapter(List[UserResponse])
 
-@router.post("/login")
+
+def _token_response(user, refresh_token: str) -> TokenResponse:
+    return TokenResponse(
+        access_token=create_access_token(username=user.username, roles=user.roles if user.roles else []),
+        expires_in=int(ACCESS_TOKEN_TTL.total_seconds()),
+        refresh_token=refresh_token
+    )
+
+
+@router.post("/login", response_model=TokenResponse)
 def login(login_data: LoginData, db: Session = Depends(get_db)):
-    user = UserDAO.get_by_username(db, login_data.username)
+    user = UserDAO.get_credentials(db, login_data.username)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     if not UserDAO.verify_password(user, login_data.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token(username=user.username, roles=user.roles if user.roles else [])
-    return {"access_token": token, "token_type": "bearer"}
+    # Upgrade hashes made under an older policy while the plain password is at hand
+    if UserDAO.password_needs_rehash(user):
+        try:
+            UserDAO.update_password(db, user.id, login_data.password)
+        except HashPoolBusy:
+            pass  # retried on a later login
 
+    return _token_response(user, RefreshTokenDAO.issue(db, user.id))
 
-@router.get("/users", response_model=List[UserResponse])
-def get_users(payload: dict = Depends(verify_token), db: Session = Depends(get_db)):
-    users = UserDAO.get_all(db)
 
-    return [
-        UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            roles=user.roles
-        )
-        for user in users
-    ]
+@router.post("/token/refresh", response_model=TokenResponse)
+def refresh_token(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a new refresh token, without a password check."""
+    rotated = RefreshTokenDAO.rotate(db, refresh_data.refresh_token)
+    user = UserDAO.get_by_id(db, rotated[0]) if rotated else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    return _token_response(user, rotated[1])
+
+
+@router.post("/token/revoke", status_code=204)
+def revoke_token(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """Log out: revoke a refresh token and every token rotated from it."""
+    RefreshTokenDAO.revoke(db, refresh_data.refresh_token)
+
+
+@router.post("/logout", status_code=204)
+def logout(payload: dict = Depends(verify_token)):
+    """Revoke the access token used for this request."""
+    if payload.get("jti"):
+        revocations.revoke(payload["jti"], payload["exp"])
+
+
+@router.post("/admin/tokens/revoke", status_code=204)
+def revoke_access_token(revoke_data: RevokeAccessRequest, payload: dict = Depends(require_admin)):
+    """Revoke any access token by its jti before it expires."""
+    expires_at = revoke_data.expires_at or int((datetime.now(timezone.utc) + ACCESS_TOKEN_TTL).timestamp())
+    revocations.revoke(revoke_data.jti, expires_at)
+
+
+@router.get("/users", response_model=List[UserResponse])
+def get_users(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    role: Optional[str] = Query(None, min_length=1),
+    username_prefix: Optional[str] = Query(None, min_length=1),
+    payload: dict = Depends(verify_token),
+    db: Session = Depends(get_db)
+):
+    """One page of users; the X-Next-After-Id header holds the after_id of the next page, if any."""
+    key = (users_version.get(), after_id, limit, role, username_prefix)
+    page = users_pages.get(key)
+    if page is None:
+        users = UserDAO.get_page(db, after_id=after_id, limit=limit + 1, role=role, username_prefix=username_prefix)
+        body = _user_list.dump_json([
+            UserResponse(
+                id=user.id,
+                username=user.username,
+                email=user.email,
+                roles=user.roles
+            )
+            for user in users[:limit]
+        ])
+        page = (body, users[limit - 1].id if len(users) > limit else None)
+        users_pages.set(key, page)
+
+    body, next_after_id = page
+    headers = {} if next_after_id is None else {"X-Next-After-Id": str(next_after_id)}
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/users", response_model=UserResponse)
@@ -68,6 +143,47 @@ def create_user(
     )
 
 
+@router.post("/users:bulk", response_model=BulkUserResponse)
+def create_users_bulk(
+    bulk_create_dto: BulkUserCreate,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(require_admin)
+):
+    """Create many users at once; each user is reported as created or rejected."""
+    taken_usernames, taken_emails = UserDAO.find_taken(
+        db,
+        (user.username for user in bulk_create_dto.users),
+        (user.email for user in bulk_create_dto.users)
+    )
+
+    results: List[BulkUserResult] = []
+    accepted = []
+    for user in bulk_create_dto.users:
+        if user.username in taken_usernames:
+            results.append(BulkUserResult(username=user.username, status="error", detail="Username already exists"))
+            continue
+        if user.email in taken_emails:
+            results.append(BulkUserResult(username=user.username, status="error", detail="Email already exists"))
+            continue
+        # Later duplicates within the batch are rejected like existing users
+        taken_usernames.add(user.username)
+        taken_emails.add(user.email)
+        results.append(BulkUserResult(username=user.username, status="created"))
+        accepted.append(user)
+
+    if accepted:
+        try:
+            created = UserDAO.create_users(db, [user.model_dump() for user in accepted])
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="Users were created concurrently, retry the batch")
+        ids = {user.username: user.id for user in created}
+        for result in results:
+            if result.status == "created":
+                result.id = ids[result.username]
+
+    return BulkUserResponse(created=len(accepted), failed=len(results) - len(accepted), results=results)
+
+
 @router.get("/user_jwt", response_model=UserJWTResponse)
 def get_user_jwt_details(payload: dict = Depends(verify_token)):
     return UserJWTResponse(
@@ -1,4 +1,5 @@
-from .auth_dto import LoginData, UserCreate, UserResponse, UserJWTResponse
+from .auth_dto import BulkUserCreate, BulkUserResponse, BulkUserResult, LoginData, RefreshRequest, \
+    RevokeAccessRequest, TokenResponse, UserCreate, UserResponse, UserJWTResponse
 from .movie_dto import MovieResponse, MovieCreate, MovieUpdate
 from .link_dto import LinkResponse, LinkCreate, LinkUpdate
 from .rating_dto import RatingResponse, RatingCreate, RatingUpdate
@@ -6,7 +7,8 @@ from .tag_dto import TagResponse, TagCreate, TagUpdate
 
 __all__ = [
     # Auth DTOs
-    "LoginData", "UserCreate", "UserResponse", "UserJWTResponse",
+    "BulkUserCreate", "BulkUserResponse", "BulkUserResult", "LoginData", "RefreshRequest", "RevokeAccessRequest",
+    "TokenResponse", "UserCreate", "UserResponse", "UserJWTResponse",
     # Movie DTOs
     "MovieResponse", "MovieCreate", "MovieUpdate",
     # Link DTOs
@@ -8,6 +8,23 @@ class LoginData(BaseModel):
     password: str = Field(..., min_length=1)
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1)
+
+
+class RevokeAccessRequest(BaseModel):
+    jti: str = Field(..., min_length=1)
+    # When the token expires; defaults to the longest possible access token lifetime
+    expires_at: Optional[int] = None
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    refresh_token: str
+
+
 class UserResponse(BaseModel):
     id: int
     username: str
@@ -31,3 +48,19 @@ class UserJWTResponse(BaseModel):
     iat: datetime
     exp: datetime
 
+
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUserResult(BaseModel):
+    username: str
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkUserResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkUserResult]
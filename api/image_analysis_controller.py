@@ -1,18 +1,42 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from confluent_kafka import Producer, Consumer
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import asyncio
 import uuid
 import json
-
-router = APIRouter(tags=["Image_Analysis"])
-
-producer = Producer({'bootstrap.servers': 'localhost:9092'})
+import time
+from db.database import SessionLocal
+from messaging import AsyncProducer, ProducerBusy, ResultConsumer, ResultStore
+from messaging.producer import FAILED
+from monitoring import TimedRoute
+from monitoring.metrics import REGISTRY
+
+router = APIRouter(tags=["Image_Analysis"], route_class=TimedRoute)
+
+# Batched, non-blocking delivery; flushed on shutdown (see main.py)
+producer = AsyncProducer()
+# Results topic materialized by request_id; the consumer is started with the app (see main.py)
+results = ResultStore(SessionLocal)
+result_consumer = ResultConsumer(results)
+
+REGISTRY.callback_gauge("analysis_result_waiters", "Clients waiting on an image analysis result", (),
+                        lambda: {(): results.waiting()})
+
+# Push delivery limits: long-poll hold, stream lifetime, keep-alive period, ids per stream
+MAX_WAIT_SECONDS = 30.0
+STREAM_SECONDS = 300.0
+HEARTBEAT_SECONDS = 15.0
+MAX_WATCHED = 1000
 
 class ImageRequest(BaseModel):
     url: str
 
-@router.post("/analyze_img")
-def analyze_img(req: ImageRequest):
+@router.post("/analyze_img", status_code=202)
+async def analyze_img(req: ImageRequest):
+    """Queue an image for analysis; returns as soon as the request is buffered locally."""
     request_id = str(uuid.uuid4())
 
     event = {
@@ -20,45 +44,161 @@ def analyze_img(req: ImageRequest):
         "url": req.url
     }
 
-    producer.produce("image_analysis_requests", json.dumps(event))
-    producer.flush()
-
-    return {"request_id": request_id}
+    try:
+        producer.send("image_analysis_requests", request_id, json.dumps(event).encode("utf-8"))
+    except ProducerBusy:
+        raise HTTPException(status_code=503, detail="Analysis queue is full, retry shortly",
+                            headers={"Retry-After": "1"})
+
+    return {"request_id": request_id, "status": "queued"}
+
+
+def _status(request_id: str, people: Optional[list]) -> dict:
+    if people is not None:
+        return {"status": "done", "people": people}
+    delivery = producer.delivery(request_id)
+    if delivery is not None and delivery[0] == FAILED:
+        return {"status": "failed", "detail": delivery[1]}
+    return {"status": "processing"}
+
+
+class _Watch:
+    """Request ids one client is waiting on, each backed by a Future from the result store."""
+
+    def __init__(self):
+        self.watched: Dict[str, Future] = {}
+        self.pending: Dict[asyncio.Future, str] = {}
+
+    async def add(self, request_ids: List[str]) -> None:
+        new = [request_id for request_id in dict.fromkeys(request_ids) if request_id not in self.watched]
+        futures = await run_in_threadpool(results.watch_many, new)
+        self.watched.update(futures)
+        self.pending.update({asyncio.wrap_future(future): request_id for request_id, future in futures.items()})
+
+    async def wait(self, timeout: float, *others: asyncio.Future) -> None:
+        """Wait up to `timeout` for a result, or for one of `others`."""
+        waitables = {*self.pending, *others}
+        if waitables:
+            await asyncio.wait(waitables, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await asyncio.sleep(timeout)
+
+    def updates(self) -> List[dict]:
+        """Final statuses that became known since the last call: results, and failed deliveries.
+
+        Reported ids are no longer watched, so they stop counting against MAX_WATCHED.
+        """
+        found = []
+        for waiter, request_id in list(self.pending.items()):
+            if waiter.done():
+                status = _status(request_id, waiter.result())
+            else:
+                status = _status(request_id, None)
+                if status["status"] != "failed":
+                    continue
+                waiter.cancel()
+            del self.pending[waiter]
+            found.append({"request_id": request_id, **status})
+        if found:
+            results.unwatch({update["request_id"]: self.watched.pop(update["request_id"]) for update in found})
+        return found
+
+    def close(self) -> None:
+        for waiter in self.pending:
+            waiter.cancel()
+        results.unwatch(self.watched)
 
 
 @router.get("/result/{request_id}")
-def get_result(request_id: str):
-
-    consumer = Consumer({
-        "bootstrap.servers": "localhost:9092",
-        "group.id": f"result-reader-{uuid.uuid4()}",
-        "auto.offset.reset": "earliest"
-    })
-
-    consumer.subscribe(["image_analysis_results"])
-
-    # Try for up to 5 seconds total
-    for _ in range(50):
-        msg = consumer.poll(0.1)
-
-        if msg is None:
-            continue
-        if msg.error():
-            continue
-
-        value = msg.value()
-        if not value:
-            continue
-
+async def get_result(request_id: str,
+                     wait: float = Query(0, ge=0, le=MAX_WAIT_SECONDS,
+                                         description="Seconds to hold the request open until the result arrives")):
+    """Result of an analysis request; with ?wait=, answers the moment the result arrives."""
+    if wait <= 0:
+        return _status(request_id, await run_in_threadpool(results.get, request_id))
+    watch = _Watch()
+    try:
+        await watch.add([request_id])
+        deadline = time.monotonic() + wait
+        while True:
+            for update in watch.updates():
+                del update["request_id"]
+                return update
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"status": "processing"}
+            await watch.wait(remaining)
+    finally:
+        watch.close()
+
+
+@router.get("/results/stream")
+async def stream_results(request_id: List[str] = Query(..., description="Request ids to watch; repeat to watch many"),
+                         timeout: float = Query(STREAM_SECONDS, gt=0, le=STREAM_SECONDS)):
+    """Server-sent events: one "result" event per request as it finishes, then an "end" event.
+
+    The end event lists the requests still pending when the stream timed
+    out, for the client to watch again.
+    """
+    request_ids = list(dict.fromkeys(request_id))
+    if len(request_ids) > MAX_WATCHED:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_WATCHED} request ids per stream")
+
+    async def events():
+        watch = _Watch()
         try:
-            data = json.loads(value.decode("utf-8"))
-        except:
-            continue
-
-        if data.get("request_id") == request_id:
-            return {
-                "status": "done",
-                "people": data["people"]
-            }
-
-    return {"status": "processing"}
\ No newline at end of file
+            await watch.add(request_ids)
+            deadline = time.monotonic() + timeout
+            while watch.pending:
+                updates = watch.updates()
+                for update in updates:
+                    yield f"event: result\ndata: {json.dumps(update)}\n\n"
+                remaining = deadline - time.monotonic()
+                if not watch.pending or remaining <= 0:
+                    break
+                if not updates:
+                    yield ": keep-alive\n\n"
+                await watch.wait(min(HEARTBEAT_SECONDS, remaining))
+            yield f"event: end\ndata: {json.dumps({'pending': sorted(watch.pending.values())})}\n\n"
+        finally:
+            watch.close()
+
+    # X-Accel-Buffering: proxies must pass events through as they are written
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/results/ws")
+async def watch_results(websocket: WebSocket):
+    """Push results over a WebSocket.
+
+    The client sends {"watch": [request_id, ...]} at any time; the server
+    sends {"request_id", "status", ...} once for each request when it is
+    done or has failed.
+    """
+    await websocket.accept()
+    watch = _Watch()
+    receive = asyncio.ensure_future(websocket.receive_text())
+    try:
+        while True:
+            await watch.wait(HEARTBEAT_SECONDS, receive)
+            if receive.done():
+                message, receive = receive.result(), asyncio.ensure_future(websocket.receive_text())
+                try:
+                    request_ids = json.loads(message)["watch"]
+                    if not isinstance(request_ids, list) or not all(isinstance(i, str) for i in request_ids):
+                        raise TypeError
+                except (ValueError, KeyError, TypeError):
+                    await websocket.send_json({"error": 'Expected {"watch": [request_id, ...]}'})
+                    continue
+                if len(watch.watched) + len(request_ids) > MAX_WATCHED:
+                    await websocket.send_json({"error": f"At most {MAX_WATCHED} request ids per connection"})
+                    continue
+                await watch.add(request_ids)
+            for update in watch.updates():
+                await websocket.send_json(update)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        watch.close()
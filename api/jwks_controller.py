@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from monitoring import TimedRoute
+from security import keys
+
+router = APIRouter(tags=["Authentication"], route_class=TimedRoute)
+
+
+@router.get("/.well-known/jwks.json")
+def jwks() -> JSONResponse:
+    """Public keys that verify access tokens, for services that check tokens locally."""
+    keys.keyring.signing_key()
+    return JSONResponse(keys.keyring.jwks(), headers={"Cache-Control": "public, max-age=300"})
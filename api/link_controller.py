@@ -5,8 +5,9 @@ from db.database import get_db
 from dao import LinkDAO
 from api.dto import LinkResponse, LinkCreate, LinkUpdate
 from security import verify_token
+from monitoring import TimedRoute
 
-router = APIRouter(tags=["Links"])
+router = APIRouter(tags=["Links"], route_class=TimedRoute)
 
 
 @router.get("/links", response_model=List[LinkResponse])
@@ -43,16 +44,14 @@ def create_link(
     payload: dict = Depends(verify_token)
 ):
     """Create a new link."""
-    existing_link = LinkDAO.get_by_movie_id(db, link_data.movie_id)
-    if existing_link:
-        raise HTTPException(status_code=400, detail="Link for this movie already exists")
-
     new_link = LinkDAO.create(
         db=db,
         movie_id=link_data.movie_id,
         imdb_id=link_data.imdb_id,
         tmdb_id=link_data.tmdb_id
     )
+    if not new_link:
+        raise HTTPException(status_code=400, detail="Link for this movie already exists")
     return new_link
 
 
@@ -64,16 +63,14 @@ def update_link(
     payload: dict = Depends(verify_token)
 ):
     """Update an existing link."""
-    link = LinkDAO.get_by_movie_id(db, movie_id)
-    if not link:
-        raise HTTPException(status_code=404, detail="Link not found")
-
     updated_link = LinkDAO.update(
         db=db,
-        link=link,
+        movie_id=movie_id,
         imdb_id=link_data.imdb_id,
         tmdb_id=link_data.tmdb_id
     )
+    if not updated_link:
+        raise HTTPException(status_code=404, detail="Link not found")
     return updated_link
 
 
@@ -84,9 +81,6 @@ def delete_link(
     payload: dict = Depends(verify_token)
 ):
     """Delete a link."""
-    link = LinkDAO.get_by_movie_id(db, movie_id)
-    if not link:
+    if not LinkDAO.delete(db, movie_id):
         raise HTTPException(status_code=404, detail="Link not found")
-
-    LinkDAO.delete(db, link)
     return None
@@ -0,0 +1,28 @@
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response
+from monitoring import TimedRoute
+from monitoring.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter(tags=["Monitoring"], route_class=TimedRoute)
+
+# Scrapers send "Authorization: Bearer $APP_METRICS_TOKEN"; without the setting /metrics is off
+METRICS_TOKEN = os.environ.get("APP_METRICS_TOKEN")
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)) -> Response:
+    """Prometheus scrape endpoint for the worker process that answers it.
+
+    Metrics are kept per process, so under several uvicorn workers each
+    scrape sees one arbitrary worker. Run a single worker per scrape target
+    when the numbers have to cover the whole node.
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {METRICS_TOKEN}".encode()
+    if not authorization or not hmac.compare_digest(authorization.encode(), expected):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return Response(content=REGISTRY.exposition(), media_type=CONTENT_TYPE)
@@ -5,8 +5,9 @@ from db.database import get_db
 from dao import MovieDAO
 from api.dto import MovieResponse, MovieCreate, MovieUpdate
 from security import verify_token
+from monitoring import TimedRoute
 
-router = APIRouter(tags=["Movies"])
+router = APIRouter(tags=["Movies"], route_class=TimedRoute)
 
 
 @router.get("/movies", response_model=List[MovieResponse])
@@ -43,16 +44,14 @@ def create_movie(
     payload: dict = Depends(verify_token)
 ):
     """Create a new movie."""
-    existing_movie = MovieDAO.get_by_id(db, movie_data.movie_id)
-    if existing_movie:
-        raise HTTPException(status_code=400, detail="Movie with this ID already exists")
-
     new_movie = MovieDAO.create(
         db=db,
         movie_id=movie_data.movie_id,
         title=movie_data.title,
         genres=movie_data.genres
     )
+    if not new_movie:
+        raise HTTPException(status_code=400, detail="Movie with this ID already exists")
     return new_movie
 
 
@@ -64,16 +63,14 @@ def update_movie(
     payload: dict = Depends(verify_token)
 ):
     """Update an existing movie."""
-    movie = MovieDAO.get_by_id(db, movie_id)
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-
     updated_movie = MovieDAO.update(
         db=db,
-        movie=movie,
+        movie_id=movie_id,
         title=movie_data.title,
         genres=movie_data.genres
     )
+    if not updated_movie:
+        raise HTTPException(status_code=404, detail="Movie not found")
     return updated_movie
 
 
@@ -84,9 +81,6 @@ def delete_movie(
     payload: dict = Depends(verify_token)
 ):
     """Delete a movie."""
-    movie = MovieDAO.get_by_id(db, movie_id)
-    if not movie:
+    if not MovieDAO.delete(db, movie_id):
         raise HTTPException(status_code=404, detail="Movie not found")
-
-    MovieDAO.delete(db, movie)
     return None
@@ -0,0 +1,37 @@
+import asyncio
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import List
+from monitoring import TimedRoute
+from monitoring import profiling
+from security import require_admin
+
+router = APIRouter(tags=["Profiling"], route_class=TimedRoute)
+
+
+@router.post("/admin/profile")
+async def profile_this_worker(
+    seconds: float = Query(10.0, gt=0, le=profiling.MAX_WORKER_SECONDS),
+    payload: dict = Depends(require_admin)
+):
+    """Sample every thread of the worker serving this request and return collapsed stacks."""
+    name = await asyncio.to_thread(profiling.profile_worker, seconds)
+    return FileResponse(os.path.join(profiling.PROFILE_DIR, name), media_type="text/plain", filename=name)
+
+
+@router.get("/admin/profiles", response_model=List[str])
+def list_profiles(payload: dict = Depends(require_admin)):
+    """Stored profiles, newest first."""
+    if not os.path.isdir(profiling.PROFILE_DIR):
+        return []
+    return sorted(os.listdir(profiling.PROFILE_DIR), reverse=True)
+
+
+@router.get("/admin/profiles/{name}")
+def get_profile(name: str, payload: dict = Depends(require_admin)):
+    """Download a stored profile."""
+    path = os.path.join(profiling.PROFILE_DIR, os.path.basename(name))
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=os.path.basename(path))
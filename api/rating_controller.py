@@ -5,8 +5,9 @@ from db.database import get_db
 from dao import RatingDAO
 from api.dto import RatingResponse, RatingCreate, RatingUpdate
 from security import verify_token
+from monitoring import TimedRoute
 
-router = APIRouter(tags=["Ratings"])
+router = APIRouter(tags=["Ratings"], route_class=TimedRoute)
 
 
 @router.get("/ratings", response_model=List[RatingResponse])
@@ -58,16 +59,14 @@ def update_rating(
     payload: dict = Depends(verify_token)
 ):
     """Update an existing rating."""
-    rating = RatingDAO.get_by_id(db, rating_id)
-    if not rating:
-        raise HTTPException(status_code=404, detail="Rating not found")
-
     updated_rating = RatingDAO.update(
         db=db,
-        rating=rating,
+        rating_id=rating_id,
         new_rating=rating_data.rating,
         timestamp=rating_data.timestamp
     )
+    if not updated_rating:
+        raise HTTPException(status_code=404, detail="Rating not found")
     return updated_rating
 
 
@@ -78,9 +77,6 @@ def delete_rating(
     payload: dict = Depends(verify_token)
 ):
     """Delete a rating."""
-    rating = RatingDAO.get_by_id(db, rating_id)
-    if not rating:
+    if not RatingDAO.delete(db, rating_id):
         raise HTTPException(status_code=404, detail="Rating not found")
-
-    RatingDAO.delete(db, rating)
     return None
@@ -5,8 +5,9 @@ from db.database import get_db
 from dao import TagDAO
 from api.dto import TagResponse, TagCreate, TagUpdate
 from security import verify_token
+from monitoring import TimedRoute
 
-router = APIRouter(tags=["Tags"])
+router = APIRouter(tags=["Tags"], route_class=TimedRoute)
 
 
 @router.get("/tags", response_model=List[TagResponse])
@@ -58,16 +59,14 @@ def update_tag(
     payload: dict = Depends(verify_token)
 ):
     """Update an existing tag."""
-    tag = TagDAO.get_by_id(db, tag_id)
-    if not tag:
-        raise HTTPException(status_code=404, detail="Tag not found")
-
     updated_tag = TagDAO.update(
         db=db,
-        tag_obj=tag,
+        tag_id=tag_id,
         tag=tag_data.tag,
         timestamp=tag_data.timestamp
     )
+    if not updated_tag:
+        raise HTTPException(status_code=404, detail="Tag not found")
     return updated_tag
 
 
@@ -78,9 +77,6 @@ def delete_tag(
     payload: dict = Depends(verify_token)
 ):
     """Delete a tag."""
-    tag = TagDAO.get_by_id(db, tag_id)
-    if not tag:
+    if not TagDAO.delete(db, tag_id):
         raise HTTPException(status_code=404, detail="Tag not found")
-
-    TagDAO.delete(db, tag)
     return None
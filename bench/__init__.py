@@ -0,0 +1,3 @@
+"""
+Performance benchmarks that run the API as a real server over seeded data.
+"""
@@ -0,0 +1,284 @@
+"""
+End-to-end benchmark of every API route over the seeded MovieLens data.
+
+The app is started under uvicorn on a private copy of the seeded snapshot,
+each route is exercised with a fixed number of sequential requests after a
+warm-up, and throughput plus latency percentiles are written as JSON. When
+a baseline exists the run is compared against it and routes that regressed
+beyond the threshold are reported (and fail the run).
+
+Usage:
+    python -m bench.endpoints                          # Run, save, compare with bench/baseline.json
+    python -m bench.endpoints --requests 200 --only movies
+    python -m bench.endpoints --update-baseline        # Store this run as the new baseline
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.server import AppServer
+from bench.stats import compare, summarize
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+CREDENTIALS = {"admin": ("admin", "admin123"), "user": ("user", "user123")}
+FRESH_ID_BASE = 10_000_000
+
+
+@dataclass
+class BenchContext:
+    """Tokens and ids shared by the route cases of one run."""
+    tokens: Dict[str, str]
+    movie_ids: List[int]
+    rating_ids: List[int]
+    tag_ids: List[int]
+    created: Dict[str, List[int]] = field(default_factory=dict)
+    next_id: int = FRESH_ID_BASE
+
+    def fresh_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def pick(self, ids: List[int], i: int) -> int:
+        return ids[i % len(ids)]
+
+
+Request = Tuple[str, Optional[dict]]
+
+
+@dataclass
+class RouteCase:
+    """One route, how to build its i-th request, and what a success looks like."""
+    name: str
+    method: str
+    build: Callable[[BenchContext, int], Request]
+    auth: Optional[str] = "user"
+    expect: int = 200
+    max_requests: Optional[int] = None
+    created_key: Optional[str] = None
+    created_field: Optional[str] = None
+
+
+def _created(resource: str, ctx: BenchContext, i: int) -> int:
+    ids = ctx.created.get(resource, [])
+    return ids[i] if i < len(ids) else -1
+
+
+def _resource_cases(resource: str, id_name: str, ids: Callable[[BenchContext], List[int]],
+                    create: Callable[[BenchContext, int], dict],
+                    update: Callable[[int], dict], key_field: Optional[str] = None,
+                    ) -> Tuple[List[RouteCase], RouteCase]:
+    """Read, create and update cases for a resource, plus its delete case.
+
+    Deletes remove the rows created earlier in the run, so they are run last
+    and children before parents.
+    """
+    cases = [
+        RouteCase(f"GET /{resource}", "GET", lambda ctx, i: (f"/{resource}", None), max_requests=100),
+        RouteCase(f"GET /{resource}/{{{id_name}}}", "GET",
+                  lambda ctx, i: (f"/{resource}/{ctx.pick(ids(ctx), i)}", None)),
+        RouteCase(f"POST /{resource}", "POST", lambda ctx, i: (f"/{resource}", create(ctx, i)),
+                  expect=201, created_key=resource, created_field=key_field or id_name),
+        RouteCase(f"PUT /{resource}/{{{id_name}}}", "PUT",
+                  lambda ctx, i: (f"/{resource}/{ctx.pick(ids(ctx), i)}", update(i))),
+    ]
+    delete = RouteCase(f"DELETE /{resource}/{{{id_name}}}", "DELETE",
+                       lambda ctx, i: (f"/{resource}/{_created(resource, ctx, i)}", None), expect=204)
+    return cases, delete
+
+
+def _new_link(ctx: BenchContext, i: int) -> dict:
+    # Links need a movie without one, so they hang off the movies created earlier in the run
+    return {"movie_id": _created("movies", ctx, i), "imdb_id": f"{9_000_000 + i:07d}", "tmdb_id": str(i)}
+
+
+def _build_cases() -> Tuple[RouteCase, ...]:
+    auth_cases = [
+        RouteCase("POST /login", "POST", lambda ctx, i: ("/login", {"username": "user", "password": "user123"}),
+                  auth=None, max_requests=50),
+        RouteCase("GET /user_jwt", "GET", lambda ctx, i: ("/user_jwt", None)),
+        RouteCase("GET /users", "GET", lambda ctx, i: ("/users", None)),
+        RouteCase("POST /users", "POST", lambda ctx, i: ("/users", {
+            "username": f"bench-{ctx.fresh_id()}", "email": f"bench-{ctx.next_id}@example.com",
+            "password": "bench-password", "roles": ["ROLE_USER"],
+        }), auth="admin", max_requests=50),
+    ]
+    resources = [
+        _resource_cases(
+            "movies", "movie_id", lambda ctx: ctx.movie_ids,
+            lambda ctx, i: {"movie_id": ctx.fresh_id(), "title": f"Bench Movie {i}", "genres": "Drama"},
+            lambda i: {"title": f"Updated Title {i}"},
+        ),
+        _resource_cases(
+            "links", "movie_id", lambda ctx: ctx.movie_ids, _new_link,
+            lambda i: {"tmdb_id": str(i)},
+        ),
+        _resource_cases(
+            "ratings", "rating_id", lambda ctx: ctx.rating_ids,
+            lambda ctx, i: {"user_id": 1, "movie_id": ctx.pick(ctx.movie_ids, i), "rating": 4.0, "timestamp": i},
+            lambda i: {"rating": 0.5 + (i % 10) / 2}, key_field="id",
+        ),
+        _resource_cases(
+            "tags", "tag_id", lambda ctx: ctx.tag_ids,
+            lambda ctx, i: {"user_id": 1, "movie_id": ctx.pick(ctx.movie_ids, i), "tag": f"bench {i}",
+                            "timestamp": i},
+            lambda i: {"tag": f"retagged {i}"}, key_field="id",
+        ),
+    ]
+    reads_and_writes = [case for cases, _ in resources for case in cases]
+    deletes = [delete for _, delete in reversed(resources)]
+    return tuple(auth_cases + reads_and_writes + deletes)
+
+
+ROUTE_CASES = _build_cases()
+
+
+def sample_ids(db_path: str, table: str, column: str, n: int = 1000) -> List[int]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"SELECT {column} FROM {table} ORDER BY {column} LIMIT ?", (n,)).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+def login(client: httpx.Client, role: str) -> str:
+    username, password = CREDENTIALS[role]
+    response = client.post("/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def _send(client: httpx.Client, ctx: BenchContext, case: RouteCase, headers: dict, i: int) -> Tuple[bool, float]:
+    path, body = case.build(ctx, i)
+    t0 = time.perf_counter()
+    response = client.request(case.method, path, json=body, headers=headers)
+    elapsed = time.perf_counter() - t0
+    ok = response.status_code == case.expect
+    if ok and case.created_key:
+        ctx.created.setdefault(case.created_key, []).append(response.json()[case.created_field])
+    return ok, elapsed
+
+
+def run_case(client: httpx.Client, ctx: BenchContext, case: RouteCase, requests: int,
+             warmup: int) -> Dict[str, float]:
+    """Warm up, then time `requests` sequential requests against one route."""
+    headers = {"Authorization": f"Bearer {ctx.tokens[case.auth]}"} if case.auth else {}
+    n = min(requests, case.max_requests or requests)
+    w = min(warmup, n)
+    for i in range(w):
+        _send(client, ctx, case, headers, i)
+
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    for i in range(w, w + n):
+        ok, elapsed = _send(client, ctx, case, headers, i)
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(requests: int = 300, warmup: int = 20, only: Optional[str] = None,
+                   snapshot: Optional[str] = None) -> dict:
+    """Start the app on seeded data and benchmark every route case."""
+    cases = [c for c in ROUTE_CASES if not only or only in c.name]
+    routes: Dict[str, Dict[str, float]] = {}
+    with AppServer(snapshot=snapshot) as server:
+        ctx = BenchContext(
+            tokens={},
+            movie_ids=sample_ids(server.db_path, "movies", "movie_id"),
+            rating_ids=sample_ids(server.db_path, "ratings", "id"),
+            tag_ids=sample_ids(server.db_path, "tags", "id"),
+        )
+        with httpx.Client(base_url=server.base_url, timeout=60.0) as client:
+            ctx.tokens = {role: login(client, role) for role in CREDENTIALS}
+            for case in cases:
+                routes[case.name] = result = run_case(client, ctx, case, requests, warmup)
+                print(f"  {case.name:<32} {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                      f"p95 {result['p95_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+                      f"errors {result['errors']}")
+        snapshot = server.snapshot
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "snapshot": os.path.basename(snapshot),
+            "requests": requests,
+            "warmup": warmup,
+        },
+        "routes": routes,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every API route over seeded data")
+    parser.add_argument("--requests", type=int, default=300, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per route first")
+    parser.add_argument("--only", help="Only routes whose name contains this text")
+    parser.add_argument("--snapshot", help="Snapshot to serve (default: built from db/resources)")
+    parser.add_argument("--out", help="Result file (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative change that counts as a regression (default: 0.15)")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.requests, args.warmup, args.only, args.snapshot)
+
+    out = args.out or os.path.join(
+        DEFAULT_RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results["routes"], baseline["routes"], args.threshold)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {baseline['meta'].get('revision')}")
+        return 0
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
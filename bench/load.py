@@ -0,0 +1,223 @@
+"""
+Concurrent load generator for finding contention limits.
+
+A pool of asyncio virtual users shares one httpx AsyncClient and issues a
+weighted read/write mix against a real uvicorn server for a fixed duration.
+Each operation is reported with its own throughput, latency percentiles and
+error rate, and the whole run can be repeated across uvicorn worker counts
+to show how throughput scales (or stops scaling: SQLite allows one writer at
+a time, and bcrypt in /login is CPU bound).
+
+Usage:
+    python -m bench.load --concurrency 32 --duration 20
+    python -m bench.load --mix write-heavy --workers 1,2,4,8 --out /tmp/load.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from bench.endpoints import CREDENTIALS, BenchContext, login, sample_ids
+from bench.server import AppServer
+from bench.stats import summarize
+
+
+@dataclass(frozen=True)
+class Operation:
+    """One request type in the mix."""
+    name: str
+    method: str
+    build: Callable[[BenchContext, random.Random], Tuple[str, Optional[dict]]]
+    auth: Optional[str] = "user"
+    expect: int = 200
+
+
+def _body_rating(ctx: BenchContext, rng: random.Random) -> dict:
+    return {"user_id": rng.randint(1, 610), "movie_id": rng.choice(ctx.movie_ids),
+            "rating": rng.randint(1, 10) / 2, "timestamp": int(time.time())}
+
+
+def _body_tag(ctx: BenchContext, rng: random.Random) -> dict:
+    return {"user_id": rng.randint(1, 610), "movie_id": rng.choice(ctx.movie_ids),
+            "tag": f"load {rng.randint(0, 999)}", "timestamp": int(time.time())}
+
+
+OPERATIONS: Dict[str, Operation] = {op.name: op for op in (
+    Operation("GET /movies", "GET", lambda ctx, rng: ("/movies?limit=50", None)),
+    Operation("GET /movies/{movie_id}", "GET", lambda ctx, rng: (f"/movies/{rng.choice(ctx.movie_ids)}", None)),
+    Operation("GET /ratings", "GET", lambda ctx, rng: ("/ratings?limit=100", None)),
+    Operation("GET /ratings/{rating_id}", "GET",
+              lambda ctx, rng: (f"/ratings/{rng.choice(ctx.rating_ids)}", None)),
+    Operation("POST /ratings", "POST", lambda ctx, rng: ("/ratings", _body_rating(ctx, rng)), expect=201),
+    Operation("PUT /ratings/{rating_id}", "PUT",
+              lambda ctx, rng: (f"/ratings/{rng.choice(ctx.rating_ids)}", {"rating": rng.randint(1, 10) / 2})),
+    Operation("GET /tags", "GET", lambda ctx, rng: ("/tags?limit=100", None)),
+    Operation("GET /tags/{tag_id}", "GET", lambda ctx, rng: (f"/tags/{rng.choice(ctx.tag_ids)}", None)),
+    Operation("POST /tags", "POST", lambda ctx, rng: ("/tags", _body_tag(ctx, rng)), expect=201),
+    Operation("POST /login", "POST",
+              lambda ctx, rng: ("/login", {"username": "user", "password": "user123"}), auth=None),
+)}
+
+# Relative weights per operation
+MIXES: Dict[str, Dict[str, int]] = {
+    "read-heavy": {
+        "GET /movies": 10, "GET /movies/{movie_id}": 30, "GET /ratings": 5, "GET /ratings/{rating_id}": 20,
+        "GET /tags": 5, "GET /tags/{tag_id}": 10, "POST /ratings": 8, "PUT /ratings/{rating_id}": 5,
+        "POST /tags": 5, "POST /login": 2,
+    },
+    "write-heavy": {
+        "GET /movies/{movie_id}": 20, "GET /ratings/{rating_id}": 10, "POST /ratings": 35,
+        "PUT /ratings/{rating_id}": 20, "POST /tags": 13, "POST /login": 2,
+    },
+    "login": {"POST /login": 1},
+}
+
+
+class _Recorder:
+    """Latencies and errors per operation for one run."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_kinds: Dict[str, int] = {}
+
+    def ok(self, name: str, elapsed: float) -> None:
+        self.latencies.setdefault(name, []).append(elapsed)
+
+    def error(self, name: str, kind: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+        self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+
+
+async def _virtual_user(client: httpx.AsyncClient, ctx: BenchContext, ops: Sequence[Operation],
+                        weights: Sequence[int], rng: random.Random, deadline: float,
+                        recorder: _Recorder) -> None:
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        path, body = op.build(ctx, rng)
+        headers = {"Authorization": f"Bearer {ctx.tokens[op.auth]}"} if op.auth else None
+        t0 = time.perf_counter()
+        try:
+            response = await client.request(op.method, path, json=body, headers=headers)
+        except httpx.HTTPError as e:
+            recorder.error(op.name, type(e).__name__)
+            continue
+        if response.status_code == op.expect:
+            recorder.ok(op.name, time.perf_counter() - t0)
+        else:
+            recorder.error(op.name, f"HTTP {response.status_code}")
+
+
+async def _drive(base_url: str, ctx: BenchContext, mix: Dict[str, int], concurrency: int,
+                 duration: float, seed: int) -> Tuple[_Recorder, float]:
+    ops = [OPERATIONS[name] for name in mix]
+    weights = [mix[name] for name in mix]
+    recorder = _Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _virtual_user(client, ctx, ops, weights, random.Random(seed * 100_003 + i), deadline, recorder)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    return recorder, elapsed
+
+
+def run_load(mix: Dict[str, int], concurrency: int, duration: float, workers: int = 1,
+             seed: int = 0, snapshot: Optional[str] = None) -> dict:
+    """Run the mix against a fresh server with the given number of uvicorn workers."""
+    with AppServer(snapshot=snapshot, workers=workers) as server:
+        ctx = BenchContext(
+            tokens={},
+            movie_ids=sample_ids(server.db_path, "movies", "movie_id", n=100_000),
+            rating_ids=sample_ids(server.db_path, "ratings", "id", n=100_000),
+            tag_ids=sample_ids(server.db_path, "tags", "id", n=100_000),
+        )
+        with httpx.Client(base_url=server.base_url, timeout=30.0) as client:
+            ctx.tokens = {role: login(client, role) for role in CREDENTIALS}
+        recorder, elapsed = asyncio.run(_drive(server.base_url, ctx, mix, concurrency, duration, seed))
+
+    routes = {
+        name: summarize(recorder.latencies.get(name, []), recorder.errors.get(name, 0), elapsed)
+        for name in mix
+    }
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "duration": elapsed,
+        "total": summarize(all_latencies, sum(recorder.errors.values()), elapsed),
+        "error_kinds": recorder.error_kinds,
+        "routes": routes,
+    }
+
+
+def _print_run(result: dict) -> None:
+    print(f"\nworkers={result['workers']} concurrency={result['concurrency']} "
+          f"duration={result['duration']:.1f}s")
+    print(f"  {'route':<28} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, r in (*result["routes"].items(), ("TOTAL", result["total"])):
+        print(f"  {name:<28} {r['rps']:8.1f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} "
+              f"{r['error_rate']:6.1%}")
+    if result["error_kinds"]:
+        print("  errors: " + ", ".join(f"{k} x{v}" for k, v in sorted(result["error_kinds"].items())))
+
+
+def _print_scaling(runs: List[dict]) -> None:
+    base = runs[0]["total"]["rps"] or 1.0
+    print(f"\n  {'workers':>7} {'req/s':>9} {'speedup':>8} {'p99 ms':>8} {'errors':>7}")
+    for run in runs:
+        total = run["total"]
+        print(f"  {run['workers']:>7} {total['rps']:9.1f} {total['rps'] / base:7.2f}x "
+              f"{total['p99_ms']:8.2f} {total['error_rate']:6.1%}")
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    """A named mix, or explicit weights such as "GET /movies=3,POST /login=1"."""
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.rpartition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = int(weight)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test with per-route percentiles")
+    parser.add_argument("--mix", type=_parse_mix, default="read-heavy",
+                        help=f"One of {', '.join(MIXES)} or 'OP=WEIGHT,...' (default: read-heavy)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per run")
+    parser.add_argument("--workers", default="1", help="Comma-separated uvicorn worker counts to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--snapshot", help="Snapshot to serve (default: built from db/resources)")
+    parser.add_argument("--out", help="Write all runs as JSON to this file")
+    args = parser.parse_args(argv)
+
+    runs = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        runs.append(run_load(args.mix, args.concurrency, args.duration, workers, args.seed, args.snapshot))
+        _print_run(runs[-1])
+    if len(runs) > 1:
+        _print_scaling(runs)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"mix": args.mix, "runs": runs}, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Run the app under uvicorn against a private copy of a seeded snapshot.
+"""
+from __future__ import annotations
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import httpx
+
+from db import BASE_DIR, DB_DIR
+from db.snapshot import build_snapshot, restore_snapshot
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """Context manager that serves main:app from a fresh copy of a snapshot.
+
+    The snapshot defaults to one built from db/resources, so every run starts
+    from identical, fully indexed data and writes never touch app.db.
+    """
+
+    def __init__(self, snapshot: Optional[str] = None, workers: int = 1, port: Optional[int] = None,
+                 extra_args: Optional[List[str]] = None):
+        self.snapshot = snapshot
+        self.workers = workers
+        self.port = port or free_port()
+        self.extra_args = extra_args or []
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.db_path: Optional[str] = None
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+        self._proc: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "AppServer":
+        self.snapshot = self.snapshot or build_snapshot(DB_DIR)
+        self._tmp = tempfile.TemporaryDirectory(prefix="bench-")
+        self.db_path = os.path.join(self._tmp.name, "bench.db")
+        restore_snapshot(self.snapshot, self.db_path)
+
+        env = dict(os.environ, APP_DB_PATH=self.db_path)
+        env.setdefault("APP_TIMING_LOG", "0")
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--workers", str(self.workers), "--log-level", "warning",
+             *self.extra_args],
+            cwd=BASE_DIR, env=env,
+        )
+        try:
+            self._wait_ready()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def _wait_ready(self, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._proc.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self._proc.returncode}")
+            try:
+                if httpx.get(self.base_url + "/", timeout=1.0).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError(f"Server did not become ready within {timeout:.0f}s")
+
+    def __exit__(self, *exc) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+            self._proc = None
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
@@ -0,0 +1,76 @@
+"""
+Latency summaries and baseline comparison for benchmark results.
+"""
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+# Metrics where a higher value is a regression; everything else in
+# REGRESSION_METRICS regresses when it drops.
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+REGRESSION_METRICS = LATENCY_METRICS + ("rps",)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Summarise per-request latencies in seconds into the result format."""
+    values = sorted(latencies)
+    total = len(values) + errors
+    return {
+        "count": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "rps": total / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": 1000.0 * sum(values) / len(values) if values else 0.0,
+        "p50_ms": 1000.0 * percentile(values, 50),
+        "p90_ms": 1000.0 * percentile(values, 90),
+        "p95_ms": 1000.0 * percentile(values, 95),
+        "p99_ms": 1000.0 * percentile(values, 99),
+        "max_ms": 1000.0 * values[-1] if values else 0.0,
+    }
+
+
+@dataclass
+class Regression:
+    route: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return (f"{self.route}: {self.metric} {self.baseline:.2f} -> {self.current:.2f} "
+                f"({self.change:+.0%})")
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[Regression]:
+    """Routes whose latency grew, or throughput fell, by more than threshold (a fraction)."""
+    regressions = []
+    for route, result in current.items():
+        base = baseline.get(route)
+        if base is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            if metric not in base or metric not in result or not base[metric]:
+                continue
+            if metric in LATENCY_METRICS:
+                worse = result[metric] > base[metric] * (1.0 + threshold)
+            else:
+                worse = result[metric] < base[metric] * (1.0 - threshold)
+            if worse:
+                regressions.append(Regression(route, metric, base[metric], result[metric]))
+        if result.get("error_rate", 0.0) > base.get("error_rate", 0.0):
+            regressions.append(Regression(route, "error_rate", base.get("error_rate", 0.0), result["error_rate"]))
+    return regressions
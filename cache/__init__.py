@@ -0,0 +1,4 @@
+from .ttl_cache import TTLCache
+from .version import VersionStamp
+
+__all__ = ["TTLCache", "VersionStamp"]
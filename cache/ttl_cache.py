@@ -0,0 +1,82 @@
+"""
+Bounded, thread-safe LRU cache with per-entry expiry.
+"""
+from __future__ import annotations
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from monitoring.metrics import REGISTRY, cache_hit, cache_miss
+
+_MISSING = object()
+_caches: "weakref.WeakValueDictionary[str, TTLCache]" = weakref.WeakValueDictionary()
+
+
+class TTLCache:
+    """LRU cache of at most maxsize entries, each expiring at its own deadline.
+
+    Deadlines are absolute times on `clock` (wall-clock seconds by default, so
+    they can be taken straight from a JWT's exp claim). A cache with a name
+    reports hits and misses as cache_requests_total{cache=name} and its size
+    as cache_entries{cache=name}.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, name: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if name is not None:
+            _caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if now < expires_at:
+                    self._data.move_to_end(key)
+                else:
+                    del self._data[key]
+                    entry = _MISSING
+        if self.name is not None:
+            (cache_miss if entry is _MISSING else cache_hit)(self.name)
+        return default if entry is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Store a value until expires_at, or for the cache's ttl when not given."""
+        if self.maxsize <= 0:
+            return
+        if expires_at is None:
+            if self.ttl is None:
+                raise ValueError("expires_at is required for a cache without a ttl")
+            expires_at = self.clock() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _cache_sizes() -> Dict[Tuple[str, ...], float]:
+    return {(name,): len(cache) for name, cache in list(_caches.items())}
+
+
+REGISTRY.callback_gauge("cache_entries", "Entries currently held per cache", ("cache",), _cache_sizes)
@@ -0,0 +1,69 @@
+"""
+Version stamps shared by the worker processes of a node.
+
+A stamp is a 64-bit counter in a small memory-mapped file. Writers bump it
+after committing a change; caches put the current value in their keys, so
+every worker stops serving entries from before the change. Reading a stamp
+is a single unpack from shared memory.
+
+The file lives in a private (0700) per-user directory and is never opened
+through a symlink or when another user owns it: anyone who could rewind
+the counter could make caches serve entries from before a change.
+"""
+from __future__ import annotations
+import fcntl
+import hashlib
+import mmap
+import os
+import stat
+import struct
+import threading
+from typing import Optional
+
+_COUNTER = struct.Struct("<Q")
+
+
+def default_path(name: str, scope: str) -> str:
+    """A per-node file for a stamp, distinct for each scope (e.g. database path)."""
+    # Imported here: security imports cache for its own caches
+    from security.rate_limit import private_dir
+    digest = hashlib.sha1(scope.encode()).hexdigest()[:12]
+    return os.path.join(private_dir(), f"{digest}-{name}.version")
+
+
+class VersionStamp:
+    """Monotonic counter shared through a memory-mapped file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        info = os.fstat(self._fd)
+        if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid():
+            os.close(self._fd)
+            raise RuntimeError(f"{path} must be a regular file owned by uid {os.getuid()}")
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < _COUNTER.size:
+                os.ftruncate(self._fd, _COUNTER.size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map: Optional[mmap.mmap] = mmap.mmap(self._fd, _COUNTER.size)
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        return _COUNTER.unpack_from(self._map)[0]
+
+    def bump(self) -> int:
+        """Advance the stamp and return the new value."""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                value = _COUNTER.unpack_from(self._map)[0] + 1
+                _COUNTER.pack_into(self._map, 0, value)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        return value
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
@@ -3,5 +3,7 @@ from .movie_dao import MovieDAO
 from .link_dao import LinkDAO
 from .rating_dao import RatingDAO
 from .tag_dao import TagDAO
+from .refresh_token_dao import RefreshTokenDAO
+from .analysis_result_dao import AnalysisResultDAO
 
-__all__ = ["UserDAO", "MovieDAO", "LinkDAO", "RatingDAO", "TagDAO"]
+__all__ = ["UserDAO", "MovieDAO", "LinkDAO", "RatingDAO", "TagDAO", "RefreshTokenDAO", "AnalysisResultDAO"]
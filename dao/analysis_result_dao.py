@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from model.analysis_result import AnalysisResult
+from typing import Dict, Optional
+import time
+
+
+class AnalysisResultDAO:
+
+    @staticmethod
+    def save_many(db: Session, results: Dict[str, list]) -> None:
+        """Store results by request_id; results already stored (by any worker) are left as they are."""
+        if not results:
+            return
+        now = int(time.time())
+        db.execute(
+            insert(AnalysisResult).on_conflict_do_nothing(index_elements=["request_id"]),
+            [{"request_id": request_id, "people": people, "created_at": now}
+             for request_id, people in results.items()]
+        )
+        db.commit()
+
+    @staticmethod
+    def get_people(db: Session, request_id: str) -> Optional[list]:
+        return db.scalar(select(AnalysisResult.people).where(AnalysisResult.request_id == request_id))
+
+    @staticmethod
+    def latest_created_at(db: Session) -> Optional[int]:
+        return db.scalar(select(func.max(AnalysisResult.created_at)))
+
+    @staticmethod
+    def delete_older_than(db: Session, cutoff: int) -> int:
+        deleted = db.execute(delete(AnalysisResult).where(AnalysisResult.created_at < cutoff)).rowcount
+        db.commit()
+        return deleted
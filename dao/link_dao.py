@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update, delete
+from sqlalchemy.dialects.sqlite import insert
 from model.link import Link
 from typing import Optional, List
+from dao.returning import execute_returning, execute_delete
 
 
 class LinkDAO:
@@ -26,35 +29,35 @@ class LinkDAO:
         return db.query(Link).filter(Link.tmdb_id == tmdb_id).first()
 
     @staticmethod
-    def create(db: Session, movie_id: int, imdb_id: str, tmdb_id: Optional[str] = None) -> Link:
-        """Create a new link."""
-        new_link = Link(
-            movie_id=movie_id,
-            imdb_id=imdb_id,
-            tmdb_id=tmdb_id
+    def create(db: Session, movie_id: int, imdb_id: str, tmdb_id: Optional[str] = None) -> Optional[Link]:
+        """Create a new link. Returns None if the movie already has a link."""
+        stmt = (
+            insert(Link)
+            .values(movie_id=movie_id, imdb_id=imdb_id, tmdb_id=tmdb_id)
+            .on_conflict_do_nothing(index_elements=[Link.movie_id])
+            .returning(Link)
         )
-        db.add(new_link)
-        db.commit()
-        db.refresh(new_link)
-        return new_link
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def update(db: Session, link: Link, imdb_id: str = None, tmdb_id: str = None) -> Link:
-        """Update an existing link."""
+    def update(db: Session, movie_id: int, imdb_id: str = None, tmdb_id: str = None) -> Optional[Link]:
+        """Update an existing link. Returns None if it does not exist."""
+        values = {}
         if imdb_id is not None:
-            link.imdb_id = imdb_id
+            values["imdb_id"] = imdb_id
         if tmdb_id is not None:
-            link.tmdb_id = tmdb_id
+            values["tmdb_id"] = tmdb_id
 
-        db.commit()
-        db.refresh(link)
-        return link
+        if not values:
+            return LinkDAO.get_by_movie_id(db, movie_id)
+
+        stmt = update(Link).where(Link.movie_id == movie_id).values(**values).returning(Link)
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def delete(db: Session, link: Link) -> None:
-        """Delete a link."""
-        db.delete(link)
-        db.commit()
+    def delete(db: Session, movie_id: int) -> bool:
+        """Delete a link. Returns False if it does not exist."""
+        return execute_delete(db, delete(Link).where(Link.movie_id == movie_id))
 
     @staticmethod
     def count(db: Session) -> int:
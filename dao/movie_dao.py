@@ -1,6 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import update, delete
+from sqlalchemy.dialects.sqlite import insert
 from model.movie import Movie
 from typing import Optional, List
+from dao.returning import execute_returning, execute_delete
 
 
 class MovieDAO:
@@ -31,35 +34,35 @@ class MovieDAO:
         return db.query(Movie).filter(Movie.genres.like(f"%{genre}%")).limit(limit).all()
 
     @staticmethod
-    def create(db: Session, movie_id: int, title: str, genres: str) -> Movie:
-        """Create a new movie."""
-        new_movie = Movie(
-            movie_id=movie_id,
-            title=title,
-            genres=genres
+    def create(db: Session, movie_id: int, title: str, genres: str) -> Optional[Movie]:
+        """Create a new movie. Returns None if the movie ID is already taken."""
+        stmt = (
+            insert(Movie)
+            .values(movie_id=movie_id, title=title, genres=genres)
+            .on_conflict_do_nothing(index_elements=[Movie.movie_id])
+            .returning(Movie)
         )
-        db.add(new_movie)
-        db.commit()
-        db.refresh(new_movie)
-        return new_movie
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def update(db: Session, movie: Movie, title: str = None, genres: str = None) -> Movie:
-        """Update an existing movie."""
+    def update(db: Session, movie_id: int, title: str = None, genres: str = None) -> Optional[Movie]:
+        """Update an existing movie. Returns None if it does not exist."""
+        values = {}
         if title is not None:
-            movie.title = title
+            values["title"] = title
         if genres is not None:
-            movie.genres = genres
+            values["genres"] = genres
 
-        db.commit()
-        db.refresh(movie)
-        return movie
+        if not values:
+            return MovieDAO.get_by_id(db, movie_id)
+
+        stmt = update(Movie).where(Movie.movie_id == movie_id).values(**values).returning(Movie)
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def delete(db: Session, movie: Movie) -> None:
-        """Delete a movie."""
-        db.delete(movie)
-        db.commit()
+    def delete(db: Session, movie_id: int) -> bool:
+        """Delete a movie. Returns False if it does not exist."""
+        return execute_delete(db, delete(Movie).where(Movie.movie_id == movie_id))
 
     @staticmethod
     def count(db: Session) -> int:
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from model.rating import Rating
 from typing import Optional, List
-from sqlalchemy import func
+from sqlalchemy import func, insert, update, delete
+from dao.returning import execute_returning, execute_delete
 
 
 class RatingDAO:
@@ -48,34 +49,32 @@ class RatingDAO:
     @staticmethod
     def create(db: Session, user_id: int, movie_id: int, rating: float, timestamp: int) -> Rating:
         """Create a new rating."""
-        new_rating = Rating(
-            user_id=user_id,
-            movie_id=movie_id,
-            rating=rating,
-            timestamp=timestamp
+        stmt = (
+            insert(Rating)
+            .values(user_id=user_id, movie_id=movie_id, rating=rating, timestamp=timestamp)
+            .returning(Rating)
         )
-        db.add(new_rating)
-        db.commit()
-        db.refresh(new_rating)
-        return new_rating
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def update(db: Session, rating: Rating, new_rating: float = None, timestamp: int = None) -> Rating:
-        """Update an existing rating."""
+    def update(db: Session, rating_id: int, new_rating: float = None, timestamp: int = None) -> Optional[Rating]:
+        """Update an existing rating. Returns None if it does not exist."""
+        values = {}
         if new_rating is not None:
-            rating.rating = new_rating
+            values["rating"] = new_rating
         if timestamp is not None:
-            rating.timestamp = timestamp
+            values["timestamp"] = timestamp
 
-        db.commit()
-        db.refresh(rating)
-        return rating
+        if not values:
+            return RatingDAO.get_by_id(db, rating_id)
+
+        stmt = update(Rating).where(Rating.id == rating_id).values(**values).returning(Rating)
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def delete(db: Session, rating: Rating) -> None:
-        """Delete a rating."""
-        db.delete(rating)
-        db.commit()
+    def delete(db: Session, rating_id: int) -> bool:
+        """Delete a rating. Returns False if it does not exist."""
+        return execute_delete(db, delete(Rating).where(Rating.id == rating_id))
 
     @staticmethod
     def count(db: Session) -> int:
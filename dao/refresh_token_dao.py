@@ -0,0 +1,81 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, delete, select
+from model.refresh_token import RefreshToken
+from typing import Optional, Tuple
+from dao.returning import execute_returning, execute_delete
+import hashlib
+import logging
+import os
+import secrets
+import time
+import uuid
+
+logger = logging.getLogger("app.auth")
+
+REFRESH_TOKEN_TTL = int(os.environ.get("APP_REFRESH_TTL_DAYS", "30")) * 86400
+
+
+def hash_refresh_token(token: str) -> str:
+    """Refresh tokens are 256 random bits, so a plain sha256 is enough to store them."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class RefreshTokenDAO:
+
+    @staticmethod
+    def issue(db: Session, user_id: int, family: Optional[str] = None) -> str:
+        """Create a refresh token for a user and return it; only its hash is stored."""
+        token = secrets.token_urlsafe(32)
+        db.execute(insert(RefreshToken).values(
+            token_hash=hash_refresh_token(token),
+            user_id=user_id,
+            family=family or uuid.uuid4().hex,
+            expires_at=int(time.time()) + REFRESH_TOKEN_TTL,
+            revoked=0
+        ))
+        db.commit()
+        return token
+
+    @staticmethod
+    def rotate(db: Session, token: str) -> Optional[Tuple[int, str]]:
+        """Exchange a refresh token for a new one in the same family.
+
+        Returns (user_id, new token), or None when the token is unknown,
+        expired, revoked or already used. Presenting an already used token
+        means it was copied, so the whole family is revoked.
+        """
+        now = int(time.time())
+        token_hash = hash_refresh_token(token)
+        # Claiming the token is a single conditional UPDATE, so concurrent exchanges cannot both win
+        claimed = execute_returning(db, update(RefreshToken).where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked == 0,
+            RefreshToken.expires_at > now
+        ).values(used_at=now).returning(RefreshToken))
+        if claimed is None:
+            existing = db.scalars(select(RefreshToken).where(RefreshToken.token_hash == token_hash)).first()
+            if existing is not None and existing.used_at is not None and not existing.revoked:
+                logger.warning("Refresh token reuse for user %s, revoking family %s", existing.user_id, existing.family)
+                RefreshTokenDAO.revoke_family(db, existing.family)
+            return None
+        return claimed.user_id, RefreshTokenDAO.issue(db, claimed.user_id, claimed.family)
+
+    @staticmethod
+    def revoke(db: Session, token: str) -> bool:
+        """Revoke a refresh token and every token rotated from the same login."""
+        family = db.scalars(
+            select(RefreshToken.family).where(RefreshToken.token_hash == hash_refresh_token(token))
+        ).first()
+        return family is not None and RefreshTokenDAO.revoke_family(db, family) > 0
+
+    @staticmethod
+    def revoke_family(db: Session, family: str) -> int:
+        result = db.execute(update(RefreshToken).where(RefreshToken.family == family).values(revoked=1))
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def delete_expired(db: Session) -> bool:
+        """Delete refresh tokens past their expiry; main.py runs this hourly."""
+        return execute_delete(db, delete(RefreshToken).where(RefreshToken.expires_at <= int(time.time())))
@@ -0,0 +1,26 @@
+from typing import Optional, TypeVar
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+T = TypeVar("T")
+
+
+def execute_returning(db: Session, stmt: Executable) -> Optional[T]:
+    """Run an INSERT/UPDATE ... RETURNING statement and commit.
+
+    The returned entity is expunged before the commit so it keeps the
+    values from the RETURNING clause instead of being expired and
+    re-selected on first attribute access.
+    """
+    obj = db.scalars(stmt).one_or_none()
+    if obj is not None:
+        db.expunge(obj)
+    db.commit()
+    return obj
+
+
+def execute_delete(db: Session, stmt: Executable) -> bool:
+    """Run a DELETE statement, commit, and report whether a row was affected."""
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount > 0
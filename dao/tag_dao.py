@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from model.tag import Tag
 from typing import Optional, List
-from sqlalchemy import func
+from sqlalchemy import func, insert, update, delete
+from dao.returning import execute_returning, execute_delete
 
 
 class TagDAO:
@@ -47,34 +48,32 @@ class TagDAO:
     @staticmethod
     def create(db: Session, user_id: int, movie_id: int, tag: str, timestamp: int) -> Tag:
         """Create a new tag."""
-        new_tag = Tag(
-            user_id=user_id,
-            movie_id=movie_id,
-            tag=tag,
-            timestamp=timestamp
+        stmt = (
+            insert(Tag)
+            .values(user_id=user_id, movie_id=movie_id, tag=tag, timestamp=timestamp)
+            .returning(Tag)
         )
-        db.add(new_tag)
-        db.commit()
-        db.refresh(new_tag)
-        return new_tag
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def update(db: Session, tag_obj: Tag, tag: str = None, timestamp: int = None) -> Tag:
-        """Update an existing tag."""
+    def update(db: Session, tag_id: int, tag: str = None, timestamp: int = None) -> Optional[Tag]:
+        """Update an existing tag. Returns None if it does not exist."""
+        values = {}
         if tag is not None:
-            tag_obj.tag = tag
+            values["tag"] = tag
         if timestamp is not None:
-            tag_obj.timestamp = timestamp
+            values["timestamp"] = timestamp
 
-        db.commit()
-        db.refresh(tag_obj)
-        return tag_obj
+        if not values:
+            return TagDAO.get_by_id(db, tag_id)
+
+        stmt = update(Tag).where(Tag.id == tag_id).values(**values).returning(Tag)
+        return execute_returning(db, stmt)
 
     @staticmethod
-    def delete(db: Session, tag: Tag) -> None:
-        """Delete a tag."""
-        db.delete(tag)
-        db.commit()
+    def delete(db: Session, tag_id: int) -> bool:
+        """Delete a tag. Returns False if it does not exist."""
+        return execute_delete(db, delete(Tag).where(Tag.id == tag_id))
 
     @staticmethod
     def count(db: Session) -> int:
@@ -1,7 +1,47 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, delete, select, text
 from model.user import User
-from typing import Optional, List
-import bcrypt
+from typing import Dict, Iterable, NamedTuple, Optional, List, Set, Tuple
+import os
+import sys
+from cache import TTLCache, VersionStamp
+from cache.version import default_path
+from dao.returning import execute_returning, execute_delete
+from db.database import DB_PATH
+from security.passwords import check_password, hash_password, hash_passwords, needs_rehash
+
+# Bumped after every committed change to the users table, for caches of user data
+users_version = VersionStamp(default_path("users", DB_PATH))
+
+
+class Credentials(NamedTuple):
+    """What /login needs about a user, cheap to keep in memory."""
+    id: int
+    username: str
+    hashed_password: str
+    roles: list
+
+
+# username -> (users version, Credentials); an entry is only used while the version is unchanged
+credentials = TTLCache(maxsize=int(os.environ.get("APP_CREDENTIAL_CACHE_SIZE", "1024")), ttl=300.0,
+                       name="credentials")
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string above every string starting with `prefix`, or None if there is none."""
+    # Strings ordered by code point, as SQLite compares UTF-8; U+10FFFF cannot be incremented,
+    # so drop it and increment the character before it
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    following = ord(stripped[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates cannot be encoded, and nothing stored sorts between them and U+E000
+        following = 0xE000
+    return stripped[:-1] + chr(following)
+
+
+_HAS_ROLE = text("EXISTS (SELECT 1 FROM json_each(users.roles) WHERE json_each.value = :role)")
 
 
 class UserDAO:
@@ -12,11 +52,42 @@ class UserDAO:
 
         return db.query(User).all()
 
+    @staticmethod
+    def get_page(db: Session, after_id: int = 0, limit: int = 100, role: Optional[str] = None,
+                 username_prefix: Optional[str] = None) -> List[User]:
+
+        # Keyset pagination: the page after `after_id` in id order, so deep pages cost the same as the first
+        stmt = select(User).where(User.id > after_id)
+        if username_prefix:
+            # A range on username (not LIKE, which is case-insensitive in SQLite) can use its index
+            stmt = stmt.where(User.username >= username_prefix)
+            upper = _prefix_upper_bound(username_prefix)
+            if upper is not None:
+                stmt = stmt.where(User.username < upper)
+        if role:
+            stmt = stmt.where(_HAS_ROLE.bindparams(role=role))
+        return list(db.scalars(stmt.order_by(User.id).limit(limit)))
+
     @staticmethod
     def get_by_username(db: Session, username: str) -> Optional[User]:
 
         return db.query(User).filter(User.username == username).first()
 
+    @staticmethod
+    def get_credentials(db: Session, username: str) -> Optional[Credentials]:
+
+        # Read the version before the query: a change committed meanwhile bumps it past what is stored
+        version = users_version.get()
+        cached = credentials.get(username)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        user = UserDAO.get_by_username(db, username)
+        if user is None:
+            return None
+        found = Credentials(user.id, user.username, user.hashed_password, list(user.roles or []))
+        credentials.set(username, (version, found))
+        return found
+
     @staticmethod
     def get_by_email(db: Session, email: str) -> Optional[User]:
 
@@ -30,28 +101,79 @@ class UserDAO:
     @staticmethod
     def create_user(db: Session, username: str, email: str, password: str, roles: list) -> User:
 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        hashed_password = hash_password(password)
 
-        new_user = User(
+        stmt = insert(User).values(
             username=username,
             email=email,
-            hashed_password=hashed_password.decode('utf-8'),
+            hashed_password=hashed_password,
             roles=roles
-        )
+        ).returning(User)
+
+        user = execute_returning(db, stmt)
+        users_version.bump()
+        return user
+
+    @staticmethod
+    def find_taken(db: Session, usernames: Iterable[str], emails: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+
+        # One set-based query for a whole batch instead of two lookups per user
+        usernames, emails = list(usernames), list(emails)
+        rows = db.execute(
+            select(User.username, User.email).where(User.username.in_(usernames) | User.email.in_(emails))
+        ).all()
+        return {row.username for row in rows} & set(usernames), {row.email for row in rows} & set(emails)
+
+    @staticmethod
+    def create_users(db: Session, users: List[Dict]) -> List[User]:
+
+        # Passwords are hashed in parallel on the hashing pool, then every row is inserted in one transaction
+        hashed = hash_passwords([user["password"] for user in users])
+        rows = [
+            {
+                "username": user["username"],
+                "email": user["email"],
+                "hashed_password": hashed_password,
+                "roles": user["roles"]
+            }
+            for user, hashed_password in zip(users, hashed)
+        ]
+        try:
+            created = list(db.scalars(insert(User).returning(User, sort_by_parameter_order=True), rows))
+            for user in created:
+                db.expunge(user)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        users_version.bump()
+        return created
+
+    @staticmethod
+    def verify_password(user: "User | Credentials", password: str) -> bool:
 
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        return check_password(password, user.hashed_password)
 
-        return new_user
+    @staticmethod
+    def password_needs_rehash(user: "User | Credentials") -> bool:
+
+        return needs_rehash(user.hashed_password)
 
     @staticmethod
-    def verify_password(user: User, password: str) -> bool:
+    def update_password(db: Session, user_id: int, password: str) -> Optional[User]:
+
+        stmt = update(User).where(User.id == user_id).values(
+            hashed_password=hash_password(password)
+        ).returning(User)
 
-        return bcrypt.checkpw(password.encode('utf-8'), user.hashed_password.encode('utf-8'))
+        user = execute_returning(db, stmt)
+        users_version.bump()
+        return user
 
     @staticmethod
-    def delete_user(db: Session, user: User) -> None:
+    def delete_user(db: Session, user_id: int) -> bool:
 
-        db.delete(user)
-        db.commit()
+        deleted = execute_delete(db, delete(User).where(User.id == user_id))
+        if deleted:
+            users_version.bump()
+        return deleted
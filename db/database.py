@@ -1,20 +1,28 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import time
+
+from monitoring.pool import InstrumentedQueuePool, register_pool_metrics
+from monitoring.sql import statement_executed
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, "app.db")
+DB_PATH = os.environ.get("APP_DB_PATH", os.path.join(BASE_DIR, "app.db"))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
+    poolclass=InstrumentedQueuePool,
     future=True
 )
+register_pool_metrics(engine)
 
-# Enable foreign key constraints for SQLite
-@event.listens_for(engine, "connect")
+# Enable foreign key constraints for SQLite on every engine, so ON DELETE CASCADE
+# applies to the RETURNING-based write path in the DAOs as well as to test engines
+@event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     try:
         cursor = dbapi_connection.cursor()
@@ -23,6 +31,22 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     except Exception:
         pass
 
+
+# Attribute every statement to the current request, and log slow queries and
+# repeated statement shapes (see monitoring/sql.py)
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is not None:
+        statement_executed(conn.connection.dbapi_connection, statement, parameters, executemany,
+                           time.perf_counter() - started)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
 Base = declarative_base()
@@ -0,0 +1,310 @@
+"""
+Incremental delta import from full MovieLens CSV snapshots.
+
+Rows on both sides are ordered by their natural key and grouped into chunks
+by ranges of the leading key column. Each chunk is hashed; only chunks whose
+hashes differ between the CSV and the database are compared row by row with
+a sorted merge, and only the resulting inserts, updates and deletes are
+written. The CSV is streamed one chunk at a time; the database is read
+once for hashing and re-read only for changed chunks, so write cost is
+proportional to what changed.
+
+Tables are brought in line one after another, parents first, and changes
+are written in batches of FLUSH_ROWS as chunks are compared, so memory
+stays bounded however much changed. Everything is committed at the end, in
+one transaction. A child table is compared after its parent was written,
+so rows removed by a cascading delete are not deleted twice.
+
+If a CSV repeats a natural key, the last occurrence wins. If the table
+holds duplicate rows for a key, all but one are deleted.
+"""
+from __future__ import annotations
+import csv
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+from sqlalchemy import and_, bindparam, select
+from sqlalchemy.engine import Connection, Engine
+
+from db.bulk_loader import TABLE_SPECS, TableSpec, insert_sql
+
+FLUSH_ROWS = 10_000
+
+
+@dataclass(frozen=True)
+class DeltaSpec:
+    """Natural key and chunking for one MovieLens table."""
+    spec: TableSpec
+    key_columns: Tuple[str, ...]
+    chunk_width: int
+
+    @property
+    def value_columns(self) -> Tuple[str, ...]:
+        return tuple(c for c in self.spec.columns if c not in self.key_columns)
+
+    def split(self, row: tuple) -> Tuple[tuple, tuple]:
+        """Split a row in spec column order into (key, values)."""
+        named = dict(zip(self.spec.columns, row))
+        return tuple(named[c] for c in self.key_columns), tuple(named[c] for c in self.value_columns)
+
+
+DELTA_SPECS: Tuple[DeltaSpec, ...] = (
+    DeltaSpec(TABLE_SPECS[0], ("movie_id",), 1000),
+    DeltaSpec(TABLE_SPECS[1], ("movie_id",), 1000),
+    DeltaSpec(TABLE_SPECS[2], ("user_id", "movie_id"), 16),
+    DeltaSpec(TABLE_SPECS[3], ("user_id", "movie_id", "tag"), 64),
+)
+
+
+@dataclass
+class Changes:
+    """Pending writes for one table: insert rows, update values + primary key, delete primary keys."""
+    inserts: List[tuple] = field(default_factory=list)
+    updates: List[tuple] = field(default_factory=list)
+    deletes: List[tuple] = field(default_factory=list)
+    duplicates: int = 0
+
+    def __len__(self) -> int:
+        return len(self.inserts) + len(self.updates) + len(self.deletes)
+
+
+@dataclass
+class TableDelta:
+    table: str
+    chunks_total: int = 0
+    chunks_changed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    # Extra rows sharing a natural key, removed so the key matches the CSV's single row
+    duplicates: int = 0
+
+    def record(self, changes: Changes) -> None:
+        self.inserted += len(changes.inserts)
+        self.updated += len(changes.updates)
+        self.deleted += len(changes.deletes)
+        self.duplicates += changes.duplicates
+
+
+Entry = Tuple[tuple, tuple]
+Row = Tuple[tuple, tuple, tuple]
+
+
+def _chunk_of(delta: DeltaSpec, key: tuple) -> int:
+    return key[0] // delta.chunk_width
+
+
+def _hash_entries(entries: Iterable[Entry]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for key, values in entries:
+        h.update(repr((key, values)).encode('utf-8'))
+    return h.digest()
+
+
+def _csv_entries(delta: DeltaSpec, csv_path: str) -> Iterator[Entry]:
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield delta.split(delta.spec.convert(row))
+
+
+def _scattered_chunks(delta: DeltaSpec, csv_path: str) -> Set[int]:
+    """Chunks whose rows do not form one contiguous run in the CSV."""
+    closed: Set[int] = set()
+    scattered: Set[int] = set()
+    current = None
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        lead = next(reader).index(delta.spec.field(delta.key_columns[0]))
+        for row in reader:
+            chunk = int(row[lead]) // delta.chunk_width
+            if chunk != current:
+                if chunk in closed:
+                    scattered.add(chunk)
+                if current is not None:
+                    closed.add(current)
+                current = chunk
+    return scattered
+
+
+def read_csv_chunks(delta: DeltaSpec, csv_path: str) -> Iterator[Tuple[int, List[Entry]]]:
+    """Stream a CSV as (chunk, entries) pairs, entries sorted and de-duplicated by key.
+
+    Only one chunk is held in memory at a time when the CSV is grouped by
+    its leading key column, as the MovieLens exports are. Chunks whose rows
+    are scattered through the file (rows appended out of order) are found
+    by a first, lightweight pass and collected separately.
+    """
+    scattered = _scattered_chunks(delta, csv_path)
+    held: Dict[int, Dict[tuple, tuple]] = {chunk: {} for chunk in scattered}
+    current, latest = None, {}
+    for key, values in _csv_entries(delta, csv_path):
+        chunk = _chunk_of(delta, key)
+        if chunk in held:
+            held[chunk][key] = values
+            continue
+        if chunk != current:
+            if current is not None:
+                yield current, sorted(latest.items())
+            current, latest = chunk, {}
+        latest[key] = values
+    if current is not None:
+        yield current, sorted(latest.items())
+    for chunk in sorted(held):
+        yield chunk, sorted(held[chunk].items())
+
+
+def _db_entries(conn: Connection, delta: DeltaSpec, lo: int = None, hi: int = None) -> Iterator[Entry]:
+    table = delta.spec.table
+    keys = [table.c[c] for c in delta.key_columns]
+    values = [table.c[c] for c in delta.value_columns]
+    stmt = select(*keys, *values).order_by(*keys)
+    if lo is not None:
+        stmt = stmt.where(and_(keys[0] >= lo, keys[0] < hi))
+    n = len(keys)
+    for row in conn.execute(stmt):
+        yield tuple(row[:n]), tuple(row[n:])
+
+
+def _db_rows(conn: Connection, delta: DeltaSpec, lo: int, hi: int) -> List[Row]:
+    """(primary key, key, values) for the rows of one chunk, duplicates of a key in primary key order."""
+    table = delta.spec.table
+    pk = list(table.primary_key.columns)
+    keys = [table.c[c] for c in delta.key_columns]
+    values = [table.c[c] for c in delta.value_columns]
+    stmt = select(*pk, *keys, *values).where(and_(keys[0] >= lo, keys[0] < hi)).order_by(*keys, *pk)
+    p, k = len(pk), len(pk) + len(keys)
+    return [(tuple(row[:p]), tuple(row[p:k]), tuple(row[k:])) for row in conn.execute(stmt)]
+
+
+def _chunk_hashes(delta: DeltaSpec, entries: Iterable[Entry]) -> Dict[int, bytes]:
+    return {
+        chunk: _hash_entries(group)
+        for chunk, group in groupby(entries, key=lambda e: _chunk_of(delta, e[0]))
+    }
+
+
+def merge_entries(delta: DeltaSpec, incoming: List[Entry], current: List[Row], result: Changes) -> None:
+    """Sorted merge of key-ordered CSV entries and table rows into inserts, updates and deletes.
+
+    Updates and deletes address rows by primary key. Where the table holds
+    several rows for one key (the API allows duplicate ratings and tags),
+    the first is matched against the CSV and the others are deleted and
+    counted as duplicates.
+    """
+    i = j = 0
+    while i < len(incoming) or j < len(current):
+        if j >= len(current) or (i < len(incoming) and incoming[i][0] < current[j][1]):
+            key, values = incoming[i]
+            result.inserts.append(_row_from(delta, key, values))
+            i += 1
+            continue
+        pk, key, values = current[j]
+        j += 1
+        if i < len(incoming) and incoming[i][0] == key:
+            if incoming[i][1] != values:
+                result.updates.append(incoming[i][1] + pk)
+            i += 1
+        else:
+            result.deletes.append(pk)
+        while j < len(current) and current[j][1] == key:
+            result.deletes.append(current[j][0])
+            result.duplicates += 1
+            j += 1
+
+
+def _row_from(delta: DeltaSpec, key: tuple, values: tuple) -> tuple:
+    named = dict(zip(delta.key_columns, key))
+    named.update(zip(delta.value_columns, values))
+    return tuple(named[c] for c in delta.spec.columns)
+
+
+def import_table(conn: Connection, delta: DeltaSpec, csv_path: str, dry_run: bool = False) -> TableDelta:
+    """Make the table match the CSV snapshot, writing changes in batches; the caller commits."""
+    result = TableDelta(delta.spec.name)
+    current_hashes = _chunk_hashes(delta, _db_entries(conn, delta))
+    changes = Changes()
+
+    def flush() -> None:
+        if not dry_run:
+            apply_changes(conn, delta, changes)
+        result.record(changes)
+        changes.inserts.clear()
+        changes.updates.clear()
+        changes.deletes.clear()
+        changes.duplicates = 0
+
+    def diff_chunk(chunk: int, incoming: List[Entry]) -> None:
+        if _hash_entries(incoming) == current_hashes.get(chunk):
+            return
+        result.chunks_changed += 1
+        lo = chunk * delta.chunk_width
+        current = _db_rows(conn, delta, lo, lo + delta.chunk_width) if chunk in current_hashes else []
+        merge_entries(delta, incoming, current, changes)
+        if len(changes) >= FLUSH_ROWS:
+            flush()
+
+    seen: Set[int] = set()
+    for chunk, incoming in read_csv_chunks(delta, csv_path):
+        seen.add(chunk)
+        diff_chunk(chunk, incoming)
+    for chunk in sorted(set(current_hashes) - seen):
+        diff_chunk(chunk, [])
+    flush()
+    result.chunks_total = len(seen | set(current_hashes))
+    return result
+
+
+def _update_sql(conn: Connection, delta: DeltaSpec) -> str:
+    table = delta.spec.table
+    stmt = (
+        table.update()
+        .where(and_(*(c == bindparam(f"k_{c.name}") for c in table.primary_key.columns)))
+        .values({c: bindparam(f"v_{c}") for c in delta.value_columns})
+    )
+    return str(stmt.compile(dialect=conn.dialect))
+
+
+def _delete_sql(conn: Connection, delta: DeltaSpec) -> str:
+    table = delta.spec.table
+    stmt = table.delete().where(and_(*(c == bindparam(f"k_{c.name}") for c in table.primary_key.columns)))
+    return str(stmt.compile(dialect=conn.dialect))
+
+
+def apply_changes(conn: Connection, delta: DeltaSpec, changes: Changes) -> None:
+    """Write one batch of changes to the table, without committing.
+
+    Each batch comes from whole chunks, and the merge addresses updates and
+    deletes by primary key, so the three statements never touch the same row.
+    """
+    if changes.inserts:
+        conn.exec_driver_sql(insert_sql(conn, delta.spec), changes.inserts)
+    if changes.updates:
+        conn.exec_driver_sql(_update_sql(conn, delta), changes.updates)
+    if changes.deletes:
+        conn.exec_driver_sql(_delete_sql(conn, delta), changes.deletes)
+
+
+def delta_import(
+    engine: Engine,
+    csv_dir: str,
+    specs: Sequence[DeltaSpec] = DELTA_SPECS,
+    dry_run: bool = False,
+) -> List[TableDelta]:
+    """Bring the database in line with the CSV snapshots in csv_dir, writing only what changed."""
+    started = time.perf_counter()
+    deltas = []
+    with engine.connect() as conn:
+        for delta in specs:
+            changes = import_table(conn, delta, os.path.join(csv_dir, delta.spec.csv_name), dry_run)
+            deltas.append(changes)
+            print(f"  {changes.table}: {changes.chunks_changed}/{changes.chunks_total} chunks changed, "
+                  f"+{changes.inserted} ~{changes.updated} -{changes.deleted}"
+                  + (f" ({changes.duplicates} duplicates)" if changes.duplicates else ""))
+        if not dry_run:
+            conn.commit()
+    print(f"  delta {'computed' if dry_run else 'applied'} in {time.perf_counter() - started:.2f}s")
+    return deltas
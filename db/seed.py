@@ -6,6 +6,9 @@ Usage:
     python -m db.seed              # Seed only if database is empty
     python -m db.seed --force      # Drop and recreate all data
     python -m db.seed --users-only # Only create initial users
+    python -m db.seed --fast       # Bulk-load CSVs with parallel parsing and Core executemany
+    python -m db.seed --stream     # Resumable streaming import (re-run to resume after a crash)
+    python -m db.seed --delta      # Apply only the differences between the CSVs and the database
 """
 from __future__ import annotations
 import os
@@ -17,6 +20,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select
 
 from db import engine, DB_DIR, SessionLocal, Base
+from db.bulk_loader import bulk_load
+from db.stream_import import stream_import
+from db.delta_import import delta_import
 from model.movie import Movie
 from model.link import Link
 from model.rating import Rating
@@ -144,11 +150,13 @@ def seed_initial_users(session: Session):
         print("  - Regular user already exists")
 
 
-def seed_movie_data(session: Session, force: bool = False):
+def seed_movie_data(
+    session: Session, force: bool = False, fast: bool = False, stream: bool = False, delta: bool = False
+):
     """Seed all movie-related data from CSV files."""
-    # Check if movie data already exists
+    # Check if movie data already exists; stream and delta modes handle existing data themselves
     existing = session.scalar(select(Movie).limit(1))
-    if existing and not force:
+    if existing and not force and not stream and not delta:
         print("Database already has movie data; skipping movie seeding.")
         return False
 
@@ -162,6 +170,27 @@ def seed_movie_data(session: Session, force: bool = False):
         print("Warning: CSV files not found in db/resources/. Skipping movie data seeding.")
         return False
 
+    if delta:
+        print("Applying movie data delta...")
+        session.commit()
+        delta_import(engine, DB_DIR)
+        print("  ✓ Movie data refreshed successfully")
+        return True
+
+    if stream:
+        print("Streaming movie data...")
+        session.commit()
+        stream_import(engine, DB_DIR)
+        print("  ✓ Movie data imported successfully")
+        return True
+
+    if fast:
+        print("Bulk-loading movie data...")
+        session.commit()
+        bulk_load(engine, DB_DIR)
+        print("  ✓ Movie data loaded successfully")
+        return True
+
     print("Seeding movie data...")
     print("  Seeding movies...")
     seed_movies(session, movies_csv)
@@ -175,7 +204,9 @@ def seed_movie_data(session: Session, force: bool = False):
     return True
 
 
-def main(force: bool = False, users_only: bool = False):
+def main(
+    force: bool = False, users_only: bool = False, fast: bool = False, stream: bool = False, delta: bool = False
+):
     """Main seeding function."""
     print("=" * 50)
     print("Database Seeding")
@@ -199,7 +230,7 @@ def main(force: bool = False, users_only: bool = False):
         # Seed movie data (unless users-only mode)
         if not users_only:
             print()
-            seed_movie_data(session, force=force)
+            seed_movie_data(session, force=force, fast=fast, stream=stream, delta=delta)
 
     print()
     print("=" * 50)
@@ -210,9 +241,12 @@ def main(force: bool = False, users_only: bool = False):
 if __name__ == "__main__":
     force = "--force" in sys.argv
     users_only = "--users-only" in sys.argv
+    fast = "--fast" in sys.argv
+    stream = "--stream" in sys.argv
+    delta = "--delta" in sys.argv
 
     try:
-        main(force=force, users_only=users_only)
+        main(force=force, users_only=users_only, fast=fast, stream=stream, delta=delta)
     except Exception as e:
         print(f"\n❌ Error during seeding: {e}")
         import traceback
@@ -0,0 +1,196 @@
+"""
+Prebuilt, content-addressed database snapshots.
+
+A snapshot is a fully seeded and indexed SQLite file named after a hash of
+the schema and the source CSVs, so it is rebuilt only when either changes.
+Restoring uses a copy-on-write clone of the file where the filesystem
+supports it and falls back to the SQLite online backup API. A database that
+already exists, and may have open connections, is never replaced on disk;
+the backup API overwrites it in place.
+
+Usage:
+    python -m db.snapshot build             # Build (or reuse) the snapshot for db/resources
+    python -m db.snapshot restore           # Restore the latest snapshot over app.db
+"""
+from __future__ import annotations
+import fcntl
+import glob
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from db.database import Base, BASE_DIR, DB_PATH
+from db.bulk_loader import bulk_load, TABLE_SPECS
+from db.seed import seed_initial_users  # also registers every model on Base.metadata
+from security import passwords
+
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshots")
+SNAPSHOT_VERSION = "1"
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """DDL for every table and index in the metadata, in a stable order."""
+    ddl = []
+    for table in Base.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=engine.dialect)))
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            ddl.append(str(CreateIndex(index).compile(dialect=engine.dialect)))
+    return "\n".join(ddl)
+
+
+def content_hash(csv_dir: Optional[str], engine: Engine, seed_users: bool = True) -> str:
+    """Hash of the snapshot format version, the schema, the build flags and the source CSVs."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(SNAPSHOT_VERSION.encode())
+    h.update(schema_fingerprint(engine).encode())
+    h.update(f"seed_users={seed_users}".encode())
+    if seed_users:
+        # Seeded users carry password hashes made under the current policy
+        h.update(repr(passwords.policy).encode())
+    if csv_dir is not None:
+        for spec in TABLE_SPECS:
+            h.update(spec.csv_name.encode())
+            with open(os.path.join(csv_dir, spec.csv_name), 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    h.update(block)
+    return h.hexdigest()
+
+
+def snapshot_path(digest: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, f"app-{digest}.db")
+
+
+def latest_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[str]:
+    """Most recently built snapshot in snapshot_dir, if any."""
+    paths = glob.glob(os.path.join(snapshot_dir, "app-*.db"))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def build_snapshot(
+    csv_dir: Optional[str],
+    snapshot_dir: str = SNAPSHOT_DIR,
+    seed_users: bool = True,
+) -> str:
+    """Build a seeded, indexed snapshot, or return the existing one for the same content.
+
+    With csv_dir=None the snapshot holds the empty schema only.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".db", dir=snapshot_dir)
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        path = snapshot_path(content_hash(csv_dir, engine, seed_users), snapshot_dir)
+        if os.path.exists(path):
+            return path
+
+        Base.metadata.create_all(bind=engine)
+        if csv_dir is not None:
+            bulk_load(engine, csv_dir)
+        if seed_users:
+            with sessionmaker(bind=engine)() as session:
+                seed_initial_users(session)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+        engine.dispose()
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return path
+    finally:
+        engine.dispose()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def clone_file(src: str, dst: str) -> None:
+    """Copy-on-write clone of src to dst; raises OSError where unsupported."""
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def restore_into(snapshot: str, conn: sqlite3.Connection) -> None:
+    """Overwrite the database behind an open sqlite3 connection with the snapshot."""
+    src = sqlite3.connect(f"file:{snapshot}?mode=ro", uri=True)
+    try:
+        src.backup(conn)
+    finally:
+        src.close()
+
+
+def restore_into_engine(snapshot: str, engine: Engine) -> None:
+    """Overwrite an engine's database with the snapshot via the online backup API."""
+    raw = engine.raw_connection()
+    try:
+        restore_into(snapshot, raw.driver_connection)
+    finally:
+        raw.close()
+
+
+def restore_snapshot(snapshot: str, target: str = DB_PATH) -> str:
+    """Materialise the snapshot at target, returning the method used.
+
+    A missing target is cloned (or backed up) next to it and linked into
+    place, which fails rather than replaces if another process created it
+    meanwhile. An existing target, which may have open connections, is
+    overwritten in place through the backup API instead.
+    """
+    if not os.path.exists(target):
+        tmp_path = f"{target}.{os.getpid()}.restore"
+        try:
+            clone_file(snapshot, tmp_path)
+            method = "clone"
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            dst = sqlite3.connect(tmp_path)
+            try:
+                restore_into(snapshot, dst)
+            finally:
+                dst.close()
+            method = "backup"
+        try:
+            # Journals left by a database deleted earlier must not be replayed into the snapshot
+            for suffix in ("-wal", "-shm", "-journal"):
+                if os.path.exists(target + suffix):
+                    os.remove(target + suffix)
+            os.link(tmp_path, target)
+            return method
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    dst = sqlite3.connect(target)
+    try:
+        restore_into(snapshot, dst)
+    finally:
+        dst.close()
+    return "backup"
+
+
+if __name__ == "__main__":
+    from db import DB_DIR
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        print(f"Snapshot: {build_snapshot(DB_DIR)}")
+    elif command == "restore":
+        path = latest_snapshot() or build_snapshot(DB_DIR)
+        print(f"Restored {path} to {DB_PATH} ({restore_snapshot(path)})")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,189 @@
+"""
+Resumable, bounded-memory streaming import for large MovieLens CSV files.
+
+Each CSV is read line by line and inserted in fixed-size batches. The batch
+and a checkpoint row (file, byte offset, row count) are committed in the same
+transaction, so after a crash the import resumes from the last committed
+byte offset without duplicating or losing rows. Memory use is bounded by the
+batch size regardless of file size.
+
+A table that already has rows but no checkpoint was loaded some other way
+(the plain or --fast seeder), so there is no offset to resume from and the
+import refuses to touch it.
+"""
+from __future__ import annotations
+import csv
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection, Engine, Row
+
+from db.bulk_loader import TABLE_SPECS, TableSpec, insert_sql, read_header, read_pragmas, set_pragmas
+from model.import_checkpoint import ImportCheckpoint
+
+DEFAULT_BATCH_SIZE = 50_000
+PROGRESS_INTERVAL = 2.0
+IMPORT_PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL"}
+
+
+class CheckpointMismatchError(RuntimeError):
+    """The CSV changed since its checkpoint was written, so resuming is unsafe."""
+
+
+class UncheckpointedDataError(RuntimeError):
+    """The table has rows that were not streamed, so there is no offset to resume from."""
+
+
+@dataclass
+class StreamStats:
+    table: str
+    rows: int
+    resumed_from: int
+    seconds: float
+    skipped: bool = False
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class _Progress:
+    """Throttled single-line progress and ETA reporting for one file."""
+
+    def __init__(self, name: str, total_bytes: int, start_offset: int):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.start_offset = start_offset
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def update(self, offset: int, rows: int, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self.last_report < PROGRESS_INTERVAL:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started, 1e-9)
+        done = offset - self.start_offset
+        rate = done / elapsed
+        remaining = (self.total_bytes - offset) / rate if rate > 0 else 0.0
+        pct = 100.0 * offset / self.total_bytes if self.total_bytes else 100.0
+        sys.stdout.write(
+            f"\r  {self.name}: {pct:5.1f}%  {rows:,} rows  "
+            f"{done / elapsed / 1e6:.1f} MB/s  ETA {_format_eta(remaining)}"
+        )
+        sys.stdout.flush()
+
+
+def _load_checkpoint(conn: Connection, file_key: str) -> Optional[Row]:
+    return conn.execute(
+        select(ImportCheckpoint.__table__).where(ImportCheckpoint.file == file_key)
+    ).first()
+
+
+def _save_checkpoint(
+    conn: Connection, file_key: str, offset: int, rows: int, size: int, mtime: float, completed: bool
+) -> None:
+    values = dict(
+        file=file_key, byte_offset=offset, row_count=rows,
+        file_size=size, file_mtime=mtime, completed=completed,
+    )
+    stmt = insert(ImportCheckpoint).values(**values)
+    stmt = stmt.on_conflict_do_update(index_elements=[ImportCheckpoint.file], set_=values)
+    conn.execute(stmt)
+
+
+def stream_table(
+    conn: Connection,
+    spec: TableSpec,
+    csv_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> StreamStats:
+    """Stream one CSV into its table, resuming from its checkpoint if there is one."""
+    started = time.perf_counter()
+    file_key = spec.csv_name
+    stat = os.stat(csv_path)
+    header, data_start = read_header(csv_path)
+
+    checkpoint = _load_checkpoint(conn, file_key)
+    offset, rows = data_start, 0
+    if checkpoint is not None:
+        if checkpoint.file_size != stat.st_size or checkpoint.file_mtime != stat.st_mtime:
+            raise CheckpointMismatchError(
+                f"{csv_path} changed since its checkpoint was written; re-run with --force"
+            )
+        if checkpoint.completed:
+            return StreamStats(spec.name, checkpoint.row_count, checkpoint.row_count, 0.0, skipped=True)
+        offset, rows = checkpoint.byte_offset, checkpoint.row_count
+    elif conn.execute(select(spec.table).limit(1)).first() is not None:
+        raise UncheckpointedDataError(
+            f"{spec.name} already has rows that were not streamed; re-run with --force to reload it"
+        )
+    resumed_from = rows
+
+    sql = insert_sql(conn, spec)
+    progress = _Progress(spec.name, stat.st_size, offset)
+    lines: List[bytes] = []
+
+    def flush() -> int:
+        reader = csv.DictReader((line.decode('utf-8') for line in lines), fieldnames=header)
+        batch = [spec.convert(row) for row in reader]
+        if batch:
+            conn.exec_driver_sql(sql, batch)
+        lines.clear()
+        return len(batch)
+
+    with open(csv_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            offset += len(line)
+            lines.append(line)
+            if len(lines) >= batch_size:
+                rows += flush()
+                _save_checkpoint(conn, file_key, offset, rows, stat.st_size, stat.st_mtime, False)
+                conn.commit()
+                progress.update(offset, rows)
+
+    rows += flush()
+    _save_checkpoint(conn, file_key, offset, rows, stat.st_size, stat.st_mtime, True)
+    conn.commit()
+    progress.update(offset, rows, force=True)
+    sys.stdout.write("\n")
+
+    return StreamStats(spec.name, rows, resumed_from, time.perf_counter() - started)
+
+
+def stream_import(
+    engine: Engine,
+    csv_dir: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    specs: Sequence[TableSpec] = TABLE_SPECS,
+) -> List[StreamStats]:
+    """Import every MovieLens CSV from csv_dir, resuming any partially imported file."""
+    stats = []
+    with engine.connect() as conn:
+        # WAL with synchronous=NORMAL keeps every committed batch and its checkpoint
+        # consistent across a crash while avoiding an fsync per commit.
+        saved = read_pragmas(conn, IMPORT_PRAGMAS)
+        set_pragmas(conn, IMPORT_PRAGMAS)
+        try:
+            for spec in specs:
+                result = stream_table(conn, spec, os.path.join(csv_dir, spec.csv_name), batch_size)
+                stats.append(result)
+                if result.skipped:
+                    print(f"  {spec.name}: already imported ({result.rows:,} rows)")
+                elif result.resumed_from:
+                    print(f"  {spec.name}: resumed at row {result.resumed_from:,}, "
+                          f"{result.rows:,} rows total in {result.seconds:.2f}s")
+                else:
+                    print(f"  {spec.name}: {result.rows:,} rows in {result.seconds:.2f}s")
+        finally:
+            conn.rollback()
+            # journal_mode persists in the file, so hand back whatever mode the database used
+            set_pragmas(conn, saved)
+    return stats
@@ -0,0 +1,307 @@
+"""
+Synthetic MovieLens-shaped data generator for scale testing.
+
+Produces movies, links, ratings and tags with the statistical shape of the
+real MovieLens exports at any size:
+
+* movie popularity follows a power law over ranks (Zipf-Mandelbrot),
+* per-user activity is heavy-tailed, with the MovieLens minimum of 20 ratings,
+* rating values combine per-movie quality, per-user bias and noise, rounded
+  to half stars,
+* each user is active over a bounded window between 1996 and 2023, and tags
+  come from heavy users on movies they rated, with a Zipf tag vocabulary.
+
+Output is either MovieLens-compatible CSV files or a direct load into the
+database. Ratings are generated in blocks of users with per-block seeds, so
+memory stays bounded and the output is deterministic for a given seed.
+
+Usage:
+    python -m db.synthetic --ratings 10000000 --out /tmp/ml-10m
+    python -m db.synthetic --ratings 1000000 --db --seed 7
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from sqlalchemy.engine import Engine
+
+from db.bulk_loader import (
+    TABLE_SPECS, LOAD_PRAGMAS, insert_sql, read_pragmas, set_pragmas, drop_indexes, create_indexes,
+)
+
+GENRES = (
+    "Action", "Adventure", "Animation", "Children", "Comedy", "Crime", "Documentary", "Drama",
+    "Fantasy", "Film-Noir", "Horror", "IMAX", "Musical", "Mystery", "Romance", "Sci-Fi",
+    "Thriller", "War", "Western",
+)
+GENRE_WEIGHTS = (7, 4, 2, 3, 13, 5, 2, 17, 3, 1, 4, 1, 2, 3, 7, 4, 8, 2, 1)
+TAG_WORDS = (
+    "atmospheric", "funny", "visually appealing", "dark comedy", "twist ending", "classic",
+    "thought-provoking", "sci-fi", "based on a book", "action", "quirky", "surreal",
+    "predictable", "romance", "dystopia", "great soundtrack", "cult film", "nonlinear",
+    "overrated", "psychology", "space", "time travel", "violence", "inspirational",
+    "mindfuck", "satire", "stylized", "philosophy", "revenge", "zombies",
+)
+MIN_RATINGS_PER_USER = 20
+EPOCH_START = 820454400   # 1996-01-01
+EPOCH_END = 1704067200    # 2024-01-01
+USER_BLOCK = 50_000
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    n_ratings: int
+    n_users: int
+    n_movies: int
+    n_tags: int
+    seed: int = 0
+    popularity_alpha: float = 1.0
+    popularity_offset: float = 20.0
+    activity_alpha: float = 1.3
+
+    @classmethod
+    def for_ratings(cls, n_ratings: int, seed: int = 0, **overrides) -> "SyntheticConfig":
+        """Size users, movies and tags in the same proportions as MovieLens 25M."""
+        values = dict(
+            n_ratings=n_ratings,
+            n_users=max(1, n_ratings // 155),
+            n_movies=max(MIN_RATINGS_PER_USER, n_ratings // 400),
+            n_tags=n_ratings // 25,
+            seed=seed,
+        )
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+
+def _allocate(weights: "np.ndarray", total: int, floor: int, cap: int) -> "np.ndarray":
+    """Split total across weights with a per-entry floor and cap.
+
+    Whatever the capped entries cannot take is redistributed over the rest,
+    so heavy tails do not eat into the requested total.
+    """
+    counts = np.full(len(weights), min(floor, cap), dtype=np.int64)
+    open_ = np.ones(len(weights), dtype=bool)
+    for _ in range(16):
+        extra = total - int(counts.sum())
+        if extra <= 0 or not open_.any():
+            break
+        share = weights * open_
+        counts = np.minimum(counts + np.floor(share / share.sum() * extra).astype(np.int64), cap)
+        open_ = counts < cap
+    return counts
+
+
+def _rating_lines(u, m, r, ts) -> str:
+    halves = ("0.0", "0.5", "1.0", "1.5", "2.0", "2.5", "3.0", "3.5", "4.0", "4.5", "5.0")
+    stars = [halves[i] for i in (r * 2).astype(np.int64).tolist()]
+    fields = zip(map(str, u.tolist()), map(str, m.tolist()), stars, map(str, ts.tolist()))
+    return "".join(f"{a},{b},{c},{d}\n" for a, b, c, d in fields)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("The synthetic data generator requires numpy (pip install numpy)")
+
+
+class SyntheticDataset:
+    """Deterministic generator for one synthetic MovieLens-shaped dataset."""
+
+    def __init__(self, config: SyntheticConfig):
+        _require_numpy()
+        self.config = config
+        root = self._rng(0, 0)
+
+        n_movies = config.n_movies
+        self.movie_ids = np.arange(1, n_movies + 1, dtype=np.int64)
+        # Power-law popularity over a random ranking of the catalogue
+        ranks = root.permutation(n_movies) + 1
+        weights = (ranks + config.popularity_offset) ** -config.popularity_alpha
+        self.popularity_cdf = np.cumsum(weights / weights.sum())
+        self.movie_quality = root.normal(0.0, 0.45, n_movies)
+        self.movie_year = np.clip(
+            (2023 - root.exponential(14.0, n_movies)).astype(np.int64), 1915, 2023
+        )
+
+        # Heavy-tailed per-user activity, scaled to the requested rating count
+        raw = root.pareto(config.activity_alpha, config.n_users) + 1.0
+        self.user_counts = _allocate(raw, config.n_ratings, MIN_RATINGS_PER_USER, max(n_movies // 2, 1))
+        self.user_bias = root.normal(0.0, 0.35, config.n_users)
+        self.user_start = root.integers(EPOCH_START, EPOCH_END - 86400, config.n_users)
+        span = root.exponential(2.0 * 365 * 86400, config.n_users).astype(np.int64)
+        self.user_end = np.minimum(self.user_start + span + 3600, EPOCH_END)
+
+    def _rng(self, stream: int, block: int) -> "np.random.Generator":
+        return np.random.default_rng([self.config.seed, stream, block])
+
+    def movies(self) -> Iterator[Tuple[int, str, str]]:
+        rng = self._rng(1, 0)
+        weights = np.asarray(GENRE_WEIGHTS, dtype=np.float64)
+        weights /= weights.sum()
+        n_genres = rng.choice([1, 2, 3, 4], size=len(self.movie_ids), p=[0.35, 0.35, 0.2, 0.1])
+        for movie_id, year, k in zip(self.movie_ids.tolist(), self.movie_year.tolist(), n_genres.tolist()):
+            picks = sorted(rng.choice(len(GENRES), size=k, replace=False, p=weights).tolist())
+            yield movie_id, f"Synthetic Movie {movie_id} ({year})", "|".join(GENRES[i] for i in picks)
+
+    def links(self) -> Iterator[Tuple[int, str, Optional[str]]]:
+        rng = self._rng(2, 0)
+        imdb = rng.choice(9_999_999, size=len(self.movie_ids), replace=False) + 1
+        tmdb = rng.choice(999_999, size=len(self.movie_ids), replace=False) + 1
+        missing = rng.random(len(self.movie_ids)) < 0.01
+        for movie_id, i, t, m in zip(self.movie_ids.tolist(), imdb.tolist(), tmdb.tolist(), missing.tolist()):
+            yield movie_id, f"{i:07d}", None if m else str(t)
+
+    def rating_blocks(self, block_users: int = USER_BLOCK) -> Iterator[Tuple["np.ndarray", ...]]:
+        """Yield (user_id, movie_id, rating, timestamp) arrays, one block of users at a time."""
+        for block, lo in enumerate(range(0, self.config.n_users, block_users)):
+            hi = min(lo + block_users, self.config.n_users)
+            yield self._rating_block(self._rng(3, block), lo, hi)
+
+    def _rating_block(self, rng, lo: int, hi: int):
+        counts = self.user_counts[lo:hi]
+        user_ids = np.arange(lo, hi, dtype=np.int64)
+        u = m = np.empty(0, dtype=np.int64)
+        need = counts
+        # Draw movies by popularity with replacement, drop repeated (user, movie)
+        # pairs, and top up users that are still short of their quota.
+        for _ in range(12):
+            if not need.any():
+                break
+            draws = np.repeat(user_ids, np.where(need > 0, (need * 1.5).astype(np.int64) + 4, 0))
+            movies = np.searchsorted(self.popularity_cdf, rng.random(len(draws)), side="right")
+            cu = np.concatenate((u, draws))
+            cm = np.concatenate((m, np.minimum(movies, self.config.n_movies - 1)))
+
+            _, first = np.unique(cu * self.config.n_movies + cm, return_index=True)
+            first.sort()
+            first = first[np.argsort(cu[first], kind="stable")]
+            u, m = cu[first], cm[first]
+            starts = np.searchsorted(u, user_ids)
+            keep = np.arange(len(u)) - starts[u - lo] < counts[u - lo]
+            u, m = u[keep], m[keep]
+            need = counts - np.bincount(u - lo, minlength=hi - lo)
+
+        order = np.lexsort((m, u))
+        u, m = u[order], m[order]
+
+        score = 3.55 + self.movie_quality[m] + self.user_bias[u] + rng.normal(0.0, 0.85, len(u))
+        rating = np.clip(np.round(score * 2.0) / 2.0, 0.5, 5.0)
+        start, end = self.user_start[u], self.user_end[u]
+        timestamp = start + (rng.random(len(u)) * (end - start)).astype(np.int64)
+        return u + 1, self.movie_ids[m], rating, timestamp
+
+    def tag_blocks(self, block_users: int = USER_BLOCK) -> Iterator[Tuple["np.ndarray", ...]]:
+        """Yield (user_id, movie_id, tag, timestamp) arrays for taggers among heavy users."""
+        if self.config.n_tags <= 0:
+            return
+        vocab = np.array(TAG_WORDS + tuple(f"tag{i}" for i in range(5000)), dtype=object)
+        zipf = (np.arange(1, len(vocab) + 1, dtype=np.float64)) ** -1.1
+        vocab_cdf = np.cumsum(zipf / zipf.sum())
+        ratio = self.config.n_tags / max(int(self.user_counts.sum()), 1)
+        for block, (u, m, _, ts) in enumerate(self.rating_blocks(block_users)):
+            rng = self._rng(4, block)
+            # Heavy users tag disproportionately often
+            activity = self.user_counts[u - 1].astype(np.float64)
+            p = np.minimum(ratio * activity / activity.mean() if len(u) else 0, 1.0)
+            pick = rng.random(len(u)) < p
+            if not pick.any():
+                continue
+            words = vocab[np.searchsorted(vocab_cdf, rng.random(int(pick.sum())), side="right")
+                          .clip(0, len(vocab) - 1)]
+            yield u[pick], m[pick], words, ts[pick] + rng.integers(0, 3600, int(pick.sum()))
+
+
+def write_csv(dataset: SyntheticDataset, out_dir: str) -> None:
+    """Write MovieLens-compatible CSVs for the dataset into out_dir."""
+    import csv
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["movieId", "title", "genres"])
+        writer.writerows(dataset.movies())
+    with open(os.path.join(out_dir, "links.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["movieId", "imdbId", "tmdbId"])
+        writer.writerows((m, i, t or "") for m, i, t in dataset.links())
+    with open(os.path.join(out_dir, "ratings.csv"), "w", encoding="utf-8") as f:
+        f.write("userId,movieId,rating,timestamp\n")
+        for block in dataset.rating_blocks():
+            f.write(_rating_lines(*block))
+    with open(os.path.join(out_dir, "tags.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["userId", "movieId", "tag", "timestamp"])
+        for u, m, t, ts in dataset.tag_blocks():
+            writer.writerows(zip(u.tolist(), m.tolist(), t.tolist(), ts.tolist()))
+
+
+def load_database(dataset: SyntheticDataset, engine: Engine) -> None:
+    """Load the dataset straight into the database with the bulk loader's fast path."""
+    movies, links, ratings, tags = TABLE_SPECS
+    with engine.connect() as conn:
+        saved = read_pragmas(conn, LOAD_PRAGMAS)
+        set_pragmas(conn, LOAD_PRAGMAS)
+        indexed = False
+        try:
+            drop_indexes(conn, TABLE_SPECS)
+            conn.exec_driver_sql(insert_sql(conn, movies), list(dataset.movies()))
+            conn.exec_driver_sql(insert_sql(conn, links), list(dataset.links()))
+            sql = insert_sql(conn, ratings)
+            for u, m, r, ts in dataset.rating_blocks():
+                conn.exec_driver_sql(sql, list(zip(u.tolist(), m.tolist(), r.tolist(), ts.tolist())))
+            sql = insert_sql(conn, tags)
+            for u, m, t, ts in dataset.tag_blocks():
+                conn.exec_driver_sql(sql, list(zip(u.tolist(), m.tolist(), t.tolist(), ts.tolist())))
+            conn.commit()
+            create_indexes(conn, TABLE_SPECS)
+            indexed = True
+        finally:
+            conn.rollback()
+            if not indexed:
+                # A failed load must not leave the tables without their secondary indexes
+                create_indexes(conn, TABLE_SPECS)
+            set_pragmas(conn, saved)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic MovieLens-shaped data")
+    parser.add_argument("--ratings", type=int, required=True, help="Target number of ratings")
+    parser.add_argument("--users", type=int, help="Number of users (default: ratings / 155)")
+    parser.add_argument("--movies", type=int, help="Number of movies (default: ratings / 400)")
+    parser.add_argument("--tags", type=int, help="Approximate number of tags (default: ratings / 25)")
+    parser.add_argument("--seed", type=int, default=0)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="Directory to write CSV files to")
+    target.add_argument("--db", action="store_true", help="Load into the configured database")
+    args = parser.parse_args(argv)
+
+    config = SyntheticConfig.for_ratings(
+        args.ratings, seed=args.seed, n_users=args.users, n_movies=args.movies, n_tags=args.tags
+    )
+    started = time.perf_counter()
+    dataset = SyntheticDataset(config)
+    if args.out:
+        write_csv(dataset, args.out)
+        print(f"Wrote synthetic CSVs to {args.out}")
+    else:
+        from db import engine, Base
+        from model import analysis_result, import_checkpoint, refresh_token, revoked_token, user  # noqa: F401
+        Base.metadata.create_all(bind=engine)
+        load_database(dataset, engine)
+        print("Loaded synthetic data into the database")
+    print(f"  {config} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -1,10 +1,78 @@
-from fastapi import FastAPI
-from db.database import engine, Base
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from dao import RefreshTokenDAO
+from db.database import engine, Base, DB_PATH, SessionLocal
+from monitoring import MetricsMiddleware, TimingMiddleware, configure_timing_log
+from monitoring.profiling import ProfilingMiddleware
+from security import verify_token, require_admin, passwords
+from security.jwt_handler import decode_token
+from security.revocation import revocations
+from security.rate_limit import RateLimitMiddleware, buckets_from_env, trusted_proxies_from_env
+from security.passwords import HashPoolBusy, RETRY_AFTER_SECONDS
 from api import auth_controller, movie_controller, link_controller, rating_controller, tag_controller, \
-    image_analysis_controller
+    image_analysis_controller, metrics_controller, profiling_controller, jwks_controller
+
+# A fresh node can start from a prebuilt snapshot instead of seeding (see db/snapshot.py)
+if os.environ.get("APP_DB_SNAPSHOT") and not os.path.exists(DB_PATH):
+    from db.snapshot import restore_snapshot
+    restore_snapshot(os.environ["APP_DB_SNAPSHOT"], DB_PATH)
 
 Base.metadata.create_all(bind=engine)
-app = FastAPI(title="MovieLens API")
+
+REFRESH_TOKEN_PURGE_INTERVAL = 3600.0
+
+
+def purge_expired_refresh_tokens() -> None:
+    with SessionLocal() as db:
+        RefreshTokenDAO.delete_expired(db)
+
+
+async def purge_expired_refresh_tokens_periodically() -> None:
+    """Keep refresh_tokens from growing with every login and rotation."""
+    while True:
+        try:
+            await run_in_threadpool(purge_expired_refresh_tokens)
+        except Exception:
+            logging.getLogger("app.auth").exception("Could not purge expired refresh tokens")
+        await asyncio.sleep(REFRESH_TOKEN_PURGE_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep the revoked-token filter in sync off the request path
+    revocations.start()
+    purge = asyncio.create_task(purge_expired_refresh_tokens_periodically())
+    # One results consumer per worker; APP_KAFKA_CONSUMER=0 runs without one
+    if os.environ.get("APP_KAFKA_CONSUMER", "1") != "0":
+        image_analysis_controller.result_consumer.start()
+    yield
+    purge.cancel()
+    image_analysis_controller.result_consumer.stop()
+    revocations.stop()
+    # Deliver what is still buffered before the worker exits
+    image_analysis_controller.producer.close()
+    # Stop the hashing processes, which would otherwise outlive the worker
+    passwords.pool.shutdown()
+
+
+app = FastAPI(title="MovieLens API", lifespan=lifespan)
+
+# Server-Timing header and a JSON log line per request; APP_TIMING_LOG=0 keeps only the header
+configure_timing_log(os.environ.get("APP_TIMING_LOG", "1") != "0")
+app.add_middleware(TimingMiddleware)
+# Per-client token buckets shared by the workers on this node (see security/rate_limit.py)
+rate_limit_buckets = buckets_from_env()
+if rate_limit_buckets is not None:
+    app.add_middleware(RateLimitMiddleware, buckets=rate_limit_buckets, decode=decode_token,
+                       trusted_proxies=trusted_proxies_from_env())
+app.add_middleware(MetricsMiddleware)
+# Admins can profile a single request with "X-Profile: pstats|collapsed" (see monitoring/profiling.py)
+app.add_middleware(ProfilingMiddleware, authorize=lambda authorization: require_admin(verify_token(authorization)))
 
 # Include all routers
 app.include_router(auth_controller.router)
@@ -13,6 +81,16 @@ app.include_router(link_controller.router)
 app.include_router(rating_controller.router)
 app.include_router(tag_controller.router)
 app.include_router(image_analysis_controller.router)
+app.include_router(metrics_controller.router)
+app.include_router(profiling_controller.router)
+app.include_router(jwks_controller.router)
+
+
+@app.exception_handler(HashPoolBusy)
+def password_hashing_busy(request: Request, exc: HashPoolBusy) -> JSONResponse:
+    """Shed logins and user creation while the password hashing queue is full."""
+    return JSONResponse({"detail": "Too many concurrent password checks, retry shortly"}, status_code=503,
+                        headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
 
 
 @app.get("/")
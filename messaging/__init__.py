@@ -0,0 +1,4 @@
+from .producer import AsyncProducer, ProducerBusy
+from .results import ResultConsumer, ResultStore
+
+__all__ = ["AsyncProducer", "ProducerBusy", "ResultConsumer", "ResultStore"]
@@ -0,0 +1,122 @@
+"""
+Non-blocking Kafka producer with per-request delivery tracking.
+
+send() only enqueues the message in librdkafka's local buffer and returns.
+librdkafka batches queued messages (linger.ms, batch.size) and sends them
+from its own threads. A background thread polls the producer so delivery
+callbacks run, and each callback records the outcome against the message
+key (the request_id). If the local buffer is full, send() raises
+ProducerBusy instead of blocking.
+
+Settings come from APP_KAFKA_BOOTSTRAP (default localhost:9092),
+APP_KAFKA_LINGER_MS (default 5) and APP_KAFKA_BATCH_BYTES (default 1 MiB).
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+from cache import TTLCache
+from monitoring.metrics import KAFKA_PRODUCE, KAFKA_PRODUCE_ERRORS
+
+logger = logging.getLogger("app.kafka")
+
+BOOTSTRAP = os.environ.get("APP_KAFKA_BOOTSTRAP", "localhost:9092")
+POLL_INTERVAL = 0.1
+
+QUEUED = "queued"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+
+class ProducerBusy(Exception):
+    """The local produce buffer is full."""
+
+
+def producer_config() -> Dict[str, object]:
+    return {
+        "bootstrap.servers": BOOTSTRAP,
+        "linger.ms": int(os.environ.get("APP_KAFKA_LINGER_MS", "5")),
+        "batch.size": int(os.environ.get("APP_KAFKA_BATCH_BYTES", str(1024 * 1024))),
+        "compression.type": "lz4",
+        "enable.idempotence": True,
+        "queue.buffering.max.messages": 100_000,
+    }
+
+
+def _confluent_producer(config: Dict[str, object]):
+    from confluent_kafka import Producer
+    return Producer(config)
+
+
+class AsyncProducer:
+    """Producer whose sends return at once; outcomes are looked up by key."""
+
+    def __init__(self, config: Optional[Dict[str, object]] = None,
+                 factory: Callable[[Dict[str, object]], object] = _confluent_producer,
+                 tracked: int = 100_000, tracked_ttl: float = 3600.0):
+        self.config = config if config is not None else producer_config()
+        self.factory = factory
+        # key -> (status, error); outcomes are kept for an hour for status lookups
+        self.deliveries = TTLCache(maxsize=tracked, ttl=tracked_ttl, name="kafka_deliveries")
+        self._producer = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _started(self):
+        if self._producer is None:
+            with self._lock:
+                if self._producer is None:
+                    producer = self.factory(self.config)
+                    self._stop.clear()
+                    self._thread = threading.Thread(target=self._poll_loop, args=(producer,),
+                                                    name="kafka-producer-poll", daemon=True)
+                    self._thread.start()
+                    self._producer = producer
+        return self._producer
+
+    def _poll_loop(self, producer) -> None:
+        while not self._stop.is_set():
+            producer.poll(POLL_INTERVAL)
+
+    def _on_delivery(self, err, msg) -> None:
+        topic = msg.topic()
+        key = msg.key().decode("utf-8") if msg.key() is not None else None
+        if err is not None:
+            KAFKA_PRODUCE_ERRORS.labels(topic).inc()
+            logger.warning("Delivery to %s failed for %s: %s", topic, key, err)
+            if key is not None:
+                self.deliveries.set(key, (FAILED, str(err)))
+            return
+        latency = msg.latency()
+        if latency is not None:
+            KAFKA_PRODUCE.labels(topic).observe(latency)
+        if key is not None:
+            self.deliveries.set(key, (DELIVERED, None))
+
+    def send(self, topic: str, key: str, value: bytes) -> None:
+        """Queue a message for delivery; raises ProducerBusy when the local buffer is full."""
+        producer = self._started()
+        self.deliveries.set(key, (QUEUED, None))
+        try:
+            producer.produce(topic, value=value, key=key, on_delivery=self._on_delivery)
+        except BufferError:
+            self.deliveries.pop(key)
+            KAFKA_PRODUCE_ERRORS.labels(topic).inc()
+            raise ProducerBusy(f"Local produce queue for {topic} is full")
+
+    def delivery(self, key: str) -> Optional[tuple]:
+        """(status, error) of the message sent with this key, if still tracked."""
+        return self.deliveries.get(key)
+
+    def close(self, timeout: float = 10.0) -> int:
+        """Stop polling and wait up to `timeout` for queued messages; returns how many remain."""
+        with self._lock:
+            producer, self._producer = self._producer, None
+            if producer is None:
+                return 0
+            self._stop.set()
+            self._thread.join()
+        return producer.flush(timeout)
@@ -0,0 +1,229 @@
+"""
+Analysis results materialized from Kafka into a request_id-keyed store.
+
+Each worker runs one long-lived ResultConsumer thread on
+image_analysis_results. It reads results in batches and writes them to the
+analysis_results table and to an in-memory TTL cache, so /result/{request_id}
+is a cache or primary-key lookup instead of a scan of the topic.
+
+Every worker consumes the whole topic in a consumer group of its own, since
+later deliveries (long-poll, streams) need each worker to see every result.
+Such a group has no committed offsets, so a starting worker seeks each
+partition by time instead (offsets_for_times), to REPLAY_MARGIN seconds
+before the newest row in the table. Results published while no worker was
+consuming (deploys, restarts, before partitions were assigned) are read
+again; storing them is idempotent. With an empty table the worker reads
+from the start of the topic (APP_KAFKA_RESULTS_OFFSET_RESET). Rows older
+than APP_RESULT_RETENTION_HOURS (default 168) are purged.
+
+Waiting clients (long-poll, SSE, WebSocket) register a Future per
+request_id with ResultStore.watch_many. The consumer thread resolves it as
+soon as it stores the result, so nothing polls Kafka or the table.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from dao.analysis_result_dao import AnalysisResultDAO
+from messaging.producer import BOOTSTRAP
+
+logger = logging.getLogger("app.kafka")
+
+RESULTS_TOPIC = "image_analysis_results"
+POLL_INTERVAL = 0.5
+BATCH_SIZE = 500
+PURGE_INTERVAL = 3600.0
+# Replayed on start on top of what the table already has, to cover clock skew and in-flight results
+REPLAY_MARGIN = 60
+RETENTION = int(os.environ.get("APP_RESULT_RETENTION_HOURS", "168")) * 3600
+
+
+def consumer_config() -> Dict[str, object]:
+    group = os.environ.get("APP_KAFKA_RESULTS_GROUP", "result-materializer")
+    return {
+        "bootstrap.servers": BOOTSTRAP,
+        "group.id": f"{group}-{socket.gethostname()}-{os.getpid()}",
+        "auto.offset.reset": os.environ.get("APP_KAFKA_RESULTS_OFFSET_RESET", "earliest"),
+        # Start positions come from the table (ResultConsumer._on_assign), not from commits
+        "enable.auto.commit": False,
+    }
+
+
+def _confluent_consumer(config: Dict[str, object]):
+    from confluent_kafka import Consumer
+    return Consumer(config)
+
+
+class ResultStore:
+    """Analysis results by request_id: an in-memory TTL cache in front of the analysis_results table."""
+
+    def __init__(self, session_factory: Callable[[], Session], maxsize: int = 10_000, ttl: float = 600.0):
+        self.session_factory = session_factory
+        # Results never change once written, so the cache needs no invalidation
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, name="analysis_results")
+        self._waiters: Dict[str, Set[Future]] = {}
+        self._lock = threading.Lock()
+
+    def add_many(self, results: Dict[str, list]) -> None:
+        with self.session_factory() as db:
+            AnalysisResultDAO.save_many(db, results)
+        for request_id, people in results.items():
+            self.cache.set(request_id, people)
+        self._notify(results)
+
+    def _notify(self, results: Dict[str, list]) -> None:
+        with self._lock:
+            ready = [(self._waiters.pop(request_id), people) for request_id, people in results.items()
+                     if request_id in self._waiters]
+        for futures, people in ready:
+            for future in futures:
+                try:
+                    future.set_result(people)
+                except InvalidStateError:
+                    pass  # the waiter gave up (cancelled) in the meantime
+
+    def watch_many(self, request_ids: Iterable[str]) -> Dict[str, Future]:
+        """A Future per request_id, resolved with its people as soon as the result is stored.
+
+        Results already stored resolve at once. Callers must unwatch what
+        they stop waiting for.
+        """
+        watched = {request_id: Future() for request_id in request_ids}
+        with self._lock:
+            for request_id, future in watched.items():
+                self._waiters.setdefault(request_id, set()).add(future)
+        # Registered before looking, so a result stored in between is not missed
+        found = {}
+        for request_id in watched:
+            people = self.get(request_id)
+            if people is not None:
+                found[request_id] = people
+        self._notify(found)
+        return watched
+
+    def unwatch(self, watched: Dict[str, Future]) -> None:
+        with self._lock:
+            for request_id, future in watched.items():
+                futures = self._waiters.get(request_id)
+                if futures is not None:
+                    futures.discard(future)
+                    if not futures:
+                        del self._waiters[request_id]
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(len(futures) for futures in self._waiters.values())
+
+    def get(self, request_id: str) -> Optional[list]:
+        """People found for a request, or None while there is no result."""
+        people = self.cache.get(request_id)
+        if people is None:
+            with self.session_factory() as db:
+                people = AnalysisResultDAO.get_people(db, request_id)
+            if people is not None:
+                self.cache.set(request_id, people)
+        return people
+
+    def last_stored(self) -> Optional[int]:
+        """When the newest stored result was written (epoch seconds), or None for an empty store."""
+        with self.session_factory() as db:
+            return AnalysisResultDAO.latest_created_at(db)
+
+    def purge(self, older_than: float) -> int:
+        with self.session_factory() as db:
+            return AnalysisResultDAO.delete_older_than(db, int(time.time() - older_than))
+
+
+def parse_results(messages: Iterable) -> Dict[str, list]:
+    """request_id -> people for the well-formed results among a batch of messages."""
+    results = {}
+    for msg in messages:
+        if msg.error() or not msg.value():
+            continue
+        try:
+            data = json.loads(msg.value().decode("utf-8"))
+            results[str(data["request_id"])] = data.get("people", [])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Skipping malformed result at %s[%s]@%s", msg.topic(), msg.partition(), msg.offset())
+    return results
+
+
+class ResultConsumer:
+    """Background thread that materializes the results topic into a ResultStore."""
+
+    def __init__(self, store: ResultStore, config: Optional[Dict[str, object]] = None,
+                 factory: Callable[[Dict[str, object]], object] = _confluent_consumer,
+                 topic: str = RESULTS_TOPIC):
+        self.store = store
+        self.config = config
+        self.factory = factory
+        self.topic = topic
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        consumer = self.factory(self.config if self.config is not None else consumer_config())
+        consumer.subscribe([self.topic], on_assign=self._on_assign)
+        self._thread = threading.Thread(target=self._run, args=(consumer,), name="kafka-result-consumer",
+                                        daemon=True)
+        self._thread.start()
+
+    def _on_assign(self, consumer, partitions) -> None:
+        """Start assigned partitions just before the newest stored result."""
+        try:
+            last = self.store.last_stored()
+        except Exception:
+            logger.exception("Could not read the newest stored result; starting at the reset offset")
+            last = None
+        if last is None:
+            consumer.assign(partitions)
+            return
+        for partition in partitions:
+            partition.offset = (last - REPLAY_MARGIN) * 1000
+        # Partitions with nothing newer come back at the end offset
+        consumer.assign(consumer.offsets_for_times(partitions, timeout=10))
+
+    def _run(self, consumer) -> None:
+        purged = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                messages = consumer.consume(BATCH_SIZE, POLL_INTERVAL)
+                if messages:
+                    self.handle(messages)
+                if time.monotonic() - purged > PURGE_INTERVAL:
+                    purged = time.monotonic()
+                    try:
+                        self.store.purge(RETENTION)
+                    except Exception:
+                        logger.exception("Could not purge old analysis results")
+        finally:
+            consumer.close()
+
+    def handle(self, messages: Iterable) -> int:
+        """Store a batch of result messages; returns how many results it held."""
+        results = parse_results(messages)
+        if results:
+            try:
+                self.store.add_many(results)
+            except Exception:
+                logger.exception("Could not store %d analysis results", len(results))
+        return len(results)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
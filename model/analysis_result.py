@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, JSON
+from db.database import Base
+
+
+class AnalysisResult(Base):
+    __tablename__ = "analysis_results"
+
+    # Results are looked up by the id /analyze_img handed out
+    request_id = Column(String, primary_key=True)
+    people = Column(JSON, nullable=False, default=list)
+    # When this node first saw the result; old rows are purged by the result consumer
+    created_at = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<AnalysisResult(request_id='{self.request_id}')>"
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Boolean, Float
+from db.database import Base
+
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+
+    file = Column(String, primary_key=True)
+    byte_offset = Column(Integer, nullable=False, default=0)
+    row_count = Column(Integer, nullable=False, default=0)
+    file_size = Column(Integer, nullable=False)
+    file_mtime = Column(Float, nullable=False)
+    completed = Column(Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"<ImportCheckpoint(file='{self.file}', byte_offset={self.byte_offset}, row_count={self.row_count})>"
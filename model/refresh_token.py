@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from db.database import Base
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # sha256 of the opaque token; the token itself is never stored
+    token_hash = Column(String, unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Every token rotated from the same login shares a family
+    family = Column(String, nullable=False, index=True)
+    expires_at = Column(Integer, nullable=False)
+    # Set when the token is exchanged (rotated) or revoked; a used token is never valid again
+    used_at = Column(Integer, nullable=True)
+    revoked = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, family='{self.family}')>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String
+from db.database import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    # AUTOINCREMENT: ids of purged rows must never be handed out again, or workers that
+    # synced past them would skip the new revocations
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    # Increasing id lets each worker fetch only the revocations it has not seen yet
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    jti = Column(String, unique=True, index=True, nullable=False)
+    # The token's own exp; the row can be purged once the token has expired anyway
+    expires_at = Column(Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken(id={self.id}, jti='{self.jti}')>"
@@ -0,0 +1,8 @@
+from .timing import RequestTiming, current_timing, phase, record
+from .route import TimedRoute
+from .middleware import MetricsMiddleware, TimingMiddleware, configure_timing_log
+
+__all__ = [
+    "RequestTiming", "current_timing", "phase", "record",
+    "TimedRoute", "MetricsMiddleware", "TimingMiddleware", "configure_timing_log",
+]
@@ -0,0 +1,124 @@
+"""
+ASGI middleware that times every request and reports the phase breakdown.
+"""
+from __future__ import annotations
+import json
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from monitoring.metrics import HTTP_DURATION, HTTP_IN_FLIGHT, HTTP_REQUESTS
+from monitoring.timing import RequestTiming, request_scope
+
+logger = logging.getLogger("app.timing")
+
+# Server-Timing entries in the order they are reported
+PHASES = ("auth", "validate", "db", "app", "serialize")
+
+
+def server_timing(timing: RequestTiming, total: float) -> str:
+    """Format the phases of a request as a Server-Timing header value."""
+    entries = []
+    for name in PHASES:
+        seconds = timing.phases.get(name)
+        if seconds is None:
+            continue
+        entry = f"{name};dur={seconds * 1000:.2f}"
+        if name == "db":
+            entry += f';desc="{timing.counts.get("db", 0)} queries"'
+        entries.append(entry)
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def log_record(scope: Scope, timing: RequestTiming, status: int, total: float) -> str:
+    """One JSON log line describing a finished request."""
+    record = {
+        "method": scope["method"],
+        "path": scope["path"],
+        "route": timing.route,
+        "status": status,
+        "total_ms": round(total * 1000, 2),
+    }
+    for name in PHASES:
+        if name in timing.phases:
+            record[f"{name}_ms"] = round(timing.phases[name] * 1000, 2)
+    record["db_queries"] = timing.counts.get("db", 0)
+    return json.dumps(record, separators=(",", ":"))
+
+
+class TimingMiddleware:
+    """Adds a Server-Timing header to every HTTP response and logs the breakdown."""
+
+    def __init__(self, app: ASGIApp, log: bool = True):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope() as timing:
+            status = 500
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(timing, timing.elapsed()))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                if self.log and logger.isEnabledFor(logging.INFO):
+                    logger.info(log_record(scope, timing, status, timing.elapsed()))
+
+
+class MetricsMiddleware:
+    """Counts requests and records latency per route template, plus requests in flight."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Label by route template, never by raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_DURATION.labels(method, route).observe(time.perf_counter() - started)
+
+
+def configure_timing_log(enabled: bool = True) -> None:
+    """Send the per-request JSON lines to stderr unless logging is already configured for them."""
+    if not enabled:
+        logger.setLevel(logging.WARNING)
+        return
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(logging.INFO)
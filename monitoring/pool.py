@@ -0,0 +1,46 @@
+"""
+Connection pool instrumentation.
+"""
+from __future__ import annotations
+import time
+import weakref
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from monitoring.metrics import DB_POOL_CHECKOUTS, DB_POOL_WAIT, REGISTRY
+
+_engines: "weakref.WeakValueDictionary[str, Engine]" = weakref.WeakValueDictionary()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkouts and how long each one waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+            DB_POOL_CHECKOUTS.inc()
+
+
+def _pool_status():
+    values = {}
+    for name, engine in list(_engines.items()):
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            values[(name, "size")] = pool.size()
+            values[(name, "checked_out")] = pool.checkedout()
+            values[(name, "overflow")] = max(pool.overflow(), 0)
+            values[(name, "idle")] = pool.checkedin()
+    return values
+
+
+REGISTRY.callback_gauge("db_pool_connections", "Pool connections by engine and state", ("engine", "state"),
+                        _pool_status)
+
+
+def register_pool_metrics(engine: Engine, name: str = "app") -> None:
+    """Expose the engine's pool occupancy as db_pool_connections{engine=name}."""
+    _engines[name] = engine
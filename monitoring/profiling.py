@@ -0,0 +1,256 @@
+"""
+On-demand profiling of single requests and of whole workers.
+
+A request carrying an "X-Profile: pstats" or "X-Profile: collapsed" header
+(or a ?profile=pstats|collapsed query flag) from an admin is run under a
+profiler:
+
+  pstats     deterministic cProfile of the endpoint, saved as a .pstats file
+             (load with pstats, snakeviz or speedscope)
+  collapsed  sampling profiler over the same code, saved as collapsed
+             stacks (flamegraph.pl, speedscope)
+
+Only the endpoint is profiled, on the thread that runs it: the threadpool
+thread for a sync endpoint, or the event loop thread for an async one, and
+there only while the endpoint's own coroutine is running, so other requests
+served meanwhile are left out. Python allows one cProfile at a time per
+process (3.12+ enforces it), so a pstats request made while another is
+being profiled gets 409.
+
+The profile is stored under APP_PROFILE_DIR (default ./profiles) and its
+file name is returned in the X-Profile-Result response header. Requests
+without the flag only pay for one header lookup.
+"""
+from __future__ import annotations
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Coroutine, Iterator, Optional, Set
+from urllib.parse import parse_qs
+
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_DIR = os.environ.get(
+    "APP_PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+)
+FORMATS = ("pstats", "collapsed")
+SAMPLE_INTERVAL = 0.001
+MAX_WORKER_SECONDS = 120.0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame) -> str:
+    """A frame and its callers as one root-first, semicolon-separated stack."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread that samples the stacks of selected threads (all when None)."""
+
+    def __init__(self, thread_ids: Optional[Set[int]] = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own or (self.thread_ids is not None and tid not in self.thread_ids):
+                    continue
+                stack = collapse(frame)
+                if self.thread_ids is None:
+                    if tid not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    stack = f"{names.get(tid, tid)};{stack}"
+                self.stacks[stack] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _ProfiledCoroutine:
+    """Awaitable that profiles a coroutine only while it runs, not while it is suspended."""
+
+    def __init__(self, coro: Coroutine, profile: "RequestProfile"):
+        self.coro = coro
+        self.profile = profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            with self.profile.thread():
+                try:
+                    yielded = self.coro.throw(error) if error is not None else self.coro.send(value)
+                except StopIteration as stop:
+                    return stop.value
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class RequestProfile:
+    """The profiler for one request, enabled on whichever thread runs its endpoint."""
+
+    def __init__(self, fmt: str):
+        self.format = fmt
+        self.profiler = cProfile.Profile() if fmt == "pstats" else None
+        self.thread_ids: Set[int] = set()
+        self.sampler = StackSampler(self.thread_ids) if fmt == "collapsed" else None
+
+    @contextmanager
+    def thread(self) -> Iterator[None]:
+        """Profile the enclosed block on the current thread."""
+        if self.profiler is None:
+            self.thread_ids.add(threading.get_ident())
+            try:
+                yield
+            finally:
+                self.thread_ids.discard(threading.get_ident())
+            return
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    def coroutine(self, coro: Coroutine) -> Awaitable:
+        """Await coro with the profiler enabled only during its own steps."""
+        return _ProfiledCoroutine(coro, self)
+
+    def save(self, label: str) -> str:
+        """Write the profile to PROFILE_DIR and return its file name."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+        if self.format == "collapsed":
+            name = stem + ".collapsed.txt"
+            with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+                f.write(self.sampler.stop())
+        else:
+            name = stem + ".pstats"
+            self.profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+        return name
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+# Held by the request being profiled with cProfile
+_cprofile_lock = threading.Lock()
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def profile_worker(seconds: float) -> str:
+    """Sample every thread of this worker for the given time and save collapsed stacks."""
+    sampler = StackSampler().start()
+    time.sleep(min(seconds, MAX_WORKER_SECONDS))
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-worker-{os.getpid()}.collapsed.txt"
+    with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+        f.write(sampler.stop())
+    return name
+
+
+def _requested_format(scope: Scope) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            return value.decode("latin-1").strip().lower()
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        return parse_qs(query.decode("latin-1")).get("profile", [None])[0]
+    return None
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """Runs admin requests that ask for it under a profiler.
+
+    authorize receives the Authorization header value and raises an
+    HTTPException unless it belongs to an admin.
+    """
+
+    def __init__(self, app: ASGIApp, authorize: Callable[[Optional[str]], object]):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = _requested_format(scope)
+        if fmt is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if fmt not in FORMATS:
+                raise HTTPException(status_code=400, detail=f"Profile format must be one of {', '.join(FORMATS)}")
+            self.authorize(_header(scope, b"authorization"))
+        except HTTPException as e:
+            await JSONResponse({"detail": e.detail}, status_code=e.status_code)(scope, receive, send)
+            return
+
+        if fmt == "pstats" and not _cprofile_lock.acquire(blocking=False):
+            await JSONResponse({"detail": "Another request is being profiled, retry shortly"},
+                               status_code=409)(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, RequestProfile(fmt))
+        finally:
+            if fmt == "pstats":
+                _cprofile_lock.release()
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, profile: RequestProfile) -> None:
+        label = f"{scope['method']}{scope['path'].replace('/', '_')}"[:80]
+        holder = {}
+
+        async def send_with_result(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                holder["name"] = name = profile.save(label)
+                MutableHeaders(scope=message).append("X-Profile-Result", name)
+            await send(message)
+
+        token = _current.set(profile)
+        if profile.sampler is not None:
+            profile.sampler.start()
+        try:
+            await self.app(scope, receive, send_with_result)
+        finally:
+            _current.reset(token)
+            if "name" not in holder and profile.sampler is not None:
+                profile.sampler.stop()
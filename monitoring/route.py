@@ -0,0 +1,92 @@
+"""
+APIRoute subclass that splits handler time into request validation, endpoint
+work and response serialization.
+"""
+from __future__ import annotations
+import functools
+import inspect
+import time
+from typing import Any, Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from monitoring.profiling import current_profile
+from monitoring.timing import RequestTiming, current_timing
+
+
+def _mark_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an endpoint so the current request records when it started and finished,
+    and so a profiled request profiles the endpoint on the thread it runs on."""
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed_async(*args, **kwargs):
+            timing = current_timing()
+            if timing is not None:
+                timing.endpoint_started = time.perf_counter()
+            try:
+                profile = current_profile()
+                if profile is not None:
+                    return await profile.coroutine(call(*args, **kwargs))
+                return await call(*args, **kwargs)
+            finally:
+                if timing is not None:
+                    timing.endpoint_finished = time.perf_counter()
+        return timed_async
+
+    @functools.wraps(call)
+    def timed(*args, **kwargs):
+        timing = current_timing()
+        if timing is not None:
+            timing.endpoint_started = time.perf_counter()
+        try:
+            # Sync endpoints run in the threadpool
+            profile = current_profile()
+            if profile is not None:
+                with profile.thread():
+                    return call(*args, **kwargs)
+            return call(*args, **kwargs)
+        finally:
+            if timing is not None:
+                timing.endpoint_finished = time.perf_counter()
+    return timed
+
+
+def _split_phases(timing: RequestTiming, started: float, finished: float) -> None:
+    if timing.endpoint_started is None or timing.endpoint_finished is None:
+        return
+    endpoint = timing.endpoint_finished - timing.endpoint_started
+    before = timing.endpoint_started - started - timing.phases.get("auth", 0.0)
+    timing.phases["validate"] = max(before, 0.0)
+    timing.phases["app"] = max(endpoint - timing.phases.get("db", 0.0), 0.0)
+    timing.phases["serialize"] = finished - timing.endpoint_finished
+
+
+class TimedRoute(APIRoute):
+    """Route class for APIRouter(route_class=TimedRoute).
+
+    Adds these phases to the request timing:
+      validate  - body parsing, parameter validation and dependencies, minus auth
+      app       - the endpoint itself, minus SQL execution (mostly ORM hydration)
+      serialize - response model validation and JSON encoding
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        route = self.path
+
+        async def timed_handler(request: Request) -> Response:
+            timing = current_timing()
+            if timing is None:
+                return await handler(request)
+            timing.route = route
+            started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                _split_phases(timing, started, time.perf_counter())
+
+        return timed_handler
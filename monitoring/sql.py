@@ -0,0 +1,93 @@
+"""
+SQL statement instrumentation.
+
+Every statement executed through SQLAlchemy is attributed to the current
+request: it adds to the request's "db" phase and query count, and its
+normalised shape is counted so that a request running the same shape more
+than a threshold number of times (the N+1 pattern) is logged once. Outside a
+request only the slow-query check runs.
+
+Queries slower than the slow-query threshold are logged with their
+parameters and SQLite's EXPLAIN QUERY PLAN output. executemany batches and
+DDL are exempt.
+
+Thresholds come from APP_SLOW_QUERY_MS (default 100) and APP_N_PLUS_ONE
+(default 10), or from configure().
+"""
+from __future__ import annotations
+import logging
+import os
+import re
+from typing import Any, List, Optional
+
+from monitoring.timing import current_timing
+
+logger = logging.getLogger("app.sql")
+
+slow_query_seconds = float(os.environ.get("APP_SLOW_QUERY_MS", "100")) / 1000.0
+n_plus_one_threshold = int(os.environ.get("APP_N_PLUS_ONE", "10"))
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\(\s*\?(\s*,\s*\?)*\s*\)")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def configure(slow_query_ms: Optional[float] = None, n_plus_one: Optional[int] = None) -> None:
+    """Override the slow-query threshold (milliseconds) and the N+1 repeat threshold."""
+    global slow_query_seconds, n_plus_one_threshold
+    if slow_query_ms is not None:
+        slow_query_seconds = slow_query_ms / 1000.0
+    if n_plus_one is not None:
+        n_plus_one_threshold = n_plus_one
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a statement so that executions differing only in values compare equal."""
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _explainable(statement: str) -> bool:
+    return statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)
+
+
+def explain(dbapi_connection: Any, statement: str, parameters: Any) -> List[str]:
+    """SQLite's EXPLAIN QUERY PLAN for a statement, one line per plan step."""
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:  # the plan is diagnostic only
+        return [f"(plan unavailable: {e})"]
+
+
+def statement_executed(dbapi_connection: Any, statement: str, parameters: Any, executemany: bool,
+                       elapsed: float) -> None:
+    """Attribute one executed statement to the current request and apply the checks."""
+    timing = current_timing()
+    if timing is not None:
+        timing.add("db", elapsed)
+        shape = statement_shape(statement)
+        count = timing.statements.get(shape, 0) + 1
+        timing.statements[shape] = count
+        if count == n_plus_one_threshold + 1:
+            logger.warning(
+                "Possible N+1: %s ran the same statement more than %d times: %s",
+                timing.route or "request", n_plus_one_threshold, shape,
+            )
+
+    # Batched inserts and DDL are slow by design, so only single queries are checked
+    if elapsed >= slow_query_seconds and not executemany and _explainable(statement):
+        plan = explain(dbapi_connection, statement, parameters)
+        logger.warning(
+            "Slow query (%.1f ms)%s: %s params=%.200r\n  %s",
+            elapsed * 1000, f" in {timing.route}" if timing is not None and timing.route else "",
+            _WHITESPACE.sub(" ", statement).strip(), parameters, "\n  ".join(plan) or "(no plan)",
+        )
@@ -0,0 +1,76 @@
+"""
+Per-request phase timing.
+
+The middleware installs a RequestTiming in a context variable for each
+request. Hooks anywhere in the app add durations to it by phase name; the
+context variable follows the request into the threadpool that runs sync
+dependencies and endpoints, so hooks need no access to the request object.
+Outside a request every hook is a single context variable lookup.
+"""
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+class RequestTiming:
+    """Accumulated phase durations (seconds) and event counts for one request."""
+
+    __slots__ = ("started", "route", "phases", "counts", "statements", "endpoint_started", "endpoint_finished")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.statements: Dict[str, int] = {}
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """The timing of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[RequestTiming]:
+    """Make a new RequestTiming current for the enclosed block."""
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def record(phase: str, seconds: float) -> None:
+    """Add a measured duration to the current request, if there is one."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as one occurrence of a phase of the current request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
@@ -1,10 +1,50 @@
 from fastapi import HTTPException, Depends, Header
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+import hashlib
+import os
+import uuid
 import jwt
 
-SECRET_KEY = "super_secret_key"
-ALGORITHM = "HS256"
+from cache import TTLCache
+from monitoring import phase
+from security.keys import keyring
+from security.revocation import revocations
+
+ACCESS_TOKEN_TTL = timedelta(hours=1)
+
+# Verified claims and signing kid keyed by token digest, each held until the token's exp.
+# APP_JWT_CACHE_SIZE=0 disables the cache.
+verified_tokens = TTLCache(maxsize=int(os.environ.get("APP_JWT_CACHE_SIZE", "10000")), name="jwt")
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def forget_token(token: str) -> None:
+    """Drop a token from the verified cache so its next use is fully verified again."""
+    verified_tokens.pop(_token_key(token))
+
+
+def decode_token(token: str) -> dict:
+    """Verify a token and return its claims, reusing an earlier verification until exp."""
+    key = _token_key(token)
+    cached = verified_tokens.get(key)
+    if cached is not None:
+        kid, payload = cached
+        # Tokens signed by a key that has since been pruned stop verifying
+        if keyring.get(kid) is not None:
+            return payload
+        verified_tokens.pop(key)
+    kid = jwt.get_unverified_header(token).get("kid")
+    signing_key = keyring.get(kid) if isinstance(kid, str) else None
+    if signing_key is None:
+        raise jwt.InvalidTokenError("Unknown signing key")
+    payload = jwt.decode(token, signing_key.public_key, algorithms=[signing_key.algorithm])
+    if "exp" in payload:
+        verified_tokens.set(key, (kid, payload), expires_at=payload["exp"])
+    return payload
 
 
 def create_access_token(username: str, roles: list) -> str:
@@ -13,9 +53,12 @@ def create_access_token(username: str, roles: list) -> str:
         "sub": username,
         "roles": roles if roles else [],
         "iat": datetime.now(timezone.utc),
-        "exp": datetime.now(timezone.utc) + timedelta(hours=1)
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.now(timezone.utc) + ACCESS_TOKEN_TTL
     }
-    token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    signing_key = keyring.signing_key()
+    token = jwt.encode(payload, signing_key.private_key, algorithm=signing_key.algorithm,
+                       headers={"kid": signing_key.kid})
     return token
 
 
@@ -30,13 +73,18 @@ def verify_token(authorization: Optional[str] = Header(None)) -> dict:
     token = authorization.split("Bearer ")[1]
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        with phase("auth"):
+            payload = decode_token(token)
+            revoked = revocations.is_revoked(payload.get("jti"))
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    if revoked:
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return payload
+
 
 def require_admin(payload: dict = Depends(verify_token)) -> dict:
 
@@ -0,0 +1,230 @@
+"""
+Asymmetric JWT signing keys with kid-tagged rotation.
+
+Keys live in APP_JWT_KEY_DIR (default ./keys) as one PEM file per key plus a
+keyring.json manifest that lists them oldest first. The newest key signs new
+tokens and every listed key still verifies them, so rotating is: add a key,
+wait at least one token lifetime, then prune the old one. Every node that
+shares the directory (or a copy of it) signs and verifies with the same
+keys, and services that only verify can use the public keys served at
+/.well-known/jwks.json instead.
+
+A process reloads the manifest when it changes on disk (checked at most every
+RELOAD_INTERVAL seconds) and whenever it sees a token with an unknown kid.
+
+Usage:
+    python -m security.keys rotate [--alg EdDSA|ES256]   # Add a new signing key
+    python -m security.keys list
+    python -m security.keys prune --keep 2              # Drop all but the newest N keys
+"""
+from __future__ import annotations
+import argparse
+import fcntl
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+KEY_DIR = os.environ.get(
+    "APP_JWT_KEY_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "keys")
+)
+DEFAULT_ALGORITHM = "EdDSA"
+ALGORITHMS = ("EdDSA", "ES256")
+RELOAD_INTERVAL = 30.0
+# Unknown kids force a re-read, but no more often than this
+FORCED_RELOAD_INTERVAL = 1.0
+MANIFEST = "keyring.json"
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    created: float
+    private_key: object
+
+    @property
+    def public_key(self):
+        return self.private_key.public_key()
+
+    def jwk(self) -> dict:
+        """Public JWK for this key."""
+        to_jwk = OKPAlgorithm.to_jwk if self.algorithm == "EdDSA" else ECAlgorithm.to_jwk
+        jwk = json.loads(to_jwk(self.public_key))
+        jwk.update(kid=self.kid, alg=self.algorithm, use="sig")
+        return jwk
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Unsupported algorithm {algorithm}; choose from {', '.join(ALGORITHMS)}")
+
+
+class KeyRing:
+    """The signing keys in a key directory, reloaded when the directory changes."""
+
+    def __init__(self, key_dir: str = KEY_DIR):
+        self.key_dir = key_dir
+        self._keys: Dict[str, SigningKey] = {}
+        self._order: List[str] = []
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.key_dir, MANIFEST)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Serialise key directory changes across processes."""
+        os.makedirs(self.key_dir, mode=0o700, exist_ok=True)
+        with open(os.path.join(self.key_dir, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> List[dict]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)["keys"]
+        except FileNotFoundError:
+            return []
+
+    def _write_manifest(self, entries: List[dict]) -> None:
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"keys": entries}, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def reload(self) -> None:
+        """Load every key listed in the manifest."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        keys, order = {}, []
+        for entry in self._read_manifest():
+            with open(os.path.join(self.key_dir, f"{entry['kid']}.pem"), "rb") as f:
+                private_key = serialization.load_pem_private_key(f.read(), password=None)
+            keys[entry["kid"]] = SigningKey(entry["kid"], entry["alg"], entry["created"], private_key)
+            order.append(entry["kid"])
+        with self._lock:
+            self._keys, self._order, self._mtime = keys, order, mtime
+            self._checked = time.monotonic()
+
+    def _refresh(self, force: bool = False) -> None:
+        since = time.monotonic() - self._checked
+        if since < (FORCED_RELOAD_INTERVAL if force else RELOAD_INTERVAL) and self._order:
+            return
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if force or mtime != self._mtime or not self._order:
+            self.reload()
+        else:
+            self._checked = time.monotonic()
+
+    def rotate(self, algorithm: str = DEFAULT_ALGORITHM) -> SigningKey:
+        """Generate a new key and make it the signing key; older keys keep verifying."""
+        private_key = generate_private_key(algorithm)
+        kid = uuid.uuid4().hex[:16]
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        with self._exclusive():
+            fd = os.open(os.path.join(self.key_dir, f"{kid}.pem"), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(pem)
+            entries = self._read_manifest()
+            entries.append({"kid": kid, "alg": algorithm, "created": time.time()})
+            self._write_manifest(entries)
+        self.reload()
+        return self._keys[kid]
+
+    def prune(self, keep: int = 2) -> List[str]:
+        """Remove all but the newest `keep` keys, returning the removed kids."""
+        with self._exclusive():
+            entries = self._read_manifest()
+            removed = [e["kid"] for e in entries[:-keep]] if keep > 0 else [e["kid"] for e in entries]
+            self._write_manifest(entries[len(removed):])
+            for kid in removed:
+                os.remove(os.path.join(self.key_dir, f"{kid}.pem"))
+        self.reload()
+        return removed
+
+    def signing_key(self) -> SigningKey:
+        """The newest key, creating a first key if the directory has none."""
+        self._refresh()
+        if not self._order:
+            with self._exclusive():
+                existing = self._read_manifest()
+            if existing:
+                self.reload()
+            else:
+                self.rotate()
+        return self._keys[self._order[-1]]
+
+    def get(self, kid: str) -> Optional[SigningKey]:
+        """The key with this kid, re-reading the directory if it is unknown."""
+        self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            self._refresh(force=True)
+            key = self._keys.get(kid)
+        return key
+
+    def keys(self) -> List[SigningKey]:
+        self._refresh()
+        return [self._keys[kid] for kid in self._order]
+
+    def jwks(self) -> dict:
+        """Public keys of every key that can still verify tokens, newest first."""
+        return {"keys": [key.jwk() for key in reversed(self.keys())]}
+
+
+keyring = KeyRing()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the JWT signing keys")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rotate = sub.add_parser("rotate", help="Add a new signing key")
+    rotate.add_argument("--alg", choices=ALGORITHMS, default=DEFAULT_ALGORITHM)
+    sub.add_parser("list", help="List keys, oldest first")
+    prune = sub.add_parser("prune", help="Remove all but the newest keys")
+    prune.add_argument("--keep", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    if args.command == "rotate":
+        key = keyring.rotate(args.alg)
+        print(f"New signing key {key.kid} ({key.algorithm}) in {keyring.key_dir}")
+    elif args.command == "list":
+        keys = keyring.keys()
+        for key in keys:
+            active = " (signing)" if key is keys[-1] else ""
+            print(f"  {key.kid}  {key.algorithm:<6} {time.strftime('%Y-%m-%d %H:%M', time.localtime(key.created))}"
+                  f"{active}")
+    else:
+        removed = keyring.prune(args.keep)
+        print(f"Removed {len(removed)} key(s): {', '.join(removed) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
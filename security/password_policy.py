@@ -0,0 +1,197 @@
+"""
+Password hashing policy: scheme, cost parameters and calibration.
+
+The policy comes from the environment:
+
+  APP_PASSWORD_SCHEME      bcrypt (default) or argon2id (needs argon2-cffi)
+  APP_BCRYPT_ROUNDS        bcrypt cost factor (default 12)
+  APP_ARGON2_TIME_COST     argon2id passes (default 3)
+  APP_ARGON2_MEMORY_KIB    argon2id memory (default 65536)
+  APP_ARGON2_PARALLELISM   argon2id lanes (default 1)
+  APP_PASSWORD_POLICY_FILE if set, a policy saved by `calibrate --output`,
+                           used instead of the cost settings above; if it
+                           cannot be loaded, startup fails rather than
+                           falling back to them
+
+Calibrate once per deployment, not in each worker: workers calibrating on
+their own settle on different costs, and rehash-on-login would then flip
+stored hashes between them. Run `calibrate --output` at deploy time and
+point every worker at the file.
+
+Stored hashes that do not match the policy still verify and are rehashed on
+the next successful login.
+
+Usage:
+    python -m security.password_policy show
+    python -m security.password_policy calibrate --target-ms 250 [--scheme argon2id] [--output policy.json]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+
+import bcrypt
+
+try:
+    from argon2 import PasswordHasher, Type
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - optional dependency
+    PasswordHasher = None
+
+SCHEMES = ("bcrypt", "argon2id")
+# Calibration never goes below these, however slow the machine
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+MIN_ARGON2_TIME_COST = 1
+MAX_ARGON2_TIME_COST = 20
+
+
+def _require_argon2() -> None:
+    if PasswordHasher is None:
+        raise RuntimeError("The argon2id scheme requires argon2-cffi (pip install argon2-cffi)")
+
+
+@dataclass(frozen=True)
+class PasswordPolicy:
+    scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 3
+    argon2_memory_kib: int = 65536
+    argon2_parallelism: int = 1
+
+    def __post_init__(self):
+        if self.scheme not in SCHEMES:
+            raise ValueError(f"Unknown password scheme {self.scheme}; choose from {', '.join(SCHEMES)}")
+
+    @classmethod
+    def from_env(cls, require_file: bool = True) -> "PasswordPolicy":
+        """The configured policy; require_file=False tolerates a policy file not written yet."""
+        path = os.environ.get("APP_PASSWORD_POLICY_FILE")
+        if path and (require_file or os.path.exists(path)):
+            # Falling back to the cost settings would rehash every stored hash down to them on login
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, TypeError) as e:
+                raise RuntimeError(f"Cannot load APP_PASSWORD_POLICY_FILE {path}: {e}") from e
+        return cls(
+            scheme=os.environ.get("APP_PASSWORD_SCHEME", cls.scheme),
+            bcrypt_rounds=int(os.environ.get("APP_BCRYPT_ROUNDS", cls.bcrypt_rounds)),
+            argon2_time_cost=int(os.environ.get("APP_ARGON2_TIME_COST", cls.argon2_time_cost)),
+            argon2_memory_kib=int(os.environ.get("APP_ARGON2_MEMORY_KIB", cls.argon2_memory_kib)),
+            argon2_parallelism=int(os.environ.get("APP_ARGON2_PARALLELISM", cls.argon2_parallelism)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PasswordPolicy":
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        """Write the policy for workers to load; replaced atomically so readers never see half a file."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp, path)
+
+    def _argon2(self) -> "PasswordHasher":
+        _require_argon2()
+        return PasswordHasher(time_cost=self.argon2_time_cost, memory_cost=self.argon2_memory_kib,
+                              parallelism=self.argon2_parallelism, type=Type.ID)
+
+    def hash(self, password: bytes) -> str:
+        if self.scheme == "argon2id":
+            return self._argon2().hash(password)
+        return bcrypt.hashpw(password, bcrypt.gensalt(self.bcrypt_rounds)).decode("utf-8")
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether a stored hash was made with a different scheme or cost than this policy."""
+        if self.scheme == "argon2id":
+            return not hashed.startswith("$argon2id$") or self._argon2().check_needs_rehash(hashed)
+        if not hashed.startswith("$2"):
+            return True
+        return int(hashed.split("$")[2]) != self.bcrypt_rounds
+
+    def env(self) -> dict:
+        """Environment settings that reproduce this policy."""
+        values = {"APP_PASSWORD_SCHEME": self.scheme}
+        if self.scheme == "bcrypt":
+            values["APP_BCRYPT_ROUNDS"] = str(self.bcrypt_rounds)
+        else:
+            values.update(APP_ARGON2_TIME_COST=str(self.argon2_time_cost),
+                          APP_ARGON2_MEMORY_KIB=str(self.argon2_memory_kib),
+                          APP_ARGON2_PARALLELISM=str(self.argon2_parallelism))
+        return values
+
+
+def verify(password: bytes, hashed: str) -> bool:
+    """Check a password against a stored hash of any supported scheme."""
+    if hashed.startswith("$argon2"):
+        _require_argon2()
+        try:
+            return PasswordHasher().verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password, hashed.encode("utf-8"))
+
+
+def measure(policy: PasswordPolicy, repeat: int = 3) -> float:
+    """Fastest of `repeat` verifications under the policy, in seconds."""
+    hashed = policy.hash(b"calibration password")
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        verify(b"calibration password", hashed)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def calibrate(target_ms: float, scheme: str = "bcrypt", base: PasswordPolicy = PasswordPolicy()) -> PasswordPolicy:
+    """The strongest policy whose verification stays within target_ms on this machine.
+
+    Both schemes scale predictably with their cost (bcrypt doubles per round,
+    argon2id grows linearly with passes), so one cheap measurement is
+    extrapolated instead of trying every cost.
+    """
+    target = target_ms / 1000.0
+    if scheme == "bcrypt":
+        probe = 8
+        per_probe = measure(replace(base, scheme=scheme, bcrypt_rounds=probe))
+        rounds = MIN_BCRYPT_ROUNDS
+        while rounds < MAX_BCRYPT_ROUNDS and per_probe * 2 ** (rounds + 1 - probe) <= target:
+            rounds += 1
+        return replace(base, scheme=scheme, bcrypt_rounds=rounds)
+
+    per_pass = measure(replace(base, scheme=scheme, argon2_time_cost=1))
+    time_cost = int(target / per_pass) if per_pass > 0 else MAX_ARGON2_TIME_COST
+    return replace(base, scheme=scheme,
+                   argon2_time_cost=max(MIN_ARGON2_TIME_COST, min(time_cost, MAX_ARGON2_TIME_COST)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or calibrate the password hashing policy")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="Print the policy from the environment and its verification latency")
+    cal = sub.add_parser("calibrate", help="Find the cost that meets a target verification latency")
+    cal.add_argument("--target-ms", type=float, default=250.0)
+    cal.add_argument("--scheme", choices=SCHEMES, default=None)
+    cal.add_argument("--output", default=None, help="Save the policy here, for APP_PASSWORD_POLICY_FILE")
+    args = parser.parse_args(argv)
+
+    # Calibrating is how the policy file gets written, so it need not exist yet
+    policy = PasswordPolicy.from_env(require_file=args.command == "show")
+    if args.command == "calibrate":
+        policy = calibrate(args.target_ms, args.scheme or policy.scheme, policy)
+    print(f"Verification takes {measure(policy) * 1000:.0f} ms with:")
+    for name, value in policy.env().items():
+        print(f"{name}={value}")
+    if args.command == "calibrate" and args.output:
+        policy.save(args.output)
+        print(f"Saved to {args.output}; set APP_PASSWORD_POLICY_FILE={args.output} for the workers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
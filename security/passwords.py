@@ -0,0 +1,159 @@
+"""
+Password hashing on a dedicated process pool.
+
+Password hashing is deliberately slow CPU work. Running it in request threads lets a
+burst of logins occupy the shared threadpool (and, through the GIL, slow
+everything else), so hashing and verification are sent to a pool of
+APP_HASH_WORKERS processes (default: CPU count). At most APP_HASH_QUEUE
+operations (default: 4 per worker) may be queued or running at once; beyond
+that submit fails immediately with HashPoolBusy, which the API turns into
+503 with Retry-After. APP_HASH_WORKERS=0 hashes inline in the caller.
+
+Scheme and cost come from the current PasswordPolicy (see
+security/password_policy.py).
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+from monitoring.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_REJECTED, REGISTRY
+from security.password_policy import PasswordPolicy, verify
+
+RETRY_AFTER_SECONDS = 1
+
+
+class HashPoolBusy(Exception):
+    """Every slot of the hashing queue is taken."""
+
+
+def _hash(password: bytes, policy: PasswordPolicy) -> str:
+    return policy.hash(password)
+
+
+def _check(password: bytes, hashed: str) -> bool:
+    return verify(password, hashed)
+
+
+class HashPool:
+    """Process pool with a bounded number of queued plus running operations."""
+
+    def __init__(self, workers: int, queue: int):
+        self.workers = workers
+        self.limit = max(queue, workers, 1)
+        self.in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forking a process that runs threads (Kafka, the server) is unsafe
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _submit(self, op: str, fn: Callable, args: tuple) -> Future:
+        with self._lock:
+            if self.in_flight >= self.limit:
+                PASSWORD_HASH_REJECTED.labels(op).inc()
+                raise HashPoolBusy(f"{self.in_flight} password operations already pending")
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            future: Future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._done()
+            raise
+
+        def finished(_):
+            self._done()
+            PASSWORD_HASH_DURATION.labels(op).observe(time.perf_counter() - started)
+
+        future.add_done_callback(finished)
+        return future
+
+    def run(self, op: str, fn: Callable, *args):
+        """Run fn(*args) on the pool and wait for it, or raise HashPoolBusy when full."""
+        if self.workers <= 0:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASH_DURATION.labels(op).observe(time.perf_counter() - started)
+        return self._submit(op, fn, args).result()
+
+    def run_many(self, op: str, fn: Callable, calls: List[tuple]) -> list:
+        """Run fn over many argument tuples in parallel, returning results in order.
+
+        At most one operation per worker is outstanding for the batch, so
+        the rest of the queue stays free for logins. HashPoolBusy is raised
+        only if not even one slot can be had.
+        """
+        if self.workers <= 0:
+            return [self.run(op, fn, *args) for args in calls]
+        results = [None] * len(calls)
+        pending: Dict[Future, int] = {}
+        queued = iter(enumerate(calls))
+        upcoming = next(queued, None)
+        while upcoming is not None or pending:
+            while upcoming is not None and len(pending) < self.workers:
+                try:
+                    future = self._submit(op, fn, upcoming[1])
+                except HashPoolBusy:
+                    if not pending:
+                        raise
+                    break
+                pending[future] = upcoming[0]
+                upcoming = next(queued, None)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+        return results
+
+    def _done(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def depth(self) -> dict:
+        running = min(self.in_flight, self.workers)
+        return {("running",): running, ("queued",): self.in_flight - running}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_workers = int(os.environ.get("APP_HASH_WORKERS", str(os.cpu_count() or 1)))
+pool = HashPool(_workers, int(os.environ.get("APP_HASH_QUEUE", str(4 * max(_workers, 1)))))
+
+REGISTRY.callback_gauge("password_hash_queue", "Password operations on the hashing pool by state", ("state",),
+                        lambda: pool.depth())
+
+
+# Calibrated at deploy time, if at all (see security/password_policy.py)
+policy = PasswordPolicy.from_env()
+
+
+def hash_password(password: str) -> str:
+    """Hash of a password under the current policy, computed on the hashing pool."""
+    return pool.run("hash", _hash, password.encode("utf-8"), policy)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hashes of many passwords, computed in parallel across the hashing pool."""
+    return pool.run_many("hash", _hash, [(password.encode("utf-8"), policy) for password in passwords])
+
+
+def check_password(password: str, hashed: str) -> bool:
+    """Whether a password matches a stored hash, checked on the hashing pool."""
+    return pool.run("verify", _check, password.encode("utf-8"), hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    return policy.needs_rehash(hashed)
@@ -0,0 +1,252 @@
+"""
+Token-bucket rate limiting shared by every worker on a node.
+
+Each client gets a bucket of APP_RATE_LIMIT_BURST tokens (default 100) that
+refills at APP_RATE_LIMIT_RATE tokens per second (default 20). A client is
+the `sub` of a valid bearer token, or else the client IP. Every request
+costs at least one token. Costly routes cost more (ROUTE_COSTS): a bcrypt
+login costs 10, and list endpoints cost one token per 1000 rows requested.
+A request that finds too few tokens gets 429 with Retry-After.
+The limiter is off unless APP_RATE_LIMIT=1.
+
+Behind a reverse proxy every connection comes from the proxy, so list its
+addresses or networks in APP_RATE_LIMIT_TRUSTED_PROXIES (comma separated).
+For connections from those, the client IP is the rightmost X-Forwarded-For
+address that is not itself a trusted proxy; other clients cannot spoof it.
+
+Buckets live in a memory-mapped file, so all uvicorn workers on the node
+share them. It is APP_RATE_LIMIT_FILE, or else a file in a private (0700)
+per-user directory under $XDG_RUNTIME_DIR or the temp directory. The file
+is never opened through a symlink. The file is a set-associative table: a
+client's key hashes to one set of SET_WAYS slots. The set is locked with a
+byte-range lock for the duration of one update. When a set is full, the
+slot untouched for longest is reused; a bucket idle that long is back at
+full burst anyway.
+"""
+from __future__ import annotations
+import fcntl
+import hashlib
+import ipaddress
+import math
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs
+
+import jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+SLOT = struct.Struct("<Qdd")  # key hash (0 = empty), tokens, last update (epoch seconds)
+SET_WAYS = 8
+DEFAULT_SETS = 8192  # 64k buckets, 1.5 MiB
+FILE_NAME = "ratelimit.mmap"
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@dataclass(frozen=True)
+class RouteCost:
+    """Tokens charged for a route: `cost`, plus one per `per_items` rows asked for with ?limit=."""
+    cost: float = 1.0
+    per_items: Optional[int] = None
+    default_items: int = 0
+
+    def charge(self, query_string: bytes) -> float:
+        if self.per_items is None:
+            return self.cost
+        items = self.default_items
+        if b"limit=" in query_string:
+            try:
+                items = int(parse_qs(query_string.decode("latin-1"))["limit"][0])
+            except (KeyError, ValueError):
+                pass
+        return self.cost + max(items, 0) / self.per_items
+
+
+ROUTE_COSTS: Dict[Tuple[str, str], RouteCost] = {
+    ("POST", "/login"): RouteCost(10),
+    ("POST", "/users"): RouteCost(10),
+    ("POST", "/users:bulk"): RouteCost(100),
+    ("GET", "/movies"): RouteCost(1, per_items=1000, default_items=10_000),
+    ("GET", "/links"): RouteCost(1, per_items=1000, default_items=10_000),
+    ("GET", "/ratings"): RouteCost(1, per_items=1000, default_items=1000),
+    ("GET", "/tags"): RouteCost(1, per_items=1000, default_items=1000),
+}
+DEFAULT_COST = RouteCost()
+
+
+def bucket_key(identity: str) -> int:
+    """Stable 64-bit key for an identity (never 0, which marks an empty slot)."""
+    return int.from_bytes(hashlib.blake2b(identity.encode(), digest_size=8).digest(), "little") or 1
+
+
+class SharedBuckets:
+    """Token buckets in a memory-mapped file shared between processes."""
+
+    def __init__(self, path: str, rate: float, burst: float, sets: int = DEFAULT_SETS,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.sets = sets
+        self.clock = clock
+        self._set_bytes = SLOT.size * SET_WAYS
+        size = self._set_bytes * sets
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        # fcntl locks exclude other processes only, so threads also take a striped lock
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def take(self, key: int, cost: float) -> float:
+        """Take `cost` tokens from a bucket; 0.0 if granted, else seconds until it could be.
+
+        A cost above the burst size is charged as a full bucket, so oversized
+        requests are slowed down rather than refused forever.
+        """
+        cost = min(cost, self.burst)
+        index = key % self.sets
+        offset = index * self._set_bytes
+        with self._locks[index % len(self._locks)]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self._set_bytes, offset)
+            try:
+                return self._take(key, cost, offset)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self._set_bytes, offset)
+
+    def _take(self, key: int, cost: float, offset: int) -> float:
+        now = self.clock()
+        slot, oldest, oldest_at = None, offset, math.inf
+        for way in range(SET_WAYS):
+            at = offset + way * SLOT.size
+            slot_key, tokens, updated = SLOT.unpack_from(self._map, at)
+            if slot_key == key:
+                slot = at
+                break
+            if slot_key == 0:
+                updated = -math.inf
+            if updated < oldest_at:
+                oldest, oldest_at = at, updated
+        if slot is None:
+            slot, tokens, updated = oldest, self.burst, now
+        tokens = min(self.burst, tokens + max(now - updated, 0.0) * self.rate)
+        if tokens >= cost:
+            SLOT.pack_into(self._map, slot, key, tokens - cost, now)
+            return 0.0
+        SLOT.pack_into(self._map, slot, key, tokens, now)
+        return (cost - tokens) / self.rate if self.rate > 0 else math.inf
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+def private_dir() -> str:
+    """A directory only this user can use, for state other local users must not tamper with."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    path = os.path.join(base, f"movielens-api-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{path} must be a directory owned by uid {os.getuid()} with mode 0700")
+    return path
+
+
+def _trusted(address: str, proxies: Sequence[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_ip(scope: Scope, trusted_proxies: Sequence[Network] = ()) -> str:
+    """The peer address, or for a trusted proxy the address it says it forwarded for."""
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    if not trusted_proxies or not _trusted(peer, trusted_proxies):
+        return peer
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-for":
+            forwarded.extend(a.strip() for a in value.decode("latin-1").split(","))
+    # Proxies append, so the rightmost entries are the trustworthy ones
+    for address in reversed(forwarded):
+        if address and not _trusted(address, trusted_proxies):
+            return address
+    return peer
+
+
+def _identity(scope: Scope, decode: Callable[[str], dict], trusted_proxies: Sequence[Network] = ()) -> str:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            header = value.decode("latin-1")
+            if header.startswith("Bearer "):
+                try:
+                    return "sub:" + str(decode(header[7:])["sub"])
+                except (jwt.InvalidTokenError, KeyError):
+                    pass
+            break
+    return "ip:" + client_ip(scope, trusted_proxies)
+
+
+class RateLimitMiddleware:
+    """Rejects requests whose client has run out of tokens with 429 and Retry-After.
+
+    decode verifies a bearer token and returns its claims; it is the cached
+    verify path, so the identity lookup is cheap and the later auth
+    dependency reuses the result.
+    """
+
+    def __init__(self, app: ASGIApp, buckets: SharedBuckets, decode: Callable[[str], dict],
+                 costs: Dict[Tuple[str, str], RouteCost] = ROUTE_COSTS, trusted_proxies: Sequence[Network] = ()):
+        self.app = app
+        self.buckets = buckets
+        self.decode = decode
+        self.costs = costs
+        self.trusted_proxies = tuple(trusted_proxies)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cost = self.costs.get((scope["method"], scope["path"]), DEFAULT_COST).charge(scope.get("query_string", b""))
+        wait = self.buckets.take(bucket_key(_identity(scope, self.decode, self.trusted_proxies)), cost)
+        if wait > 0.0:
+            retry_after = str(max(1, math.ceil(wait))) if wait != math.inf else "3600"
+            response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429,
+                                    headers={"Retry-After": retry_after})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def trusted_proxies_from_env() -> Tuple[Network, ...]:
+    value = os.environ.get("APP_RATE_LIMIT_TRUSTED_PROXIES", "")
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip())
+
+
+def buckets_from_env() -> Optional[SharedBuckets]:
+    """The node's shared buckets as configured by the environment, or None when disabled."""
+    if os.environ.get("APP_RATE_LIMIT", "0") != "1":
+        return None
+    return SharedBuckets(
+        os.environ.get("APP_RATE_LIMIT_FILE") or os.path.join(private_dir(), FILE_NAME),
+        rate=float(os.environ.get("APP_RATE_LIMIT_RATE", "20")),
+        burst=float(os.environ.get("APP_RATE_LIMIT_BURST", "100")),
+    )
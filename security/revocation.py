@@ -0,0 +1,166 @@
+"""
+Access token revocation by jti.
+
+Revoked jtis are stored in the revoked_tokens table and mirrored into a
+Bloom filter in each worker. Checking a token that was not revoked (nearly
+every token) costs a few hash probes. Only a filter hit, meaning the token
+was revoked or is a false positive (about 1%), reaches the database.
+
+Each worker fetches rows added since its last sync every SYNC_INTERVAL
+seconds, so a revocation made on another worker or node takes effect
+within that interval. Once start() has been called (the app does so at
+startup) a background thread syncs, keeping the query off the request
+path; otherwise checks sync inline when the filter is stale. A revocation made on this worker takes effect
+immediately. When the filter outgrows its capacity, expired rows are purged
+and the filter is rebuilt twice as large.
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from model.revoked_token import RevokedToken
+from monitoring.metrics import TOKEN_REVOCATION_CHECKS
+
+logger = logging.getLogger("app.auth")
+
+SYNC_INTERVAL = 1.0
+DEFAULT_CAPACITY = 100_000
+ERROR_RATE = 0.01
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((h1 + i * h2) % size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """Revoked jtis in the database, fronted by a per-worker Bloom filter."""
+
+    def __init__(self, session_factory: Callable[[], Session], capacity: int = DEFAULT_CAPACITY,
+                 sync_interval: float = SYNC_INTERVAL):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.sync_interval = sync_interval
+        self._filter = BloomFilter(capacity)
+        self._last_id = 0
+        self._synced = -math.inf
+        self._sync_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _rebuild(self, db: Session) -> None:
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time())))
+        db.commit()
+        live = db.scalar(select(func.count()).select_from(RevokedToken)) or 0
+        while live * 2 > self.capacity:
+            self.capacity *= 2
+        bloom = BloomFilter(self.capacity)
+        last_id = 0
+        for row_id, jti in db.execute(select(RevokedToken.id, RevokedToken.jti).order_by(RevokedToken.id)):
+            bloom.add(jti)
+            last_id = row_id
+        self._filter, self._last_id = bloom, max(last_id, self._last_id)
+
+    def sync(self, force: bool = False) -> None:
+        """Add revocations made since the last sync to the filter."""
+        if not force and time.monotonic() - self._synced < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=force):
+            return  # another thread is syncing
+        try:
+            with self.session_factory() as db:
+                rows = db.execute(
+                    select(RevokedToken.id, RevokedToken.jti).where(RevokedToken.id > self._last_id)
+                    .order_by(RevokedToken.id)
+                ).all()
+                for row_id, jti in rows:
+                    self._filter.add(jti)
+                    self._last_id = row_id
+                if self._filter.count > self._filter.capacity:
+                    self._rebuild(db)
+            self._synced = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def start(self) -> None:
+        """Load the filter now and keep it in sync from a background thread."""
+        if self._thread is not None:
+            return
+        self.sync(force=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sync_loop, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def _sync_loop(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync(force=True)
+            except Exception:
+                logger.exception("Could not sync revoked tokens")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def revoke(self, jti: str, expires_at: int) -> None:
+        """Revoke a token id until its expiry, effective on this worker at once."""
+        with self.session_factory() as db:
+            db.execute(insert(RevokedToken).values(jti=jti, expires_at=int(expires_at))
+                       .on_conflict_do_nothing(index_elements=["jti"]))
+            db.commit()
+        self._filter.add(jti)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if jti is None:
+            return False
+        if self._thread is None:
+            self.sync()
+        if jti not in self._filter:
+            TOKEN_REVOCATION_CHECKS.labels("bloom_miss").inc()
+            return False
+        with self.session_factory() as db:
+            revoked = db.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)) is not None
+        TOKEN_REVOCATION_CHECKS.labels("revoked" if revoked else "false_positive").inc()
+        return revoked
+
+
+revocations = RevocationList(SessionLocal, int(os.environ.get("APP_REVOCATION_CAPACITY", DEFAULT_CAPACITY)))
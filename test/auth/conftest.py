@@ -3,7 +3,7 @@ import os
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from db.database import Base, get_db
+from db.database import get_db
 from main import app
 from dao import UserDAO
 
@@ -26,29 +26,30 @@ def override_get_db():
         db.close()
 
 
-@pytest.fixture(scope="function")
-def client():
+@pytest.fixture(scope="session")
+def database_engine():
+    # clean_database from the root conftest resets this package's database
+    return engine
+
 
-    Base.metadata.create_all(bind=engine)
+@pytest.fixture(scope="function")
+def client(clean_database):
 
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
 
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(scope="function")
-def db_session():
-    Base.metadata.create_all(bind=engine)
+def db_session(clean_database):
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture
@@ -0,0 +1,65 @@
+"""
+Integration tests for bulk user provisioning via POST /users:bulk
+"""
+import pytest
+from dao import UserDAO
+
+
+def _user(name, **overrides):
+    return {"username": name, "email": f"{name}@test.com", "password": f"{name}-pw", "roles": ["ROLE_USER"],
+            **overrides}
+
+
+class TestBulkUsers:
+
+    def test_creates_every_user_in_the_batch(self, client, admin_headers, db_session):
+        # Given: A batch of new users
+        batch = [_user(f"tenant{i}") for i in range(10)]
+
+        # When: Provisioning them
+        response = client.post("/users:bulk", json={"users": batch}, headers=admin_headers)
+
+        # Then: All are created, with ids, and can log in
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 10 and data["failed"] == 0
+        assert all(result["status"] == "created" and result["id"] for result in data["results"])
+        login = client.post("/login", json={"username": "tenant7", "password": "tenant7-pw"})
+        assert login.status_code == 200
+
+    def test_conflicts_are_reported_per_user(self, client, admin_headers, regular_user):
+        # Given: A batch with an existing username, an existing email and an in-batch duplicate
+        batch = [
+            _user("fresh"),
+            _user("user"),
+            _user("other", email="user@test.com"),
+            _user("fresh", email="fresh2@test.com"),
+        ]
+
+        # When: Provisioning it
+        data = client.post("/users:bulk", json={"users": batch}, headers=admin_headers).json()
+
+        # Then: Only the first new user is created and the others say why not
+        assert data["created"] == 1 and data["failed"] == 3
+        assert [(r["status"], r["detail"]) for r in data["results"]] == [
+            ("created", None),
+            ("error", "Username already exists"),
+            ("error", "Email already exists"),
+            ("error", "Username already exists"),
+        ]
+
+    def test_uniqueness_is_checked_with_one_query(self, client, admin_headers, monkeypatch):
+        # Given: Per-user lookups made impossible
+        monkeypatch.setattr(UserDAO, "get_by_username", lambda *a: pytest.fail("per-user lookup"))
+        monkeypatch.setattr(UserDAO, "get_by_email", lambda *a: pytest.fail("per-user lookup"))
+
+        # When / Then: A batch still goes through
+        response = client.post("/users:bulk", json={"users": [_user("a"), _user("b")]}, headers=admin_headers)
+        assert response.json()["created"] == 2
+
+    def test_requires_admin(self, client, auth_headers):
+        response = client.post("/users:bulk", json={"users": [_user("x")]}, headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_empty_batch_is_rejected(self, client, admin_headers):
+        assert client.post("/users:bulk", json={"users": []}, headers=admin_headers).status_code == 422
@@ -0,0 +1,76 @@
+"""
+Tests for the username -> credentials cache on the login path
+"""
+import pytest
+from sqlalchemy import update
+from dao import UserDAO
+from dao import user_dao
+from model.user import User
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_dao.credentials.clear()
+    yield
+    user_dao.credentials.clear()
+
+
+def _login(client, password="user123"):
+    return client.post("/login", json={"username": "user", "password": password})
+
+
+class TestCredentialCache:
+
+    def test_repeated_login_skips_the_user_query(self, client, regular_user, monkeypatch):
+        # Given: A user who logged in once
+        assert _login(client).status_code == 200
+
+        # When: Logging in again with the database lookup made impossible
+        monkeypatch.setattr(UserDAO, "get_by_username", lambda *a: pytest.fail("queried again"))
+
+        # Then: The cached credentials are used
+        assert _login(client).status_code == 200
+        assert _login(client, "wrong").status_code == 401
+
+    def test_password_change_invalidates_cached_credentials(self, client, regular_user, db_session):
+        # Given: Cached credentials
+        _login(client)
+
+        # When: The password changes
+        UserDAO.update_password(db_session, regular_user.id, "new-password")
+
+        # Then: Only the new password works
+        assert _login(client).status_code == 401
+        assert _login(client, "new-password").status_code == 200
+
+    def test_deleted_user_cannot_log_in_from_cache(self, client, regular_user, db_session):
+        # Given: Cached credentials
+        _login(client)
+
+        # When: The user is deleted
+        UserDAO.delete_user(db_session, regular_user.id)
+
+        # Then: Login fails
+        assert _login(client).status_code == 401
+
+    def test_change_on_another_worker_invalidates_by_version(self, client, regular_user, db_session):
+        # Given: Cached credentials, then a role change written directly (as another worker would)
+        _login(client)
+        db_session.execute(update(User).where(User.id == regular_user.id)
+                           .values(roles=["ROLE_USER", "ROLE_ADMIN"]))
+        db_session.commit()
+
+        # When: That worker bumps the shared version stamp
+        user_dao.users_version.bump()
+        token = _login(client).json()["access_token"]
+
+        # Then: The new token carries the new roles
+        roles = client.get("/user_jwt", headers={"Authorization": f"Bearer {token}"}).json()["roles"]
+        assert "ROLE_ADMIN" in roles
+
+    def test_unknown_usernames_are_not_cached(self, client, regular_user):
+        # When: Logging in as someone who does not exist
+        client.post("/login", json={"username": "ghost", "password": "x"})
+
+        # Then: Nothing is cached for them
+        assert user_dao.credentials.get("ghost") is None
@@ -0,0 +1,128 @@
+"""
+Tests for asymmetric token signing, key rotation and the JWKS endpoint
+"""
+import time
+import jwt
+import pytest
+from fastapi import HTTPException
+from security import jwt_handler, keys
+from security.jwt_handler import create_access_token, verify_token
+from security.keys import KeyRing
+
+
+@pytest.fixture
+def ring(tmp_path, monkeypatch):
+    """A fresh key ring used by the app for the duration of a test"""
+    ring = KeyRing(str(tmp_path / "keys"))
+    monkeypatch.setattr(keys, "keyring", ring)
+    monkeypatch.setattr(jwt_handler, "keyring", ring)
+    jwt_handler.verified_tokens.clear()
+    yield ring
+    jwt_handler.verified_tokens.clear()
+
+
+class TestSigning:
+
+    def test_first_token_creates_an_eddsa_key(self, ring):
+        # Given: An empty key directory
+        # When: Issuing a token
+        token = create_access_token("alice", ["ROLE_USER"])
+
+        # Then: It is signed with a new EdDSA key named by its kid
+        header = jwt.get_unverified_header(token)
+        assert header["alg"] == "EdDSA"
+        assert header["kid"] == ring.signing_key().kid
+        assert verify_token(f"Bearer {token}")["sub"] == "alice"
+
+    def test_es256_keys_sign_and_verify(self, ring):
+        # Given: An ES256 signing key
+        ring.rotate("ES256")
+
+        # When: Issuing and verifying a token
+        token = create_access_token("bob", [])
+
+        # Then: It uses ES256 and verifies
+        assert jwt.get_unverified_header(token)["alg"] == "ES256"
+        assert verify_token(f"Bearer {token}")["sub"] == "bob"
+
+    def test_hs256_token_is_rejected(self, ring):
+        # Given: A token signed with the old shared secret
+        token = jwt.encode({"sub": "eve", "exp": time.time() + 60}, "super_secret_key" * 2, algorithm="HS256")
+
+        # When / Then: It is rejected
+        with pytest.raises(HTTPException) as exc:
+            verify_token(f"Bearer {token}")
+        assert exc.value.status_code == 401
+
+
+class TestRotation:
+
+    def test_old_tokens_verify_after_rotation(self, ring):
+        # Given: A token signed before a rotation
+        old = create_access_token("alice", [])
+        old_kid = ring.signing_key().kid
+
+        # When: Rotating the signing key
+        new_key = ring.rotate()
+
+        # Then: New tokens use the new key and the old token still verifies
+        assert jwt.get_unverified_header(create_access_token("alice", []))["kid"] == new_key.kid != old_kid
+        assert verify_token(f"Bearer {old}")["sub"] == "alice"
+
+    def test_tokens_of_pruned_keys_are_rejected_even_if_cached(self, ring):
+        # Given: A verified (cached) token whose key is rotated out and pruned
+        old = create_access_token("alice", [])
+        verify_token(f"Bearer {old}")
+        ring.rotate()
+        ring.prune(keep=1)
+
+        # When / Then: The token no longer verifies
+        with pytest.raises(HTTPException):
+            verify_token(f"Bearer {old}")
+
+    def test_other_process_rotation_is_picked_up_by_kid(self, ring, monkeypatch):
+        # Given: Another node rotating the shared key directory after this one loaded it
+        monkeypatch.setattr(keys, "FORCED_RELOAD_INTERVAL", 0.0)
+        ring.signing_key()
+        other = KeyRing(ring.key_dir)
+        other.rotate()
+
+        # When: A token signed by the new key arrives
+        key = other.signing_key()
+        token = jwt.encode({"sub": "carol", "exp": time.time() + 60}, key.private_key,
+                           algorithm=key.algorithm, headers={"kid": key.kid})
+
+        # Then: This process reloads the keys and accepts it
+        assert verify_token(f"Bearer {token}")["sub"] == "carol"
+
+
+class TestJwksEndpoint:
+
+    def test_jwks_lists_every_verifying_key(self, client, ring):
+        # Given: An EdDSA key rotated to an ES256 key
+        first = ring.rotate("EdDSA")
+        second = ring.rotate("ES256")
+
+        # When: Fetching the key set
+        response = client.get("/.well-known/jwks.json")
+
+        # Then: Both public keys are listed, newest first, without private parts
+        assert response.status_code == 200
+        keys = response.json()["keys"]
+        assert [k["kid"] for k in keys] == [second.kid, first.kid]
+        assert keys[0]["kty"] == "EC" and keys[0]["crv"] == "P-256" and keys[0]["alg"] == "ES256"
+        assert keys[1]["kty"] == "OKP" and keys[1]["crv"] == "Ed25519" and keys[1]["alg"] == "EdDSA"
+        assert all("d" not in k for k in keys)
+
+    def test_token_verifies_with_published_key(self, client, ring):
+        # Given: A token and the published key set
+        token = create_access_token("dave", [])
+        keys = client.get("/.well-known/jwks.json").json()["keys"]
+
+        # When: A downstream service verifies the token with the JWK for its kid
+        kid = jwt.get_unverified_header(token)["kid"]
+        public = jwt.PyJWK(next(k for k in keys if k["kid"] == kid))
+        claims = jwt.decode(token, public.key, algorithms=[public.algorithm_name])
+
+        # Then: The claims are intact
+        assert claims["sub"] == "dave"
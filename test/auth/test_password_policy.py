@@ -0,0 +1,138 @@
+"""
+Tests for the password hashing policy, calibration and rehash on login
+"""
+import pytest
+from security import password_policy, passwords
+from security.password_policy import PasswordPolicy, calibrate, verify
+from dao import UserDAO
+
+
+class TestPasswordPolicy:
+
+    def test_bcrypt_hash_uses_policy_rounds(self):
+        # Given: A policy with 5 bcrypt rounds
+        policy = PasswordPolicy(bcrypt_rounds=5)
+
+        # When: Hashing a password
+        hashed = policy.hash(b"pw")
+
+        # Then: The cost is embedded and the hash verifies
+        assert hashed.startswith("$2b$05$")
+        assert verify(b"pw", hashed) and not verify(b"other", hashed)
+
+    def test_needs_rehash_when_cost_or_scheme_changes(self):
+        # Given: A hash made under a 4-round bcrypt policy
+        hashed = PasswordPolicy(bcrypt_rounds=4).hash(b"pw")
+
+        # When / Then: Only a policy with the same scheme and cost accepts it as current
+        assert not PasswordPolicy(bcrypt_rounds=4).needs_rehash(hashed)
+        assert PasswordPolicy(bcrypt_rounds=5).needs_rehash(hashed)
+        assert PasswordPolicy(scheme="argon2id").needs_rehash(hashed)
+
+    def test_argon2id_round_trip(self):
+        # Given: An argon2id policy
+        pytest.importorskip("argon2")
+        policy = PasswordPolicy(scheme="argon2id", argon2_time_cost=1, argon2_memory_kib=8192)
+
+        # When: Hashing a password
+        hashed = policy.hash(b"pw")
+
+        # Then: It is an argon2id hash that verifies and is current only for the same parameters
+        assert hashed.startswith("$argon2id$")
+        assert verify(b"pw", hashed) and not verify(b"other", hashed)
+        assert not policy.needs_rehash(hashed)
+        assert PasswordPolicy(scheme="argon2id", argon2_time_cost=2, argon2_memory_kib=8192).needs_rehash(hashed)
+
+    def test_unknown_scheme_is_rejected(self):
+        with pytest.raises(ValueError):
+            PasswordPolicy(scheme="md5")
+
+
+class TestCalibration:
+
+    def test_bcrypt_cost_fits_target(self, monkeypatch):
+        # Given: A machine where 8 bcrypt rounds take 10 ms
+        monkeypatch.setattr(password_policy, "measure", lambda policy, repeat=3: 0.010)
+
+        # When: Calibrating to 250 ms
+        policy = calibrate(250, "bcrypt")
+
+        # Then: The highest cost within budget is chosen (12 rounds = 160 ms, 13 = 320 ms)
+        assert policy.bcrypt_rounds == 12
+
+    def test_bcrypt_cost_never_drops_below_floor(self, monkeypatch):
+        # Given: A very slow machine
+        monkeypatch.setattr(password_policy, "measure", lambda policy, repeat=3: 1.0)
+
+        # When / Then: Calibration keeps the minimum cost
+        assert calibrate(50, "bcrypt").bcrypt_rounds == password_policy.MIN_BCRYPT_ROUNDS
+
+    def test_argon2_passes_fit_target(self, monkeypatch):
+        # Given: One argon2id pass taking 40 ms
+        monkeypatch.setattr(password_policy, "measure", lambda policy, repeat=3: 0.040)
+
+        # When / Then: A 250 ms target allows 6 passes
+        assert calibrate(250, "argon2id").argon2_time_cost == 6
+
+    def test_calibrated_policy_is_saved_for_workers(self, monkeypatch, tmp_path):
+        # Given: A machine where 8 bcrypt rounds take 10 ms
+        monkeypatch.setattr(password_policy, "measure", lambda policy, repeat=3: 0.010)
+        path = str(tmp_path / "policy.json")
+
+        # When: Calibrating once with --output
+        assert password_policy.main(["calibrate", "--target-ms", "250", "--output", path]) == 0
+
+        # Then: Every worker pointed at the file loads the same policy, whatever its cost settings
+        monkeypatch.setenv("APP_PASSWORD_POLICY_FILE", path)
+        monkeypatch.setenv("APP_BCRYPT_ROUNDS", "4")
+        assert PasswordPolicy.from_env() == PasswordPolicy(bcrypt_rounds=12)
+
+    def test_missing_policy_file_fails_instead_of_falling_back(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("APP_PASSWORD_POLICY_FILE", str(tmp_path / "absent.json"))
+        monkeypatch.setenv("APP_BCRYPT_ROUNDS", "5")
+        with pytest.raises(RuntimeError, match="absent.json"):
+            PasswordPolicy.from_env()
+
+    def test_unreadable_policy_file_fails(self, monkeypatch, tmp_path):
+        path = tmp_path / "policy.json"
+        path.write_text("{not json")
+        monkeypatch.setenv("APP_PASSWORD_POLICY_FILE", str(path))
+        with pytest.raises(RuntimeError):
+            PasswordPolicy.from_env()
+
+    def test_first_calibration_writes_the_configured_file(self, monkeypatch, tmp_path):
+        # Given: Workers configured with a policy file that does not exist yet
+        monkeypatch.setattr(password_policy, "measure", lambda policy, repeat=3: 0.010)
+        path = str(tmp_path / "policy.json")
+        monkeypatch.setenv("APP_PASSWORD_POLICY_FILE", path)
+
+        # When / Then: Calibrating creates it, and workers can then start
+        assert password_policy.main(["calibrate", "--target-ms", "250", "--output", path]) == 0
+        assert PasswordPolicy.from_env() == PasswordPolicy(bcrypt_rounds=12)
+
+
+class TestRehashOnLogin:
+
+    def test_login_upgrades_hash_to_current_policy(self, client, regular_user, db_session, monkeypatch):
+        # Given: The policy changed to a higher cost after the user was created
+        monkeypatch.setattr(passwords, "policy", PasswordPolicy(bcrypt_rounds=5))
+        assert UserDAO.password_needs_rehash(regular_user)
+
+        # When: The user logs in
+        response = client.post("/login", json={"username": "user", "password": "user123"})
+
+        # Then: The stored hash now follows the policy and still verifies
+        assert response.status_code == 200
+        stored = UserDAO.get_by_username(db_session, "user")
+        assert stored.hashed_password.startswith("$2b$05$")
+        assert UserDAO.verify_password(stored, "user123")
+
+    def test_failed_login_does_not_rehash(self, client, regular_user, db_session, monkeypatch):
+        # Given: A changed policy
+        monkeypatch.setattr(passwords, "policy", PasswordPolicy(bcrypt_rounds=5))
+
+        # When: Logging in with a wrong password
+        client.post("/login", json={"username": "user", "password": "wrong"})
+
+        # Then: The stored hash is untouched
+        assert UserDAO.get_by_username(db_session, "user").hashed_password == regular_user.hashed_password
@@ -0,0 +1,98 @@
+"""
+Tests for password hashing on the bounded process pool
+"""
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from security import passwords
+from security.passwords import HashPool, HashPoolBusy, check_password, hash_password
+from monitoring.metrics import REGISTRY
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    """One worker process and room for two pending operations"""
+    pool = HashPool(workers=1, queue=2)
+    monkeypatch.setattr(passwords, "pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+class TestHashPool:
+
+    def test_hash_and_check_run_on_the_pool(self, small_pool):
+        # Given: A password hashed in a worker process
+        hashed = hash_password("s3cret")
+
+        # When / Then: Only the right password matches
+        assert hashed.startswith("$2b$")
+        assert check_password("s3cret", hashed)
+        assert not check_password("wrong", hashed)
+        assert small_pool.in_flight == 0
+
+    def test_full_queue_is_rejected_without_waiting(self, small_pool):
+        # Given: Every slot of the queue taken
+        small_pool.in_flight = small_pool.limit
+
+        # When / Then: New work is refused immediately
+        with pytest.raises(HashPoolBusy):
+            hash_password("s3cret")
+        assert small_pool.in_flight == small_pool.limit
+
+    def test_queue_depth_is_exported(self, small_pool):
+        # Given: Three operations pending on a one-worker pool
+        small_pool.in_flight = 3
+
+        # When: Scraping metrics
+        text = REGISTRY.exposition()
+
+        # Then: One is running and two are queued
+        assert 'password_hash_queue{state="running"} 1' in text
+        assert 'password_hash_queue{state="queued"} 2' in text
+
+    def test_zero_workers_hash_inline(self):
+        # Given: A pool configured without worker processes
+        pool = HashPool(workers=0, queue=0)
+
+        # When / Then: Work runs in the caller
+        hashed = pool.run("hash", passwords._hash, b"pw", passwords.PasswordPolicy(bcrypt_rounds=4))
+        assert pool.run("verify", passwords._check, b"pw", hashed)
+
+    def test_many_passwords_hash_in_order(self, small_pool):
+        # Given: Several passwords, more than the pool has workers
+        secrets = [f"pw{i}" for i in range(5)]
+
+        # When: Hashing them as a batch
+        hashed = passwords.hash_passwords(secrets)
+
+        # Then: Each hash matches its own password and the queue is empty again
+        assert all(check_password(secret, h) for secret, h in zip(secrets, hashed))
+        assert small_pool.in_flight == 0
+
+
+class TestLoginAdmission:
+
+    def test_login_returns_503_when_hashing_queue_is_full(self, client, regular_user, monkeypatch):
+        # Given: A saturated hashing queue
+        monkeypatch.setattr(passwords.pool, "in_flight", passwords.pool.limit)
+
+        # When: Logging in
+        response = client.post("/login", json={"username": "user", "password": "user123"})
+
+        # Then: The login is shed with a retry hint
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(passwords.RETRY_AFTER_SECONDS)
+
+
+class TestShutdown:
+
+    def test_app_shutdown_stops_the_worker_processes(self, small_pool):
+        # Given: An app whose hashing pool has started its processes
+        with TestClient(app):
+            hash_password("s3cret")
+            processes = list(small_pool._executor._processes.values())
+            assert processes
+
+        # Then: Shutting the app down stops them
+        assert small_pool._executor is None
+        assert not any(process.is_alive() for process in processes)
@@ -0,0 +1,220 @@
+"""
+Tests for the shared token-bucket rate limiter
+"""
+import ipaddress
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from security import rate_limit
+from security.jwt_handler import create_access_token, decode_token
+from security.rate_limit import RateLimitMiddleware, RouteCost, SharedBuckets, bucket_key, client_ip
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def buckets(tmp_path, clock):
+    buckets = SharedBuckets(str(tmp_path / "buckets.mmap"), rate=1.0, burst=5.0, sets=4, clock=clock)
+    yield buckets
+    buckets.close()
+
+
+class TestSharedBuckets:
+
+    def test_burst_then_refill(self, buckets, clock):
+        # Given: A full bucket of 5 tokens refilling at 1 per second
+        key = bucket_key("ip:10.0.0.1")
+
+        # When: Taking 5 tokens, then one more
+        granted = [buckets.take(key, 1) for _ in range(5)]
+        refused = buckets.take(key, 1)
+
+        # Then: The burst is granted and the next request must wait a second
+        assert granted == [0.0] * 5
+        assert refused == pytest.approx(1.0)
+        clock.now += 1.0
+        assert buckets.take(key, 1) == 0.0
+
+    def test_buckets_are_shared_through_the_file(self, buckets, tmp_path, clock):
+        # Given: A second worker mapping the same file
+        other = SharedBuckets(buckets.path, rate=1.0, burst=5.0, sets=4, clock=clock)
+        key = bucket_key("sub:alice")
+
+        # When: Each worker takes part of the burst
+        buckets.take(key, 3)
+        other.take(key, 2)
+
+        # Then: Both see the bucket as empty
+        assert buckets.take(key, 1) > 0
+        assert other.take(key, 1) > 0
+        other.close()
+
+    def test_clients_have_separate_buckets(self, buckets):
+        # Given: One client that used up its bucket
+        buckets.take(bucket_key("ip:10.0.0.1"), 5)
+
+        # When / Then: Another client is unaffected
+        assert buckets.take(bucket_key("ip:10.0.0.2"), 5) == 0.0
+
+    def test_full_set_reuses_longest_idle_slot(self, tmp_path, clock):
+        # Given: A single set whose 8 slots are taken, the first one longest ago
+        buckets = SharedBuckets(str(tmp_path / "one-set.mmap"), rate=1.0, burst=5.0, sets=1, clock=clock)
+        for i in range(8):
+            buckets.take(bucket_key(f"ip:{i}"), 5)
+            clock.now += 1.0
+
+        # When: A ninth client arrives
+        granted = buckets.take(bucket_key("ip:new"), 5)
+
+        # Then: It gets a fresh bucket, and the evicted client starts again at full burst
+        assert granted == 0.0
+        assert buckets.take(bucket_key("ip:0"), 5) == 0.0
+        buckets.close()
+
+    def test_cost_above_burst_drains_the_bucket(self, buckets):
+        # Given / When: A request costing more than the burst
+        key = bucket_key("ip:10.0.0.3")
+
+        # Then: It is granted once from a full bucket
+        assert buckets.take(key, 1000) == 0.0
+        assert buckets.take(key, 1) > 0
+
+
+class TestRouteCost:
+
+    def test_limit_parameter_scales_the_cost(self):
+        cost = RouteCost(1, per_items=1000, default_items=1000)
+        assert cost.charge(b"") == 2
+        assert cost.charge(b"limit=1000000") == 1001
+        assert cost.charge(b"limit=oops") == 2
+
+
+class TestRateLimitMiddleware:
+
+    @pytest.fixture
+    def app_client(self, buckets):
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, buckets=buckets, decode=decode_token,
+                           costs={("POST", "/login"): RouteCost(5)})
+
+        @app.get("/ping")
+        def ping():
+            return {"ok": True}
+
+        @app.post("/login")
+        def login():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_exhausted_client_gets_429_with_retry_after(self, app_client):
+        # Given: A client that spent its burst
+        assert app_client.post("/login").status_code == 200
+
+        # When: It sends another request
+        response = app_client.get("/ping")
+
+        # Then: It is refused with a retry hint
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+
+    def test_bearer_subject_has_its_own_bucket(self, app_client):
+        # Given: The anonymous client from this IP spent its burst
+        app_client.post("/login")
+
+        # When: The same IP calls with a valid token
+        headers = {"Authorization": f"Bearer {create_access_token('alice', [])}"}
+        response = app_client.get("/ping", headers=headers)
+
+        # Then: The user's bucket is used instead of the IP's
+        assert response.status_code == 200
+
+    def test_invalid_token_falls_back_to_ip(self, app_client):
+        # Given: The anonymous client from this IP spent its burst
+        app_client.post("/login")
+
+        # When / Then: A forged token does not buy a fresh bucket
+        assert app_client.get("/ping", headers={"Authorization": "Bearer forged"}).status_code == 429
+
+
+def _scope(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return {"type": "http", "client": (peer, 40000), "headers": headers}
+
+
+class TestClientIp:
+
+    proxies = (ipaddress.ip_network("10.0.0.0/8"),)
+
+    def test_direct_clients_cannot_spoof_forwarded_for(self):
+        # When / Then: A header from an untrusted peer is ignored
+        assert client_ip(_scope("203.0.113.7", "198.51.100.1"), self.proxies) == "203.0.113.7"
+
+    def test_trusted_proxy_reports_the_client(self):
+        # Given: A client behind two trusted proxies that sent its own forged entry
+        scope = _scope("10.0.0.2", "1.2.3.4, 203.0.113.7, 10.0.0.1")
+
+        # When / Then: The rightmost untrusted address is the client
+        assert client_ip(scope, self.proxies) == "203.0.113.7"
+
+    def test_proxy_without_header_counts_as_the_client(self):
+        assert client_ip(_scope("10.0.0.2"), self.proxies) == "10.0.0.2"
+
+    def test_no_trusted_proxies_uses_the_peer(self):
+        assert client_ip(_scope("10.0.0.2", "203.0.113.7")) == "10.0.0.2"
+
+
+class TestConfiguration:
+
+    def test_limiter_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("APP_RATE_LIMIT", raising=False)
+        assert rate_limit.buckets_from_env() is None
+
+    def test_default_file_lives_in_a_private_directory(self, monkeypatch, tmp_path):
+        # Given: The limiter enabled without an explicit file
+        monkeypatch.setenv("APP_RATE_LIMIT", "1")
+        monkeypatch.delenv("APP_RATE_LIMIT_FILE", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+        # When: Opening the shared buckets
+        buckets = rate_limit.buckets_from_env()
+        buckets.close()
+
+        # Then: They are in a directory only this user can enter
+        directory = os.path.dirname(buckets.path)
+        assert os.path.dirname(directory) == str(tmp_path)
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+
+    def test_shared_private_directory_is_refused(self, monkeypatch, tmp_path):
+        # Given: A pre-created runtime directory other users can write to
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        directory = tmp_path / f"movielens-api-{os.getuid()}"
+        directory.mkdir()
+        directory.chmod(0o777)
+
+        # When / Then: It is not used
+        with pytest.raises(RuntimeError):
+            rate_limit.private_dir()
+
+    def test_bucket_file_is_never_opened_through_a_symlink(self, tmp_path):
+        # Given: The bucket path planted as a symlink to another file
+        target = tmp_path / "victim"
+        target.write_bytes(b"")
+        (tmp_path / "buckets.mmap").symlink_to(target)
+
+        # When / Then: Opening it fails instead of writing through the link
+        with pytest.raises(OSError):
+            SharedBuckets(str(tmp_path / "buckets.mmap"), rate=1.0, burst=5.0, sets=4)
+        assert target.read_bytes() == b""
@@ -0,0 +1,115 @@
+"""
+Integration tests for refresh tokens: /login, /token/refresh and /token/revoke
+"""
+import pytest
+from sqlalchemy import select
+import main
+from dao import UserDAO, refresh_token_dao
+from model.refresh_token import RefreshToken
+
+
+def _login(client):
+    response = client.post("/login", json={"username": "user", "password": "user123"})
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestRefreshTokens:
+
+    def test_login_returns_a_refresh_token(self, client, regular_user):
+        # Given: A regular user
+
+        # When: Logging in
+        data = _login(client)
+
+        # Then: An access token, its lifetime and a refresh token are returned
+        assert data["token_type"] == "bearer"
+        assert data["expires_in"] == 3600
+        assert len(data["refresh_token"]) >= 40
+
+    def test_refresh_issues_new_tokens_without_password_check(self, client, regular_user, monkeypatch):
+        # Given: A logged-in user, with password checks made impossible
+        refresh = _login(client)["refresh_token"]
+        monkeypatch.setattr("dao.user_dao.check_password", lambda *a: pytest.fail("bcrypt ran"))
+
+        # When: Exchanging the refresh token
+        response = client.post("/token/refresh", json={"refresh_token": refresh})
+
+        # Then: A working access token and a different refresh token come back
+        assert response.status_code == 200
+        data = response.json()
+        assert data["refresh_token"] != refresh
+        me = client.get("/user_jwt", headers={"Authorization": f"Bearer {data['access_token']}"})
+        assert me.json()["username"] == "user"
+
+    def test_refresh_tokens_are_stored_hashed(self, client, regular_user, db_session):
+        # Given: A refresh token from a login
+        refresh = _login(client)["refresh_token"]
+
+        # When: Reading the stored rows
+        rows = db_session.scalars(select(RefreshToken)).all()
+
+        # Then: Only the hash is stored
+        assert [row.token_hash for row in rows] == [refresh_token_dao.hash_refresh_token(refresh)]
+
+    def test_reused_refresh_token_revokes_the_family(self, client, regular_user):
+        # Given: A refresh token that was already rotated
+        old = _login(client)["refresh_token"]
+        new = client.post("/token/refresh", json={"refresh_token": old}).json()["refresh_token"]
+
+        # When: The old token is presented again
+        replay = client.post("/token/refresh", json={"refresh_token": old})
+
+        # Then: It is rejected and the token issued from it stops working too
+        assert replay.status_code == 401
+        assert client.post("/token/refresh", json={"refresh_token": new}).status_code == 401
+
+    def test_revoked_refresh_token_is_rejected(self, client, regular_user):
+        # Given: A refresh token that was revoked
+        refresh = _login(client)["refresh_token"]
+        assert client.post("/token/revoke", json={"refresh_token": refresh}).status_code == 204
+
+        # When / Then: It can no longer be exchanged
+        assert client.post("/token/refresh", json={"refresh_token": refresh}).status_code == 401
+
+    def test_unknown_refresh_token_is_rejected(self, client, regular_user):
+        # When: Exchanging a token that was never issued
+        response = client.post("/token/refresh", json={"refresh_token": "not-a-token"})
+
+        # Then: It is rejected
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid refresh token"
+
+    def test_expired_refresh_token_is_rejected(self, client, regular_user, monkeypatch):
+        # Given: Refresh tokens that expire immediately
+        monkeypatch.setattr(refresh_token_dao, "REFRESH_TOKEN_TTL", 0)
+        refresh = _login(client)["refresh_token"]
+
+        # When / Then: The token cannot be exchanged
+        assert client.post("/token/refresh", json={"refresh_token": refresh}).status_code == 401
+
+    def test_expired_refresh_tokens_are_purged(self, client, regular_user, db_session, monkeypatch):
+        # Given: One expired and one live refresh token
+        monkeypatch.setattr(refresh_token_dao, "REFRESH_TOKEN_TTL", 0)
+        _login(client)
+        monkeypatch.setattr(refresh_token_dao, "REFRESH_TOKEN_TTL", 3600)
+        _login(client)
+
+        # When: The periodic purge runs against this database
+        monkeypatch.setattr(main, "SessionLocal", lambda: db_session)
+        main.purge_expired_refresh_tokens()
+
+        # Then: Only the live token is left
+        remaining = db_session.scalars(select(RefreshToken)).all()
+        assert len(remaining) == 1
+
+    def test_deleting_a_user_removes_their_refresh_tokens(self, client, regular_user, db_session):
+        # Given: A user with a refresh token
+        refresh = _login(client)["refresh_token"]
+
+        # When: The user is deleted
+        assert UserDAO.delete_user(db_session, regular_user.id)
+
+        # Then: The token is gone with them and cannot be exchanged
+        assert db_session.scalars(select(RefreshToken)).all() == []
+        assert client.post("/token/refresh", json={"refresh_token": refresh}).status_code == 401
@@ -0,0 +1,169 @@
+"""
+Tests for access token revocation and its Bloom filter
+"""
+import os
+import time
+import jwt
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db.database import Base, BASE_DIR, DB_PATH
+from security import revocation
+from security.revocation import BloomFilter, RevocationList
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'revocations.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestBloomFilter:
+
+    def test_added_items_are_always_found(self):
+        # Given: A filter holding 1000 items
+        bloom = BloomFilter(1000)
+        items = [f"jti-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        # When / Then: Every one of them is reported
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate_is_near_target(self):
+        # Given: A filter at capacity
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        # When: Probing items that were never added
+        hits = sum(f"other-{i}" in bloom for i in range(10_000))
+
+        # Then: About 1% are false positives
+        assert hits < 300
+
+
+class TestRevocationList:
+
+    def test_revoked_jti_is_reported(self, session_factory):
+        # Given: A revoked jti
+        revocations = RevocationList(session_factory, capacity=100)
+        revocations.revoke("abc", int(time.time()) + 60)
+
+        # When / Then: Only that jti is revoked
+        assert revocations.is_revoked("abc")
+        assert not revocations.is_revoked("other")
+        assert not revocations.is_revoked(None)
+
+    def test_other_worker_sees_revocation_after_sync(self, session_factory):
+        # Given: Two workers sharing the database, the second already synced
+        first = RevocationList(session_factory, capacity=100)
+        second = RevocationList(session_factory, capacity=100, sync_interval=0.0)
+        assert not second.is_revoked("abc")
+
+        # When: The first worker revokes a jti
+        first.revoke("abc", int(time.time()) + 60)
+
+        # Then: The second picks it up on its next sync
+        assert second.is_revoked("abc")
+
+    def test_background_sync_picks_up_other_workers(self, session_factory):
+        # Given: A worker syncing in the background
+        first = RevocationList(session_factory, capacity=100)
+        second = RevocationList(session_factory, capacity=100, sync_interval=0.01)
+        second.start()
+        try:
+            # When: Another worker revokes a jti
+            first.revoke("abc", int(time.time()) + 60)
+
+            # Then: The background thread adds it to the filter
+            deadline = time.monotonic() + 2
+            while "abc" not in second._filter:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            assert second.is_revoked("abc")
+        finally:
+            second.stop()
+
+    def test_false_positive_is_confirmed_against_the_database(self, session_factory, monkeypatch):
+        # Given: A filter that reports every jti
+        revocations = RevocationList(session_factory, capacity=100)
+        monkeypatch.setattr(BloomFilter, "__contains__", lambda self, item: True)
+
+        # When / Then: A jti that was never revoked is still accepted
+        assert not revocations.is_revoked("never-revoked")
+
+    def test_overflow_purges_expired_rows_and_grows(self, session_factory):
+        # Given: A small list holding expired and live revocations
+        revocations = RevocationList(session_factory, capacity=4, sync_interval=0.0)
+        for i in range(3):
+            revocations.revoke(f"expired-{i}", int(time.time()) - 1)
+        for i in range(3):
+            revocations.revoke(f"live-{i}", int(time.time()) + 60)
+
+        # When: The next check syncs past capacity
+        revocations.sync(force=True)
+
+        # Then: Expired rows are gone and live ones are still revoked
+        with session_factory() as db:
+            remaining = {row.jti for row in db.query(revocation.RevokedToken)}
+        assert remaining == {"live-0", "live-1", "live-2"}
+        assert revocations.capacity >= 6
+        assert all(revocations.is_revoked(f"live-{i}") for i in range(3))
+
+    def test_revocation_after_purge_reaches_other_workers(self, session_factory):
+        # Given: A worker that synced past expired rows and then purged them all
+        first = RevocationList(session_factory, capacity=2, sync_interval=0.0)
+        second = RevocationList(session_factory, capacity=2, sync_interval=0.0)
+        for i in range(3):
+            first.revoke(f"expired-{i}", int(time.time()) - 1)
+        second.sync(force=True)
+        with session_factory() as db:
+            assert db.query(revocation.RevokedToken).count() == 0
+
+        # When: Another worker revokes a token into the emptied table
+        first.revoke("victim", int(time.time()) + 60)
+
+        # Then: Its id is new, so the synced worker still picks it up
+        assert second.is_revoked("victim")
+
+
+class TestRevocationEndpoints:
+
+    def test_revocations_are_not_written_to_the_working_tree(self):
+        # The app-wide store bypasses get_db, so the test run points it at a temporary database
+        assert revocation.revocations.session_factory.kw["bind"].url.database == DB_PATH
+        assert os.path.dirname(DB_PATH) != BASE_DIR
+
+    def test_logout_revokes_the_access_token(self, client, regular_user):
+        # Given: A logged-in user
+        token = client.post("/login", json={"username": "user", "password": "user123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/user_jwt", headers=headers).status_code == 200
+
+        # When: Logging out
+        assert client.post("/logout", headers=headers).status_code == 204
+
+        # Then: The token is refused even though it has not expired
+        response = client.get("/user_jwt", headers=headers)
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Token has been revoked"
+
+    def test_admin_revokes_token_by_jti(self, client, regular_user, admin_headers):
+        # Given: A user's token and its jti
+        token = client.post("/login", json={"username": "user", "password": "user123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        jti = jwt.decode(token, options={"verify_signature": False})["jti"]
+
+        # When: An admin revokes it
+        response = client.post("/admin/tokens/revoke", json={"jti": jti}, headers=admin_headers)
+
+        # Then: The user's token is refused
+        assert response.status_code == 204
+        assert client.get("/user_jwt", headers=headers).status_code == 401
+
+    def test_non_admin_cannot_revoke(self, client, auth_headers):
+        response = client.post("/admin/tokens/revoke", json={"jti": "x"}, headers=auth_headers)
+        assert response.status_code == 403
@@ -0,0 +1,73 @@
+"""
+Tests for the verified-JWT cache behind verify_token
+"""
+import time
+from datetime import datetime, timedelta, timezone
+import jwt
+import pytest
+from fastapi import HTTPException
+from security import jwt_handler
+from security.jwt_handler import create_access_token, forget_token, verify_token
+from security.keys import keyring
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    jwt_handler.verified_tokens.clear()
+    yield
+    jwt_handler.verified_tokens.clear()
+
+
+class TestVerifiedTokenCache:
+
+    def test_repeated_token_is_verified_once(self, monkeypatch):
+        # Given: A valid token that was verified once
+        token = create_access_token("alice", ["ROLE_USER"])
+        first = verify_token(f"Bearer {token}")
+
+        # When: Verifying it again with signature checks disabled
+        monkeypatch.setattr(jwt_handler.jwt, "decode", lambda *a, **k: pytest.fail("decoded again"))
+        second = verify_token(f"Bearer {token}")
+
+        # Then: The cached claims are returned
+        assert second == first
+
+    def test_cached_token_is_rejected_after_exp(self):
+        # Given: A token expiring within a second, verified while still valid
+        now = datetime.now(timezone.utc)
+        key = keyring.signing_key()
+        token = jwt.encode({"sub": "bob", "roles": [], "iat": now, "exp": now + timedelta(seconds=1)},
+                           key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+        verify_token(f"Bearer {token}")
+
+        # When: Using it after it expired
+        time.sleep(1.1)
+        with pytest.raises(HTTPException) as exc:
+            verify_token(f"Bearer {token}")
+
+        # Then: It is rejected as expired
+        assert exc.value.detail == "Token has expired"
+
+    def test_invalid_tokens_are_not_cached(self):
+        # Given: A token signed with a shared secret under a known kid
+        bad = jwt.encode({"sub": "eve", "exp": time.time() + 60}, "wrong-key-wrong-key-wrong-key-32",
+                         algorithm="HS256", headers={"kid": keyring.signing_key().kid})
+
+        # When / Then: It is rejected every time
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                verify_token(f"Bearer {bad}")
+        assert len(jwt_handler.verified_tokens) == 0
+
+    def test_forgotten_token_is_verified_again(self, monkeypatch):
+        # Given: A cached token that is then forgotten
+        token = create_access_token("carol", [])
+        verify_token(f"Bearer {token}")
+        forget_token(token)
+
+        # When / Then: The next use decodes it again
+        calls = []
+        real_decode = jwt_handler.jwt.decode
+        monkeypatch.setattr(jwt_handler.jwt, "decode", lambda *a, **k: calls.append(1) or real_decode(*a, **k))
+        verify_token(f"Bearer {token}")
+        assert calls == [1]
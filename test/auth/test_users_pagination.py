@@ -0,0 +1,121 @@
+"""
+Integration tests for keyset pagination, filters and page caching on /users
+"""
+import pytest
+from api import auth_controller
+from dao import UserDAO, user_dao
+
+
+@pytest.fixture
+def many_users(db_session, admin_user):
+    """Admin plus 5 regular users and 2 more admins"""
+    for i in range(5):
+        UserDAO.create_user(db_session, f"reader{i}", f"reader{i}@test.com", "pw", ["ROLE_USER"])
+    for i in range(2):
+        UserDAO.create_user(db_session, f"boss{i}", f"boss{i}@test.com", "pw", ["ROLE_ADMIN", "ROLE_USER"])
+
+
+class TestUsersPagination:
+
+    def test_pages_follow_the_next_cursor(self, client, many_users, admin_headers):
+        # Given: 8 users
+
+        # When: Walking pages of 3 through X-Next-After-Id
+        names, after_id = [], 0
+        while True:
+            response = client.get("/users", params={"after_id": after_id, "limit": 3}, headers=admin_headers)
+            assert response.status_code == 200
+            names += [user["username"] for user in response.json()]
+            if "X-Next-After-Id" not in response.headers:
+                break
+            after_id = int(response.headers["X-Next-After-Id"])
+
+        # Then: Every user is listed exactly once, in id order
+        assert names == ["admin"] + [f"reader{i}" for i in range(5)] + ["boss0", "boss1"]
+
+    def test_filter_by_role(self, client, many_users, admin_headers):
+        response = client.get("/users", params={"role": "ROLE_ADMIN"}, headers=admin_headers)
+        assert [user["username"] for user in response.json()] == ["admin", "boss0", "boss1"]
+
+    def test_filter_by_username_prefix(self, client, many_users, admin_headers):
+        response = client.get("/users", params={"username_prefix": "read", "limit": 2}, headers=admin_headers)
+        assert [user["username"] for user in response.json()] == ["reader0", "reader1"]
+        assert "X-Next-After-Id" in response.headers
+
+    def test_limit_is_bounded(self, client, admin_headers):
+        assert client.get("/users", params={"limit": 5000}, headers=admin_headers).status_code == 422
+
+
+class TestUsersPageCache:
+
+    def test_page_is_served_from_cache(self, client, many_users, admin_headers, monkeypatch):
+        # Given: A page that was rendered once
+        first = client.get("/users", params={"limit": 3}, headers=admin_headers)
+
+        # When: Requesting it again with the database query made impossible
+        monkeypatch.setattr(UserDAO, "get_page", lambda *a, **k: pytest.fail("queried again"))
+        second = client.get("/users", params={"limit": 3}, headers=admin_headers)
+
+        # Then: The same page is returned
+        assert second.json() == first.json()
+        assert second.headers["X-Next-After-Id"] == first.headers["X-Next-After-Id"]
+
+    def test_creating_a_user_invalidates_cached_pages(self, client, many_users, admin_headers):
+        # Given: A cached listing
+        before = client.get("/users", headers=admin_headers).json()
+
+        # When: An admin creates a user
+        client.post("/users", json={"username": "newbie", "email": "n@test.com", "password": "pw"},
+                    headers=admin_headers)
+
+        # Then: The next listing includes it
+        after = client.get("/users", headers=admin_headers).json()
+        assert len(after) == len(before) + 1
+        assert after[-1]["username"] == "newbie"
+
+    def test_deleting_a_user_invalidates_cached_pages(self, client, many_users, admin_headers, db_session):
+        # Given: A cached listing
+        before = client.get("/users", headers=admin_headers).json()
+
+        # When: A user is deleted
+        UserDAO.delete_user(db_session, before[-1]["id"])
+
+        # Then: The next listing no longer has it
+        assert len(client.get("/users", headers=admin_headers).json()) == len(before) - 1
+
+    def test_version_stamp_is_part_of_the_key(self, client, many_users, admin_headers):
+        # Given: A cached page
+        client.get("/users", headers=admin_headers)
+        cached = len(auth_controller.users_pages)
+
+        # When: The version is bumped, as another worker would after a change
+        auth_controller.users_version.bump()
+        client.get("/users", headers=admin_headers)
+
+        # Then: The page is rendered again under the new version
+        assert len(auth_controller.users_pages) == cached + 1
+
+
+class TestUsernamePrefix:
+
+    @pytest.mark.parametrize("prefix, expected", [
+        ("ab", "ac"),
+        ("a\U0010ffff", "b"),
+        ("\U0010ffff\U0010ffff", None),
+        ("a\ud7ff", "a\ue000"),
+    ])
+    def test_upper_bound(self, prefix, expected):
+        assert user_dao._prefix_upper_bound(prefix) == expected
+
+    def test_prefix_at_the_top_of_unicode(self, db_session):
+        # Given: Users whose names end at and around the highest code point
+        for name in ("z", "\U0010ffff", "\U0010ffffx", "\ud7ff\ue000", "\ue000"):
+            UserDAO.create_user(db_session, name, f"{len(name)}{ord(name[-1])}@test.com", "pw", ["ROLE_USER"])
+
+        # When: Filtering by prefixes whose last character cannot simply be incremented
+        top = UserDAO.get_page(db_session, username_prefix="\U0010ffff")
+        below_surrogates = UserDAO.get_page(db_session, username_prefix="\ud7ff")
+
+        # Then: Exactly the matching users are returned
+        assert [user.username for user in top] == ["\U0010ffff", "\U0010ffffx"]
+        assert [user.username for user in below_surrogates] == ["\ud7ff\ue000"]
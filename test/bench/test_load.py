@@ -0,0 +1,24 @@
+"""
+Tests for the load generator's operation mixes
+"""
+import argparse
+import pytest
+from bench.load import MIXES, OPERATIONS, _parse_mix
+
+
+class TestLoadMix:
+
+    def test_named_mixes_only_use_known_operations(self):
+        for name, mix in MIXES.items():
+            assert set(mix) <= set(OPERATIONS), name
+
+    def test_parse_explicit_weights(self):
+        # When: Parsing an explicit mix
+        mix = _parse_mix("GET /movies/{movie_id}=3,POST /login=1")
+
+        # Then: Operation names map to their weights
+        assert mix == {"GET /movies/{movie_id}": 3, "POST /login": 1}
+
+    def test_parse_unknown_operation_is_rejected(self):
+        with pytest.raises(argparse.ArgumentTypeError):
+            _parse_mix("GET /nowhere=1")
@@ -0,0 +1,51 @@
+"""
+Tests for benchmark latency summaries and baseline comparison
+"""
+from bench.stats import compare, percentile, summarize
+
+
+class TestBenchStats:
+
+    def test_summarize_reports_nearest_rank_percentiles(self):
+        # Given: 100 latencies of 1..100 ms and two failed requests over two seconds
+        latencies = [i / 1000.0 for i in range(100, 0, -1)]
+
+        # When: Summarising them
+        result = summarize(latencies, errors=2, elapsed=2.0)
+
+        # Then: Percentiles use nearest rank and errors count towards throughput
+        assert result["p50_ms"] == 50.0
+        assert result["p99_ms"] == 99.0
+        assert result["max_ms"] == 100.0
+        assert result["count"] == 102
+        assert result["rps"] == 51.0
+        assert result["error_rate"] == 2 / 102
+
+    def test_percentile_of_empty_sequence_is_zero(self):
+        assert percentile([], 95) == 0.0
+
+    def test_compare_flags_only_changes_beyond_threshold(self):
+        # Given: A baseline and a run where one route got slower and one got slightly slower
+        baseline = {
+            "GET /movies": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "rps": 100.0, "error_rate": 0.0},
+            "GET /tags": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0, "rps": 100.0, "error_rate": 0.0},
+        }
+        current = {
+            "GET /movies": {"p50_ms": 13.0, "p95_ms": 21.0, "p99_ms": 30.0, "rps": 70.0, "error_rate": 0.0},
+            "GET /tags": {"p50_ms": 11.0, "p95_ms": 22.0, "p99_ms": 32.0, "rps": 95.0, "error_rate": 0.0},
+            "GET /new": {"p50_ms": 99.0, "p95_ms": 99.0, "p99_ms": 99.0, "rps": 1.0, "error_rate": 0.0},
+        }
+
+        # When: Comparing with a 15% threshold
+        regressions = compare(current, baseline, threshold=0.15)
+
+        # Then: Only the route beyond the threshold is flagged, and new routes are ignored
+        assert {(r.route, r.metric) for r in regressions} == {("GET /movies", "p50_ms"), ("GET /movies", "rps")}
+
+    def test_compare_flags_new_errors(self):
+        # Given: A route that started failing
+        baseline = {"POST /login": {"p50_ms": 1.0, "error_rate": 0.0}}
+        current = {"POST /login": {"p50_ms": 1.0, "error_rate": 0.5}}
+
+        # When / Then: The error rate increase is reported
+        assert [r.metric for r in compare(current, baseline, threshold=0.15)] == ["error_rate"]
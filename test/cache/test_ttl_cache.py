@@ -0,0 +1,56 @@
+"""
+Tests for the bounded TTL/LRU cache
+"""
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+
+    def test_entry_expires_at_its_deadline(self):
+        # Given: An entry valid until t=1010
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, clock=clock)
+        cache.set("a", 1, expires_at=1010)
+
+        # When / Then: It is served before the deadline and gone at it
+        clock.now = 1009.9
+        assert cache.get("a") == 1
+        clock.now = 1010
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        # Given: A full cache of two where "a" was read most recently
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        # When: Adding a third entry
+        cache.set("c", 3)
+
+        # Then: "b" is evicted
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_zero_size_cache_stores_nothing(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.pop("a")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,77 @@
+"""
+Tests for version stamps shared between processes
+"""
+import multiprocessing
+import os
+import pytest
+from cache import VersionStamp
+from cache.version import default_path
+
+
+def _bump(path):
+    VersionStamp(path).bump()
+
+
+class TestVersionStamp:
+
+    def test_bump_is_seen_by_other_mappings(self, tmp_path):
+        # Given: Two mappings of the same stamp
+        path = str(tmp_path / "users.version")
+        first, second = VersionStamp(path), VersionStamp(path)
+
+        # When: One of them bumps it
+        value = first.bump()
+
+        # Then: Both read the new value
+        assert value == 1
+        assert second.get() == first.get() == 1
+
+    def test_bumps_from_other_processes_are_counted(self, tmp_path):
+        # Given: A stamp
+        path = str(tmp_path / "users.version")
+        stamp = VersionStamp(path)
+
+        # When: Four processes bump it
+        processes = [multiprocessing.get_context("spawn").Process(target=_bump, args=(path,)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        # Then: Every bump is visible here
+        assert stamp.get() == 4
+
+    def test_stamp_is_never_opened_through_a_symlink(self, tmp_path):
+        # Given: The stamp path planted as a symlink to another file
+        target = tmp_path / "victim"
+        target.write_bytes(b"")
+        (tmp_path / "users.version").symlink_to(target)
+
+        # When / Then: Opening it fails instead of mapping the target
+        with pytest.raises(OSError):
+            VersionStamp(str(tmp_path / "users.version"))
+        assert target.read_bytes() == b""
+
+    def test_stamp_owned_by_another_user_is_refused(self, tmp_path):
+        # Given: A stamp file another user created
+        if os.getuid() != 0:
+            pytest.skip("needs root to give the file away")
+        path = tmp_path / "users.version"
+        path.write_bytes(b"\0" * 8)
+        os.chown(path, 12345, 12345)
+
+        # When / Then: It is not used
+        with pytest.raises(RuntimeError):
+            VersionStamp(str(path))
+
+    def test_default_path_is_in_the_private_directory(self, monkeypatch, tmp_path):
+        # Given: A runtime directory for this user
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+        # When: Choosing the file for a stamp
+        path = default_path("users", "/srv/app.db")
+
+        # Then: It is in the 0700 per-user directory
+        directory = os.path.dirname(path)
+        assert os.path.dirname(directory) == str(tmp_path)
+        assert os.stat(directory).st_mode & 0o777 == 0o700
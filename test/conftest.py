@@ -1,11 +1,25 @@
 import pytest
 import os
+import tempfile
+
+# Signing keys for the test run, kept out of the working tree
+os.environ.setdefault("APP_JWT_KEY_DIR", tempfile.mkdtemp(prefix="jwt-keys-"))
+# The app's own database, which background stores (revocations, refresh token purge, analysis
+# results) use outside the get_db override; never the developer's app.db, even if one is configured
+os.environ["APP_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="app-db-"), "app.db")
+# Cheapest bcrypt cost; the tests check behaviour, not hash strength
+os.environ.setdefault("APP_BCRYPT_ROUNDS", "4")
+# No broker in the test run; result materialization is tested with a fake consumer
+os.environ.setdefault("APP_KAFKA_CONSUMER", "0")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from db.database import Base, get_db
+from db.database import get_db
+from db.snapshot import build_snapshot, restore_into_engine
 from main import app
 from dao import UserDAO, MovieDAO, LinkDAO, RatingDAO, TagDAO
+from dao.user_dao import users_version
 
 # Test database in the test root folder
 TEST_DB_PATH = os.path.join(os.path.dirname(__file__), "test_integration.db")
@@ -25,29 +39,45 @@ def override_get_db():
         db.close()
 
 
+@pytest.fixture(scope="session")
+def schema_snapshot(tmp_path_factory):
+    """Empty-schema database built once per session and restored before each test"""
+    return build_snapshot(None, str(tmp_path_factory.mktemp("snapshots")), seed_users=False)
+
+
+@pytest.fixture(scope="session")
+def database_engine():
+    """Engine of the test database; a test package with its own database overrides this"""
+    return engine
+
+
+@pytest.fixture(scope="function")
+def clean_database(schema_snapshot, database_engine):
+    """Reset the test database to the empty schema"""
+    restore_into_engine(schema_snapshot, database_engine)
+    # The users table changed underneath the DAO, so retire cached user data
+    users_version.bump()
+
+
 @pytest.fixture(scope="function")
-def client():
+def client(clean_database):
     """Test client with clean database for each test"""
-    Base.metadata.create_all(bind=engine)
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
 
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(clean_database):
     """Database session for fixtures"""
-    Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
 
 
 # ============================================================================
@@ -3,7 +3,7 @@ import os
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from db.database import Base, get_db
+from db.database import get_db
 from main import app
 from dao import MovieDAO, LinkDAO, RatingDAO, TagDAO
 
@@ -25,29 +25,31 @@ def override_get_db():
         db.close()
 
 
+@pytest.fixture(scope="session")
+def database_engine():
+    """This package's test database, reset by clean_database from the root conftest"""
+    return engine
+
+
 @pytest.fixture(scope="function")
-def client():
+def client(clean_database):
     """Test client with clean database for each test"""
-    Base.metadata.create_all(bind=engine)
     app.dependency_overrides[get_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
 
-    Base.metadata.drop_all(bind=engine)
     app.dependency_overrides.clear()
 
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(clean_database):
     """Database session for fixtures"""
-    Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
 
 
 # Movie fixtures
@@ -7,12 +7,12 @@ import pytest
 class TestLinkEndpoints:
     """Test suite for /links endpoints"""
 
-    def test_get_links_list_returns_correct_count(self, client, sample_links):
+    def test_get_links_list_returns_correct_count(self, client, sample_links, auth_headers):
         """Test GET /links returns all links from fixtures"""
         # Given: 3 links exist in the database
 
         # When: Requesting all links
-        response = client.get("/links")
+        response = client.get("/links", headers=auth_headers)
 
         # Then: Should return 200 and all 3 links
         assert response.status_code == 200
@@ -26,24 +26,24 @@ class TestLinkEndpoints:
         assert 2 in movie_ids
         assert 3 in movie_ids
 
-    def test_get_links_with_limit(self, client, sample_links):
+    def test_get_links_with_limit(self, client, sample_links, auth_headers):
         """Test GET /links with limit parameter"""
         # Given: 3 links exist in the database
 
         # When: Requesting links with limit=2
-        response = client.get("/links?limit=2")
+        response = client.get("/links?limit=2", headers=auth_headers)
 
         # Then: Should return only 2 links
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 2
 
-    def test_get_link_by_movie_id_returns_correct_link(self, client, sample_links):
+    def test_get_link_by_movie_id_returns_correct_link(self, client, sample_links, auth_headers):
         """Test GET /links/{movie_id} returns specific link"""
         # Given: Link for movie_id 1 exists
 
         # When: Requesting link by movie ID
-        response = client.get("/links/1")
+        response = client.get("/links/1", headers=auth_headers)
 
         # Then: Should return 200 and the correct link
         assert response.status_code == 200
@@ -52,12 +52,12 @@ class TestLinkEndpoints:
         assert data["imdb_id"] == "tt0133093"
         assert data["tmdb_id"] == "603"
 
-    def test_get_link_by_nonexistent_movie_id_returns_404(self, client, sample_links):
+    def test_get_link_by_nonexistent_movie_id_returns_404(self, client, sample_links, auth_headers):
         """Test GET /links/{movie_id} with non-existent ID returns 404"""
         # Given: Link for movie_id 9999 does not exist
 
         # When: Requesting non-existent link
-        response = client.get("/links/9999")
+        response = client.get("/links/9999", headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
@@ -65,7 +65,7 @@ class TestLinkEndpoints:
         assert "detail" in data
         assert data["detail"] == "Link not found"
 
-    def test_create_link_adds_to_database(self, client, sample_movies, db_session):
+    def test_create_link_adds_to_database(self, client, sample_movies, db_session, auth_headers):
         """Test POST /links creates new link in database"""
         # Given: New link data for existing movie
         new_link = {
@@ -75,7 +75,7 @@ class TestLinkEndpoints:
         }
 
         # When: Creating a new link
-        response = client.post("/links", json=new_link)
+        response = client.post("/links", json=new_link, headers=auth_headers)
 
         # Then: Should return 201 Created
         assert response.status_code == 201
@@ -85,10 +85,10 @@ class TestLinkEndpoints:
         assert data["tmdb_id"] == "12345"
 
         # Verify link was actually added to database
-        verify_response = client.get("/links/1")
+        verify_response = client.get("/links/1", headers=auth_headers)
         assert verify_response.status_code == 200
 
-    def test_create_link_without_tmdb_id(self, client, sample_movies):
+    def test_create_link_without_tmdb_id(self, client, sample_movies, auth_headers):
         """Test POST /links with optional tmdb_id"""
         # Given: New link data without tmdb_id
         new_link = {
@@ -97,7 +97,7 @@ class TestLinkEndpoints:
         }
 
         # When: Creating a new link
-        response = client.post("/links", json=new_link)
+        response = client.post("/links", json=new_link, headers=auth_headers)
 
         # Then: Should return 201 Created
         assert response.status_code == 201
@@ -106,7 +106,7 @@ class TestLinkEndpoints:
         assert data["imdb_id"] == "tt9876543"
         assert data["tmdb_id"] is None
 
-    def test_create_link_with_duplicate_movie_id_returns_400(self, client, sample_links):
+    def test_create_link_with_duplicate_movie_id_returns_400(self, client, sample_links, auth_headers):
         """Test POST /links with duplicate movie_id returns 400"""
         # Given: Link for movie_id 1 already exists
 
@@ -116,7 +116,7 @@ class TestLinkEndpoints:
             "imdb_id": "tt9999999",
             "tmdb_id": "99999"
         }
-        response = client.post("/links", json=duplicate_link)
+        response = client.post("/links", json=duplicate_link, headers=auth_headers)
 
         # Then: Should return 400 Bad Request
         assert response.status_code == 400
@@ -124,7 +124,7 @@ class TestLinkEndpoints:
         assert "detail" in data
         assert "already exists" in data["detail"].lower()
 
-    def test_update_link_modifies_database(self, client, single_link):
+    def test_update_link_modifies_database(self, client, single_link, auth_headers):
         """Test PUT /links/{movie_id} updates link in database"""
         # Given: Link for movie_id 100 exists
         movie_id = single_link.movie_id
@@ -134,7 +134,7 @@ class TestLinkEndpoints:
             "imdb_id": "tt1111111",
             "tmdb_id": "11111"
         }
-        response = client.put(f"/links/{movie_id}", json=update_data)
+        response = client.put(f"/links/{movie_id}", json=update_data, headers=auth_headers)
 
         # Then: Should return 200 and updated data
         assert response.status_code == 200
@@ -144,12 +144,12 @@ class TestLinkEndpoints:
         assert data["tmdb_id"] == "11111"
 
         # Verify update persisted in database
-        verify_response = client.get(f"/links/{movie_id}")
+        verify_response = client.get(f"/links/{movie_id}", headers=auth_headers)
         verify_data = verify_response.json()
         assert verify_data["imdb_id"] == "tt1111111"
         assert verify_data["tmdb_id"] == "11111"
 
-    def test_update_link_partial_update(self, client, single_link):
+    def test_update_link_partial_update(self, client, single_link, auth_headers):
         """Test PUT /links/{movie_id} with partial data"""
         # Given: Link for movie_id 100 exists
         movie_id = single_link.movie_id
@@ -157,7 +157,7 @@ class TestLinkEndpoints:
 
         # When: Updating only the imdb_id
         update_data = {"imdb_id": "tt2222222"}
-        response = client.put(f"/links/{movie_id}", json=update_data)
+        response = client.put(f"/links/{movie_id}", json=update_data, headers=auth_headers)
 
         # Then: Should update imdb_id but keep original tmdb_id
         assert response.status_code == 200
@@ -165,56 +165,56 @@ class TestLinkEndpoints:
         assert data["imdb_id"] == "tt2222222"
         assert data["tmdb_id"] == original_tmdb
 
-    def test_update_nonexistent_link_returns_404(self, client):
+    def test_update_nonexistent_link_returns_404(self, client, auth_headers):
         """Test PUT /links/{movie_id} with non-existent ID returns 404"""
         # Given: Link for movie_id 9999 does not exist
 
         # When: Attempting to update non-existent link
         update_data = {"imdb_id": "tt9999999"}
-        response = client.put("/links/9999", json=update_data)
+        response = client.put("/links/9999", json=update_data, headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Link not found"
 
-    def test_delete_link_removes_from_database(self, client, single_link):
+    def test_delete_link_removes_from_database(self, client, single_link, auth_headers):
         """Test DELETE /links/{movie_id} removes link from database"""
         # Given: Link for movie_id 100 exists
         movie_id = single_link.movie_id
 
         # Verify link exists
-        verify_before = client.get(f"/links/{movie_id}")
+        verify_before = client.get(f"/links/{movie_id}", headers=auth_headers)
         assert verify_before.status_code == 200
 
         # When: Deleting the link
-        response = client.delete(f"/links/{movie_id}")
+        response = client.delete(f"/links/{movie_id}", headers=auth_headers)
 
         # Then: Should return 204 No Content
         assert response.status_code == 204
 
         # Verify link no longer exists in database
-        verify_after = client.get(f"/links/{movie_id}")
+        verify_after = client.get(f"/links/{movie_id}", headers=auth_headers)
         assert verify_after.status_code == 404
 
-    def test_delete_nonexistent_link_returns_404(self, client):
+    def test_delete_nonexistent_link_returns_404(self, client, auth_headers):
         """Test DELETE /links/{movie_id} with non-existent ID returns 404"""
         # Given: Link for movie_id 9999 does not exist
 
         # When: Attempting to delete non-existent link
-        response = client.delete("/links/9999")
+        response = client.delete("/links/9999", headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Link not found"
 
-    def test_get_empty_links_list(self, client):
+    def test_get_empty_links_list(self, client, auth_headers):
         """Test GET /links returns empty list when no links exist"""
         # Given: No links in database
 
         # When: Requesting all links
-        response = client.get("/links")
+        response = client.get("/links", headers=auth_headers)
 
         # Then: Should return 200 with empty list
         assert response.status_code == 200
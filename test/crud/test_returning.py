@@ -0,0 +1,88 @@
+"""
+Tests for writes that answer from their RETURNING row
+"""
+import pytest
+from sqlalchemy import event, inspect
+from dao import RatingDAO, TagDAO
+
+
+@pytest.fixture
+def statements(db_session):
+    """SQL sent to the test database while the test runs"""
+    sent = []
+    engine = db_session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(" ".join(statement.split()))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _touching(statements, table):
+    return [statement for statement in statements if f" {table} " in f"{statement} "]
+
+
+class TestExecuteReturning:
+
+    def test_created_row_is_detached_with_its_values(self, db_session, single_movie, statements):
+        # When: Creating a rating through the DAO
+        rating = RatingDAO.create(db_session, user_id=7, movie_id=100, rating=4.0, timestamp=1609459600)
+
+        # Then: The entity carries the inserted values without being loaded again
+        assert inspect(rating).detached
+        assert rating.id is not None
+        assert (rating.user_id, rating.movie_id, rating.rating) == (7, 100, 4.0)
+        sent = _touching(statements, "ratings")
+        assert len(sent) == 1
+        assert sent[0].startswith("INSERT INTO ratings") and "RETURNING" in sent[0]
+
+    def test_update_of_missing_row_returns_none(self, db_session, statements):
+        # When: Updating a tag that does not exist
+        updated = TagDAO.update(db_session, tag_id=99999, tag="ghost")
+
+        # Then: Nothing is returned and no row appears
+        assert updated is None
+        assert TagDAO.get_by_id(db_session, 99999) is None
+
+
+class TestReturningEndpoints:
+
+    def test_create_response_comes_from_the_insert(self, client, single_movie, auth_headers, statements):
+        # When: Creating a tag
+        response = client.post("/tags", json={"user_id": 10, "movie_id": 100, "tag": "noir",
+                                               "timestamp": 1609460000}, headers=auth_headers)
+
+        # Then: The response holds the new row and the tags table was only written, never read back
+        assert response.status_code == 201
+        assert response.json()["tag"] == "noir"
+        assert response.json()["id"] is not None
+        sent = _touching(statements, "tags")
+        assert len(sent) == 1
+        assert sent[0].startswith("INSERT INTO tags") and "RETURNING" in sent[0]
+
+    def test_update_response_comes_from_the_update(self, client, single_rating, auth_headers, statements):
+        # When: Updating a rating
+        response = client.put(f"/ratings/{single_rating.id}", json={"rating": 1.5}, headers=auth_headers)
+
+        # Then: The response holds the updated row from a single UPDATE ... RETURNING
+        assert response.status_code == 200
+        assert response.json()["rating"] == 1.5
+        assert response.json()["timestamp"] == 1609459600
+        sent = _touching(statements, "ratings")
+        assert len(sent) == 1
+        assert sent[0].startswith("UPDATE ratings") and "RETURNING" in sent[0]
+
+    @pytest.mark.parametrize("path, body", [
+        ("/movies/9999", {"title": "Ghost"}),
+        ("/links/9999", {"imdb_id": "tt0000000"}),
+        ("/ratings/99999", {"rating": 3.0}),
+        ("/tags/99999", {"tag": "ghost"}),
+    ])
+    def test_update_of_missing_row_returns_404(self, client, auth_headers, path, body):
+        assert client.put(path, json=body, headers=auth_headers).status_code == 404
+
+    @pytest.mark.parametrize("path", ["/movies/9999", "/links/9999", "/ratings/99999", "/tags/99999"])
+    def test_delete_of_missing_row_returns_404(self, client, auth_headers, path):
+        assert client.delete(path, headers=auth_headers).status_code == 404
@@ -7,12 +7,12 @@ import pytest
 class TestTagEndpoints:
     """Test suite for /tags endpoints"""
 
-    def test_get_tags_list_returns_correct_count(self, client, sample_tags):
+    def test_get_tags_list_returns_correct_count(self, client, sample_tags, auth_headers):
         """Test GET /tags returns all tags from fixtures"""
         # Given: 5 tags exist in the database
 
         # When: Requesting all tags
-        response = client.get("/tags")
+        response = client.get("/tags", headers=auth_headers)
 
         # Then: Should return 200 and all 5 tags
         assert response.status_code == 200
@@ -20,25 +20,25 @@ class TestTagEndpoints:
         assert len(data) == 5
         assert isinstance(data, list)
 
-    def test_get_tags_with_custom_limit(self, client, sample_tags):
+    def test_get_tags_with_custom_limit(self, client, sample_tags, auth_headers):
         """Test GET /tags with custom limit parameter"""
         # Given: 5 tags exist in the database
 
         # When: Requesting tags with limit=3
-        response = client.get("/tags?limit=3")
+        response = client.get("/tags?limit=3", headers=auth_headers)
 
         # Then: Should return only 3 tags
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 3
 
-    def test_get_tag_by_id_returns_correct_tag(self, client, sample_tags):
+    def test_get_tag_by_id_returns_correct_tag(self, client, sample_tags, auth_headers):
         """Test GET /tags/{tag_id} returns specific tag"""
         # Given: Multiple tags exist, get the first one's ID
         tag_id = sample_tags[0].id
 
         # When: Requesting tag by ID
-        response = client.get(f"/tags/{tag_id}")
+        response = client.get(f"/tags/{tag_id}", headers=auth_headers)
 
         # Then: Should return 200 and the correct tag
         assert response.status_code == 200
@@ -49,12 +49,12 @@ class TestTagEndpoints:
         assert data["tag"] == "mind-bending"
         assert data["timestamp"] == 1609459200
 
-    def test_get_tag_by_nonexistent_id_returns_404(self, client, sample_tags):
+    def test_get_tag_by_nonexistent_id_returns_404(self, client, sample_tags, auth_headers):
         """Test GET /tags/{tag_id} with non-existent ID returns 404"""
         # Given: Tag with ID 99999 does not exist
 
         # When: Requesting non-existent tag
-        response = client.get("/tags/99999")
+        response = client.get("/tags/99999", headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
@@ -62,7 +62,7 @@ class TestTagEndpoints:
         assert "detail" in data
         assert data["detail"] == "Tag not found"
 
-    def test_create_tag_adds_to_database(self, client, sample_movies, db_session):
+    def test_create_tag_adds_to_database(self, client, sample_movies, db_session, auth_headers):
         """Test POST /tags creates new tag in database"""
         # Given: New tag data
         new_tag = {
@@ -73,7 +73,7 @@ class TestTagEndpoints:
         }
 
         # When: Creating a new tag
-        response = client.post("/tags", json=new_tag)
+        response = client.post("/tags", json=new_tag, headers=auth_headers)
 
         # Then: Should return 201 Created
         assert response.status_code == 201
@@ -86,12 +86,12 @@ class TestTagEndpoints:
 
         # Verify tag was actually added to database
         tag_id = data["id"]
-        verify_response = client.get(f"/tags/{tag_id}")
+        verify_response = client.get(f"/tags/{tag_id}", headers=auth_headers)
         assert verify_response.status_code == 200
         verify_data = verify_response.json()
         assert verify_data["tag"] == "awesome"
 
-    def test_create_tag_with_spaces(self, client, sample_movies):
+    def test_create_tag_with_spaces(self, client, sample_movies, auth_headers):
         """Test POST /tags with tag containing spaces"""
         # Given: Tag data with spaces
         new_tag = {
@@ -102,14 +102,14 @@ class TestTagEndpoints:
         }
 
         # When: Creating the tag
-        response = client.post("/tags", json=new_tag)
+        response = client.post("/tags", json=new_tag, headers=auth_headers)
 
         # Then: Should return 201 Created
         assert response.status_code == 201
         data = response.json()
         assert data["tag"] == "must watch"
 
-    def test_create_multiple_tags_for_same_movie(self, client, sample_movies):
+    def test_create_multiple_tags_for_same_movie(self, client, sample_movies, auth_headers):
         """Test creating multiple tags for the same movie by same user"""
         # Given: A movie exists
 
@@ -119,13 +119,13 @@ class TestTagEndpoints:
             "movie_id": 1,
             "tag": "exciting",
             "timestamp": 1609460000
-        })
+        }, headers=auth_headers)
         tag2 = client.post("/tags", json={
             "user_id": 10,
             "movie_id": 1,
             "tag": "thrilling",
             "timestamp": 1609460100
-        })
+        }, headers=auth_headers)
 
         # Then: Both tags should be created successfully
         assert tag1.status_code == 201
@@ -134,7 +134,7 @@ class TestTagEndpoints:
         assert tag1.json()["tag"] == "exciting"
         assert tag2.json()["tag"] == "thrilling"
 
-    def test_update_tag_modifies_database(self, client, single_tag):
+    def test_update_tag_modifies_database(self, client, single_tag, auth_headers):
         """Test PUT /tags/{tag_id} updates tag in database"""
         # Given: Tag exists
         tag_id = single_tag.id
@@ -144,7 +144,7 @@ class TestTagEndpoints:
             "tag": "updated-tag",
             "timestamp": 1609470000
         }
-        response = client.put(f"/tags/{tag_id}", json=update_data)
+        response = client.put(f"/tags/{tag_id}", json=update_data, headers=auth_headers)
 
         # Then: Should return 200 and updated data
         assert response.status_code == 200
@@ -154,12 +154,12 @@ class TestTagEndpoints:
         assert data["timestamp"] == 1609470000
 
         # Verify update persisted in database
-        verify_response = client.get(f"/tags/{tag_id}")
+        verify_response = client.get(f"/tags/{tag_id}", headers=auth_headers)
         verify_data = verify_response.json()
         assert verify_data["tag"] == "updated-tag"
         assert verify_data["timestamp"] == 1609470000
 
-    def test_update_tag_partial_update(self, client, single_tag):
+    def test_update_tag_partial_update(self, client, single_tag, auth_headers):
         """Test PUT /tags/{tag_id} with partial data"""
         # Given: Tag exists
         tag_id = single_tag.id
@@ -167,7 +167,7 @@ class TestTagEndpoints:
 
         # When: Updating only the tag text
         update_data = {"tag": "partially-updated"}
-        response = client.put(f"/tags/{tag_id}", json=update_data)
+        response = client.put(f"/tags/{tag_id}", json=update_data, headers=auth_headers)
 
         # Then: Should update tag but keep original timestamp
         assert response.status_code == 200
@@ -175,56 +175,56 @@ class TestTagEndpoints:
         assert data["tag"] == "partially-updated"
         assert data["timestamp"] == original_timestamp
 
-    def test_update_nonexistent_tag_returns_404(self, client):
+    def test_update_nonexistent_tag_returns_404(self, client, auth_headers):
         """Test PUT /tags/{tag_id} with non-existent ID returns 404"""
         # Given: Tag with ID 99999 does not exist
 
         # When: Attempting to update non-existent tag
         update_data = {"tag": "new-tag"}
-        response = client.put("/tags/99999", json=update_data)
+        response = client.put("/tags/99999", json=update_data, headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Tag not found"
 
-    def test_delete_tag_removes_from_database(self, client, single_tag):
+    def test_delete_tag_removes_from_database(self, client, single_tag, auth_headers):
         """Test DELETE /tags/{tag_id} removes tag from database"""
         # Given: Tag exists
         tag_id = single_tag.id
 
         # Verify tag exists
-        verify_before = client.get(f"/tags/{tag_id}")
+        verify_before = client.get(f"/tags/{tag_id}", headers=auth_headers)
         assert verify_before.status_code == 200
 
         # When: Deleting the tag
-        response = client.delete(f"/tags/{tag_id}")
+        response = client.delete(f"/tags/{tag_id}", headers=auth_headers)
 
         # Then: Should return 204 No Content
         assert response.status_code == 204
 
         # Verify tag no longer exists in database
-        verify_after = client.get(f"/tags/{tag_id}")
+        verify_after = client.get(f"/tags/{tag_id}", headers=auth_headers)
         assert verify_after.status_code == 404
 
-    def test_delete_nonexistent_tag_returns_404(self, client):
+    def test_delete_nonexistent_tag_returns_404(self, client, auth_headers):
         """Test DELETE /tags/{tag_id} with non-existent ID returns 404"""
         # Given: Tag with ID 99999 does not exist
 
         # When: Attempting to delete non-existent tag
-        response = client.delete("/tags/99999")
+        response = client.delete("/tags/99999", headers=auth_headers)
 
         # Then: Should return 404 Not Found
         assert response.status_code == 404
         data = response.json()
         assert data["detail"] == "Tag not found"
 
-    def test_get_empty_tags_list(self, client):
+    def test_get_empty_tags_list(self, client, auth_headers):
         """Test GET /tags returns empty list when no tags exist"""
         # Given: No tags in database
 
         # When: Requesting all tags
-        response = client.get("/tags")
+        response = client.get("/tags", headers=auth_headers)
 
         # Then: Should return 200 with empty list
         assert response.status_code == 200
@@ -232,7 +232,7 @@ class TestTagEndpoints:
         assert len(data) == 0
         assert isinstance(data, list)
 
-    def test_different_users_can_tag_same_movie(self, client, sample_movies):
+    def test_different_users_can_tag_same_movie(self, client, sample_movies, auth_headers):
         """Test that different users can tag the same movie"""
         # Given: A movie exists
 
@@ -242,13 +242,13 @@ class TestTagEndpoints:
             "movie_id": 1,
             "tag": "user20-tag",
             "timestamp": 1609460000
-        })
+        }, headers=auth_headers)
         tag2 = client.post("/tags", json={
             "user_id": 21,
             "movie_id": 1,
             "tag": "user21-tag",
             "timestamp": 1609460100
-        })
+        }, headers=auth_headers)
 
         # Then: Both tags should be created successfully
         assert tag1.status_code == 201
@@ -256,7 +256,7 @@ class TestTagEndpoints:
         assert tag1.json()["user_id"] == 20
         assert tag2.json()["user_id"] == 21
 
-    def test_tag_text_preserves_case(self, client, sample_movies):
+    def test_tag_text_preserves_case(self, client, sample_movies, auth_headers):
         """Test that tag text case is preserved"""
         # Given: Tag with mixed case
         new_tag = {
@@ -267,7 +267,7 @@ class TestTagEndpoints:
         }
 
         # When: Creating the tag
-        response = client.post("/tags", json=new_tag)
+        response = client.post("/tags", json=new_tag, headers=auth_headers)
 
         # Then: Case should be preserved
         assert response.status_code == 201
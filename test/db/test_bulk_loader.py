@@ -0,0 +1,87 @@
+"""
+Tests for the parallel bulk CSV loader
+"""
+import os
+import shutil
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from db.database import Base
+from db.bulk_loader import bulk_load, read_header, split_ranges, parse_range, TABLE_SPECS
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "db", "resources")
+
+
+class TestBulkLoader:
+
+    def test_split_ranges_cover_every_row_once(self):
+        # Given: The sample ratings file split into small line-aligned chunks
+        csv_path = os.path.join(RESOURCES_DIR, "ratings.csv")
+        header, data_start = read_header(csv_path)
+        ranges = split_ranges(csv_path, data_start, chunk_bytes=64 * 1024)
+
+        # When: Parsing every chunk independently
+        rows = [row for start, end in ranges
+                for row in parse_range(csv_path, header, start, end, TABLE_SPECS[2].convert)]
+
+        # Then: Every data line is parsed exactly once, in order
+        with open(csv_path, encoding="utf-8") as f:
+            expected = sum(1 for _ in f) - 1
+        assert len(ranges) > 1
+        assert len(rows) == expected
+        assert rows[0] == (1, 1, 4.0, 964982703)
+
+    def test_bulk_load_populates_tables_and_rebuilds_indexes(self, tmp_path):
+        # Given: An empty database with the full schema
+        engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        # When: Bulk-loading the sample CSVs
+        stats = bulk_load(engine, RESOURCES_DIR, workers=2, chunk_bytes=256 * 1024)
+
+        # Then: Row counts match the reported stats and secondary indexes exist again
+        with engine.connect() as conn:
+            for s in stats:
+                assert conn.execute(text(f"SELECT COUNT(*) FROM {s.table}")).scalar() == s.rows
+                assert s.rows > 0
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        index_names = {ix["name"] for ix in inspect(engine).get_indexes("ratings")}
+        assert "ix_ratings_user_movie" in index_names
+        engine.dispose()
+
+    def test_failed_load_still_restores_indexes(self, tmp_path):
+        # Given: A snapshot whose tags file has a malformed row
+        csv_dir = tmp_path / "csv"
+        shutil.copytree(RESOURCES_DIR, csv_dir)
+        with open(csv_dir / "tags.csv", "a", encoding="utf-8") as f:
+            f.write("not-a-user,1,broken,0\n")
+        engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+        Base.metadata.create_all(bind=engine)
+        expected = {table: {ix["name"] for ix in inspect(engine).get_indexes(table)} for table in ("ratings", "tags")}
+
+        # When: The load fails partway through
+        with pytest.raises(ValueError):
+            bulk_load(engine, str(csv_dir), workers=1)
+
+        # Then: Every secondary index dropped for the load is back, and no table kept its rows
+        for table, names in expected.items():
+            assert {ix["name"] for ix in inspect(engine).get_indexes(table)} == names
+        with engine.connect() as conn:
+            for table in ("movies", "links", "ratings", "tags"):
+                assert conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() == 0
+        engine.dispose()
+
+    def test_journal_mode_in_use_is_restored(self, tmp_path):
+        # Given: A database running in WAL mode
+        engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        # When: Bulk-loading into it
+        bulk_load(engine, RESOURCES_DIR, workers=1)
+
+        # Then: It is still in WAL mode, also for new connections
+        engine.dispose()
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        engine.dispose()
@@ -0,0 +1,155 @@
+"""
+Tests for the incremental delta importer
+"""
+import csv
+import dataclasses
+import os
+import shutil
+import pytest
+from sqlalchemy import create_engine, text
+from db.database import Base
+from db.bulk_loader import bulk_load
+from db import delta_import as delta_module
+from db.delta_import import DELTA_SPECS, delta_import, read_csv_chunks
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "db", "resources")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'delta.db'}")
+    Base.metadata.create_all(bind=engine)
+    bulk_load(engine, RESOURCES_DIR, workers=1)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    target = tmp_path / "snapshot"
+    shutil.copytree(RESOURCES_DIR, target)
+    return target
+
+
+def _rewrite(path, transform):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    rows = [rows[0]] + transform(rows[1:])
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+
+
+def _scalar(engine, sql):
+    with engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+class TestDeltaImport:
+
+    def test_unchanged_snapshot_produces_no_changes(self, engine):
+        # Given: A database loaded from the same CSVs
+
+        # When: Running a delta import against them
+        deltas = delta_import(engine, RESOURCES_DIR)
+
+        # Then: Every chunk hash matches and nothing is written
+        for delta in deltas:
+            assert delta.chunks_changed == 0
+            assert delta.inserted == delta.updated == delta.deleted == 0
+
+    def test_applies_only_inserts_updates_and_deletes(self, engine, snapshot_dir):
+        # Given: A snapshot with one retitled movie, one dropped rating and one new tag
+        _rewrite(snapshot_dir / "movies.csv",
+                 lambda rows: [[r[0], "Toy Story (Remastered)", r[2]] if r[0] == "1" else r for r in rows])
+        _rewrite(snapshot_dir / "ratings.csv",
+                 lambda rows: [r for r in rows if not (r[0] == "1" and r[1] == "1")])
+        _rewrite(snapshot_dir / "tags.csv",
+                 lambda rows: rows + [["1", "1", "delta-tag", "1700000000"]])
+        ratings_before = _scalar(engine, "SELECT COUNT(*) FROM ratings")
+
+        # When: Running a delta import against the snapshot
+        deltas = {d.table: d for d in delta_import(engine, str(snapshot_dir))}
+
+        # Then: Only the touched chunks are diffed and exactly those rows change
+        assert deltas["movies"].updated == 1
+        assert deltas["movies"].chunks_changed == 1
+        assert deltas["ratings"].deleted == 1
+        assert deltas["tags"].inserted == 1
+        assert deltas["links"].chunks_changed == 0
+        assert _scalar(engine, "SELECT title FROM movies WHERE movie_id = 1") == "Toy Story (Remastered)"
+        assert _scalar(engine, "SELECT COUNT(*) FROM ratings") == ratings_before - 1
+        assert _scalar(engine, "SELECT COUNT(*) FROM tags WHERE tag = 'delta-tag'") == 1
+
+        # And: A second run finds nothing left to do
+        for delta in delta_import(engine, str(snapshot_dir)):
+            assert delta.chunks_changed == 0
+
+    def test_duplicate_rows_collapse_to_the_csv_row(self, engine):
+        # Given: A rating duplicated through the API, matching the CSV row
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO ratings (user_id, movie_id, rating, timestamp) "
+                              "SELECT user_id, movie_id, rating, timestamp FROM ratings "
+                              "WHERE user_id = 1 AND movie_id = 1"))
+        assert _scalar(engine, "SELECT COUNT(*) FROM ratings WHERE user_id = 1 AND movie_id = 1") == 2
+
+        # When: Running a delta import against the unchanged CSVs
+        deltas = {d.table: d for d in delta_import(engine, RESOURCES_DIR)}
+
+        # Then: Only the extra row is removed, and it is reported as a duplicate
+        assert deltas["ratings"].duplicates == 1
+        assert deltas["ratings"].deleted == 1
+        assert _scalar(engine, "SELECT COUNT(*) FROM ratings WHERE user_id = 1 AND movie_id = 1") == 1
+
+    def test_changes_are_written_in_batches(self, engine, snapshot_dir, monkeypatch):
+        # Given: A snapshot without the ratings of two users in different chunks, flushed after every chunk
+        _rewrite(snapshot_dir / "ratings.csv", lambda rows: [r for r in rows if r[0] not in ("1", "20")])
+        dropped = _scalar(engine, "SELECT COUNT(*) FROM ratings WHERE user_id IN (1, 20)")
+        monkeypatch.setattr(delta_module, "FLUSH_ROWS", 1)
+        batches = []
+        apply_changes = delta_module.apply_changes
+
+        def counting(conn, delta, changes):
+            batches.append(len(changes))
+            apply_changes(conn, delta, changes)
+
+        monkeypatch.setattr(delta_module, "apply_changes", counting)
+
+        # When: Running a delta import against the snapshot
+        deltas = {d.table: d for d in delta_import(engine, str(snapshot_dir))}
+
+        # Then: The deletes went out over several batches, all of them counted and committed
+        assert len([size for size in batches if size]) > 1
+        assert deltas["ratings"].deleted == dropped
+        assert _scalar(engine, "SELECT COUNT(*) FROM ratings WHERE user_id IN (1, 20)") == 0
+
+
+class TestReadCsvChunks:
+
+    def test_each_chunk_is_yielded_once_even_when_rows_are_scattered(self, snapshot_dir):
+        # Given: A tags CSV with a row for the first chunk appended at the end
+        _rewrite(snapshot_dir / "tags.csv", lambda rows: rows + [["1", "1", "late-tag", "1700000000"]])
+        tags = DELTA_SPECS[3]
+
+        # When: Streaming it by chunk
+        chunks = list(read_csv_chunks(tags, str(snapshot_dir / "tags.csv")))
+
+        # Then: Every chunk appears once, sorted, with the late row in its own chunk
+        numbers = [chunk for chunk, _ in chunks]
+        assert len(numbers) == len(set(numbers))
+        first = dict(chunks)[0]
+        assert first == sorted(first)
+        assert ((1, 1, "late-tag"), (1700000000,)) in first
+
+    def test_leading_key_is_found_by_its_declared_csv_field(self, tmp_path):
+        # Given: A links CSV whose movie column is not named after the table column
+        path = tmp_path / "links.csv"
+        path.write_text("id,imdbId,tmdbId\n2,0113497,8844\n1,0114709,862\n", encoding="utf-8")
+        spec = dataclasses.replace(DELTA_SPECS[1].spec, fields=("id", "imdbId", "tmdbId"),
+                                   convert=lambda r: (int(r["id"]), r["imdbId"], r["tmdbId"] or None))
+        links = dataclasses.replace(DELTA_SPECS[1], spec=spec)
+
+        # When: Streaming it by chunk
+        chunks = list(read_csv_chunks(links, str(path)))
+
+        # Then: Both rows are read, ordered by key
+        assert chunks == [(0, [((1,), ("0114709", "862")), ((2,), ("0113497", "8844"))])]
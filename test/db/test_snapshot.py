@@ -0,0 +1,92 @@
+"""
+Tests for prebuilt database snapshots
+"""
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from db.snapshot import build_snapshot, restore_snapshot, restore_into_engine
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "db", "resources")
+
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+class TestSnapshot:
+
+    def test_build_is_content_addressed(self, tmp_path):
+        # Given: A snapshot built from the sample CSVs
+        first = build_snapshot(RESOURCES_DIR, str(tmp_path), seed_users=False)
+
+        # When: Building again from unchanged inputs
+        mtime = os.path.getmtime(first)
+        second = build_snapshot(RESOURCES_DIR, str(tmp_path), seed_users=False)
+
+        # Then: The existing snapshot is reused rather than rebuilt
+        assert first == second
+        assert os.path.getmtime(second) == mtime
+        assert [p for p in os.listdir(tmp_path)] == [os.path.basename(first)]
+
+    def test_seeded_and_unseeded_builds_are_kept_apart(self, tmp_path):
+        # Given: The empty schema built with and without seeded users
+        unseeded = build_snapshot(None, str(tmp_path), seed_users=False)
+        seeded = build_snapshot(None, str(tmp_path), seed_users=True)
+
+        # Then: They are separate snapshots, and only one holds users
+        assert unseeded != seeded
+        for path, users in ((unseeded, 0), (seeded, 2)):
+            engine = create_engine(f"sqlite:///{path}")
+            with engine.connect() as conn:
+                assert conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == users
+            engine.dispose()
+
+    def test_restore_to_file_yields_seeded_database(self, tmp_path):
+        # Given: A seeded snapshot
+        snapshot = build_snapshot(RESOURCES_DIR, str(tmp_path / "snapshots"))
+
+        # When: Restoring it to a new database path
+        target = tmp_path / "app.db"
+        method = restore_snapshot(snapshot, str(target))
+
+        # Then: The restored database contains the seeded data and users
+        engine = create_engine(f"sqlite:///{target}")
+        assert method in ("clone", "backup")
+        assert _count(engine, "ratings") > 0
+        assert _count(engine, "users") == 2
+        engine.dispose()
+
+    def test_restore_into_engine_replaces_existing_data(self, tmp_path):
+        # Given: An empty-schema snapshot and a database that already holds data
+        snapshot = build_snapshot(None, str(tmp_path / "snapshots"), seed_users=False)
+        engine = create_engine(f"sqlite:///{tmp_path / 'live.db'}")
+        restore_into_engine(snapshot, engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO movies (movie_id, title, genres) VALUES (1, 'x', '')"))
+
+        # When: Restoring the snapshot into the live engine
+        restore_into_engine(snapshot, engine)
+
+        # Then: The database is back to the empty schema
+        assert _count(engine, "movies") == 0
+        engine.dispose()
+
+    def test_restore_over_an_open_database_keeps_its_connections(self, tmp_path):
+        # Given: A database with data and a connection that stays open
+        snapshot = build_snapshot(None, str(tmp_path / "snapshots"), seed_users=False)
+        target = tmp_path / "app.db"
+        restore_snapshot(snapshot, str(target))
+        engine = create_engine(f"sqlite:///{target}")
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO movies (movie_id, title, genres) VALUES (1, 'x', '')"))
+        inode = os.stat(target).st_ino
+
+        # When: Restoring the snapshot over it
+        method = restore_snapshot(snapshot, str(target))
+
+        # Then: The file is overwritten in place, so the open connection sees the snapshot
+        assert method == "backup"
+        assert os.stat(target).st_ino == inode
+        assert _count(engine, "movies") == 0
+        engine.dispose()
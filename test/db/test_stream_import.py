@@ -0,0 +1,118 @@
+"""
+Tests for the resumable streaming importer
+"""
+import dataclasses
+import os
+import pytest
+from sqlalchemy import create_engine, text
+from db.database import Base
+from db.bulk_loader import TABLE_SPECS, bulk_load
+from db.stream_import import stream_table, stream_import, CheckpointMismatchError, UncheckpointedDataError
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "db", "resources")
+TAGS_CSV = os.path.join(RESOURCES_DIR, "tags.csv")
+TAG_SPEC = TABLE_SPECS[3]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+    Base.metadata.create_all(bind=engine)
+    # Tags reference movies; load those first so foreign keys are satisfied
+    stream_import(engine, RESOURCES_DIR, specs=TABLE_SPECS[:1])
+    yield engine
+    engine.dispose()
+
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+class TestStreamImport:
+
+    def test_resumes_after_crash_without_duplicates(self, engine):
+        # Given: An import that crashes partway through tags.csv
+        seen = []
+
+        def crashing_convert(row):
+            seen.append(row)
+            if len(seen) > 2500:
+                raise RuntimeError("simulated crash")
+            return TAG_SPEC.convert(row)
+
+        crashing_spec = dataclasses.replace(TAG_SPEC, convert=crashing_convert)
+        with engine.connect() as conn:
+            with pytest.raises(RuntimeError):
+                stream_table(conn, crashing_spec, TAGS_CSV, batch_size=1000)
+        assert _count(engine, "tags") == 2000
+
+        # When: Running the import again
+        with engine.connect() as conn:
+            stats = stream_table(conn, TAG_SPEC, TAGS_CSV, batch_size=1000)
+
+        # Then: It resumes from the last committed batch and loads every row exactly once
+        with open(TAGS_CSV, encoding="utf-8") as f:
+            expected = sum(1 for _ in f) - 1
+        assert stats.resumed_from == 2000
+        assert stats.rows == expected
+        assert _count(engine, "tags") == expected
+
+    def test_completed_file_is_skipped(self, engine):
+        # Given: tags.csv has been fully imported
+        with engine.connect() as conn:
+            stream_table(conn, TAG_SPEC, TAGS_CSV)
+
+        # When: Importing it again
+        with engine.connect() as conn:
+            stats = stream_table(conn, TAG_SPEC, TAGS_CSV)
+
+        # Then: Nothing is re-inserted
+        assert stats.skipped
+        assert _count(engine, "tags") == stats.rows
+
+    def test_changed_file_refuses_to_resume(self, engine, tmp_path):
+        # Given: A partially imported copy of tags.csv that later changes on disk
+        csv_copy = tmp_path / "tags.csv"
+        csv_copy.write_bytes(open(TAGS_CSV, "rb").read())
+        with engine.connect() as conn:
+            stream_table(conn, TAG_SPEC, str(csv_copy))
+        with open(csv_copy, "a", encoding="utf-8") as f:
+            f.write("1,1,appended,1600000000\n")
+
+        # When / Then: Resuming raises instead of importing from a stale offset
+        with engine.connect() as conn:
+            with pytest.raises(CheckpointMismatchError):
+                stream_table(conn, TAG_SPEC, str(csv_copy))
+
+
+class TestStreamImportSetup:
+
+    def test_journal_mode_in_use_is_restored(self, tmp_path):
+        # Given: A database in the default rollback journal mode
+        engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            before = conn.execute(text("PRAGMA journal_mode")).scalar()
+
+        # When: Streaming into it, which runs in WAL mode
+        stream_import(engine, RESOURCES_DIR, specs=TABLE_SPECS[:1])
+
+        # Then: It is back in its own mode
+        engine.dispose()
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == before != "wal"
+        engine.dispose()
+
+    def test_data_loaded_another_way_is_refused(self, tmp_path):
+        # Given: A database seeded by the bulk loader, which writes no checkpoints
+        engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+        Base.metadata.create_all(bind=engine)
+        bulk_load(engine, RESOURCES_DIR, workers=1)
+        movies = _count(engine, "movies")
+
+        # When / Then: Streaming refuses instead of inserting from offset 0
+        with pytest.raises(UncheckpointedDataError, match="--force"):
+            stream_import(engine, RESOURCES_DIR)
+        assert _count(engine, "movies") == movies
+        engine.dispose()
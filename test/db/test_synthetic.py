@@ -0,0 +1,95 @@
+"""
+Tests for the synthetic MovieLens data generator
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from db.database import Base
+
+np = pytest.importorskip("numpy")
+
+from db.synthetic import SyntheticConfig, SyntheticDataset, load_database, write_csv  # noqa: E402
+
+
+def _config(seed):
+    return SyntheticConfig(n_ratings=40_000, n_users=400, n_movies=2_000, n_tags=1_000, seed=seed)
+
+
+def _ratings(config):
+    blocks = list(SyntheticDataset(config).rating_blocks(block_users=100))
+    return tuple(np.concatenate([b[i] for b in blocks]) for i in range(4))
+
+
+class TestSyntheticData:
+
+    def test_same_seed_produces_identical_ratings(self):
+        # Given: A small configuration
+        config = _config(11)
+
+        # When: Generating it twice
+        first, second = _ratings(config), _ratings(config)
+
+        # Then: Every column is identical
+        for a, b in zip(first, second):
+            assert np.array_equal(a, b)
+
+    def test_ratings_are_unique_valid_and_near_target(self):
+        # Given: A 40k rating configuration
+        config = _config(5)
+
+        # When: Generating the ratings
+        users, movies, ratings, timestamps = _ratings(config)
+
+        # Then: Pairs are unique, values are half stars and the total is close to the target
+        pairs = users * (config.n_movies + 1) + movies
+        assert len(np.unique(pairs)) == len(pairs)
+        assert 0.95 * config.n_ratings <= len(users) <= config.n_ratings
+        assert set(np.unique(ratings * 2).tolist()) <= set(range(1, 11))
+        assert np.bincount(users).max() <= config.n_movies // 2
+        assert movies.min() >= 1 and movies.max() <= config.n_movies
+
+    def test_popularity_is_skewed(self):
+        # Given: Generated ratings
+        config = _config(3)
+        _, movies, _, _ = _ratings(config)
+
+        # When: Counting ratings per movie
+        per_movie = np.sort(np.bincount(movies))[::-1]
+
+        # Then: The top tenth of the catalogue gets far more than a tenth of the ratings
+        top = per_movie[: max(1, config.n_movies // 10)].sum()
+        assert top > 0.3 * per_movie.sum()
+
+    def test_load_database_matches_csv_output(self, tmp_path):
+        # Given: A tiny dataset and an empty database
+        dataset = SyntheticDataset(SyntheticConfig.for_ratings(5_000, seed=2))
+        engine = create_engine(f"sqlite:///{tmp_path / 'synthetic.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        # When: Loading it directly and writing it as CSV
+        load_database(dataset, engine)
+        write_csv(dataset, str(tmp_path / "csv"))
+
+        # Then: Both contain the same number of ratings
+        with open(tmp_path / "csv" / "ratings.csv", encoding="utf-8") as f:
+            csv_rows = sum(1 for _ in f) - 1
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM ratings")).scalar() == csv_rows
+        engine.dispose()
+
+    def test_failed_load_still_restores_indexes(self, tmp_path):
+        # Given: A database that already holds the dataset
+        dataset = SyntheticDataset(SyntheticConfig.for_ratings(5_000, seed=2))
+        engine = create_engine(f"sqlite:///{tmp_path / 'synthetic.db'}")
+        Base.metadata.create_all(bind=engine)
+        load_database(dataset, engine)
+        expected = {table: {ix["name"] for ix in inspect(engine).get_indexes(table)} for table in ("ratings", "tags")}
+
+        # When: Loading it again collides with the existing rows
+        with pytest.raises(IntegrityError):
+            load_database(dataset, engine)
+
+        # Then: Every secondary index dropped for the load is back
+        for table, names in expected.items():
+            assert {ix["name"] for ix in inspect(engine).get_indexes(table)} == names
+        engine.dispose()
@@ -0,0 +1,14 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from db.database import Base
+from messaging import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Result store on a private database"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'results.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield ResultStore(sessionmaker(bind=engine))
+    engine.dispose()
@@ -0,0 +1,128 @@
+"""
+Tests for the non-blocking Kafka producer and the 202 /analyze_img path
+"""
+import json
+import threading
+import pytest
+from api import image_analysis_controller
+from messaging import AsyncProducer, ProducerBusy
+from messaging.producer import DELIVERED, FAILED, QUEUED
+
+
+class FakeMessage:
+    def __init__(self, topic, key, value):
+        self._topic, self._key, self._value = topic, key, value
+
+    def topic(self):
+        return self._topic
+
+    def key(self):
+        return self._key.encode()
+
+    def value(self):
+        return self._value
+
+    def latency(self):
+        return 0.004
+
+
+class FakeProducer:
+    """Queues messages like librdkafka; poll() delivers them, failing keys listed in `fail`."""
+
+    def __init__(self, config, capacity=1000):
+        self.config = config
+        self.capacity = capacity
+        self.queued = []
+        self.sent = []
+        self.fail = set()
+        self._lock = threading.Lock()
+
+    def produce(self, topic, value=None, key=None, on_delivery=None):
+        with self._lock:
+            if len(self.queued) >= self.capacity:
+                raise BufferError("Local: Queue full")
+            self.queued.append((FakeMessage(topic, key, value), on_delivery))
+
+    def poll(self, timeout):
+        with self._lock:
+            batch, self.queued = self.queued, []
+        for msg, callback in batch:
+            self.sent.append(msg)
+            callback("broker down" if msg.key().decode() in self.fail else None, msg)
+        return len(batch)
+
+    def flush(self, timeout):
+        self.poll(0)
+        return 0
+
+
+@pytest.fixture
+def fake_producer(monkeypatch):
+    """The controller's producer backed by a FakeProducer"""
+    fakes = []
+    producer = AsyncProducer(config={"linger.ms": 5},
+                             factory=lambda config: fakes.append(FakeProducer(config)) or fakes[-1])
+    monkeypatch.setattr(image_analysis_controller, "producer", producer)
+    producer.fakes = fakes
+    yield producer
+    producer.close()
+
+
+class TestAsyncProducer:
+
+    def test_send_returns_before_delivery(self, fake_producer):
+        # Given: A producer whose poll loop has not yet run
+        fake_producer.send("topic", "req-1", b"{}")
+
+        # Then: The message is tracked as queued, then as delivered once polled
+        assert fake_producer.delivery("req-1")[0] in (QUEUED, DELIVERED)
+        fake_producer.close()
+        assert fake_producer.delivery("req-1") == (DELIVERED, None)
+
+    def test_failed_delivery_is_recorded(self, fake_producer):
+        # Given: A message the broker will reject
+        fake_producer.send("topic", "warmup", b"{}")
+        fake_producer.fakes[0].fail.add("req-2")
+
+        # When: It is sent and delivery is attempted
+        fake_producer.send("topic", "req-2", b"{}")
+        fake_producer.close()
+
+        # Then: The failure is kept against its key
+        assert fake_producer.delivery("req-2") == (FAILED, "broker down")
+
+    def test_full_local_queue_raises_busy(self, fake_producer):
+        # Given: A local buffer with no room
+        fake_producer.send("topic", "first", b"{}")
+        fake_producer.fakes[0].capacity = 0
+
+        # When / Then: Sending fails fast and the key is not tracked
+        with pytest.raises(ProducerBusy):
+            fake_producer.send("topic", "req-3", b"{}")
+        assert fake_producer.delivery("req-3") is None
+
+
+class TestAnalyzeImgEndpoint:
+
+    def test_returns_202_with_request_id(self, client, fake_producer):
+        # When: Submitting an image
+        response = client.post("/analyze_img", json={"url": "http://img/1.jpg"})
+
+        # Then: It is accepted at once and the event is queued with the request id as key
+        assert response.status_code == 202
+        request_id = response.json()["request_id"]
+        assert response.json()["status"] == "queued"
+        fake_producer.close()
+        message = fake_producer.fakes[0].sent[0]
+        assert message.key() == request_id.encode()
+        assert json.loads(message.value()) == {"request_id": request_id, "url": "http://img/1.jpg"}
+
+    def test_full_queue_returns_503(self, client, fake_producer):
+        # Given: A full local buffer
+        fake_producer.send("topic", "first", b"{}")
+        fake_producer.fakes[0].capacity = 0
+
+        # When / Then: Submissions are shed with a retry hint
+        response = client.post("/analyze_img", json={"url": "http://img/2.jpg"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
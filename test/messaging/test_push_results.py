@@ -0,0 +1,139 @@
+"""
+Tests for push delivery of analysis results: long-poll, SSE and WebSocket
+"""
+import json
+import threading
+import time
+import pytest
+from api import image_analysis_controller
+
+
+@pytest.fixture
+def live_store(store, monkeypatch):
+    """The controller's result store, replaced by a private one"""
+    monkeypatch.setattr(image_analysis_controller, "results", store)
+    yield store
+    assert store.waiting() == 0
+
+
+def publish_later(store, results, delay=0.2):
+    timer = threading.Timer(delay, store.add_many, args=(results,))
+    timer.start()
+    return timer
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestWatch:
+
+    def test_stored_result_resolves_at_once(self, store):
+        # Given: A result already stored
+        store.add_many({"req-1": ["alice"]})
+
+        # When: Watching it and another request
+        watched = store.watch_many(["req-1", "req-2"])
+
+        # Then: Only the stored one is resolved, until the other arrives
+        assert watched["req-1"].result(timeout=0) == ["alice"]
+        assert not watched["req-2"].done()
+        store.add_many({"req-2": []})
+        assert watched["req-2"].result(timeout=0) == []
+        store.unwatch(watched)
+        assert store.waiting() == 0
+
+    def test_unwatched_futures_are_not_resolved(self, store):
+        watched = store.watch_many(["req-1"])
+        store.unwatch(watched)
+        store.add_many({"req-1": ["bob"]})
+        assert not watched["req-1"].done()
+
+
+class TestLongPoll:
+
+    def test_returns_when_the_result_arrives(self, client, live_store):
+        # Given: A result that arrives after the request is made
+        publish_later(live_store, {"req-1": ["carol"]})
+
+        # When: Long-polling for it
+        started = time.monotonic()
+        response = client.get("/result/req-1", params={"wait": 10})
+
+        # Then: The answer comes with the result, not at the timeout
+        assert response.json() == {"status": "done", "people": ["carol"]}
+        assert time.monotonic() - started < 5
+
+    def test_times_out_as_processing(self, client, live_store):
+        response = client.get("/result/req-1", params={"wait": 0.2})
+        assert response.json() == {"status": "processing"}
+
+    def test_wait_is_bounded(self, client, live_store):
+        assert client.get("/result/req-1", params={"wait": 600}).status_code == 422
+
+
+class TestServerSentEvents:
+
+    def test_streams_each_result_then_ends(self, client, live_store):
+        # Given: One stored result and one still to come
+        live_store.add_many({"req-1": ["dave"]})
+        publish_later(live_store, {"req-2": ["erin"]})
+
+        # When: Streaming both
+        response = client.get("/results/stream", params={"request_id": ["req-1", "req-2"]})
+
+        # Then: One event per result, then the end of the stream
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert sse_events(response.text) == [
+            ("result", {"request_id": "req-1", "status": "done", "people": ["dave"]}),
+            ("result", {"request_id": "req-2", "status": "done", "people": ["erin"]}),
+            ("end", {"pending": []}),
+        ]
+
+    def test_timeout_lists_pending_requests(self, client, live_store):
+        response = client.get("/results/stream", params={"request_id": ["req-9"], "timeout": 0.2})
+        assert sse_events(response.text) == [("end", {"pending": ["req-9"]})]
+
+
+class TestWebSocket:
+
+    def test_pushes_results_for_watched_requests(self, client, live_store):
+        # Given: A connection watching a stored and a pending request
+        live_store.add_many({"req-1": ["frank"]})
+        with client.websocket_connect("/results/ws") as websocket:
+            websocket.send_json({"watch": ["req-1", "req-2"]})
+            assert websocket.receive_json() == {"request_id": "req-1", "status": "done", "people": ["frank"]}
+
+            # When: The other result arrives
+            live_store.add_many({"req-2": []})
+
+            # Then: It is pushed
+            assert websocket.receive_json() == {"request_id": "req-2", "status": "done", "people": []}
+
+    def test_finished_requests_do_not_count_against_the_limit(self, client, live_store, monkeypatch):
+        # Given: A connection allowed two ids at a time, whose first two have finished
+        monkeypatch.setattr(image_analysis_controller, "MAX_WATCHED", 2)
+        live_store.add_many({"req-1": [], "req-2": []})
+        with client.websocket_connect("/results/ws") as websocket:
+            websocket.send_json({"watch": ["req-1", "req-2"]})
+            assert {websocket.receive_json()["request_id"] for _ in range(2)} == {"req-1", "req-2"}
+            assert live_store.waiting() == 0
+
+            # When: Watching two more
+            websocket.send_json({"watch": ["req-3", "req-4"]})
+            live_store.add_many({"req-3": ["grace"], "req-4": []})
+
+            # Then: They are accepted and pushed like the first ones
+            assert {websocket.receive_json()["request_id"] for _ in range(2)} == {"req-3", "req-4"}
+
+    def test_rejects_malformed_messages(self, client, live_store):
+        with client.websocket_connect("/results/ws") as websocket:
+            websocket.send_text("hello")
+            assert "error" in websocket.receive_json()
+            websocket.send_json({"watch": "req-1"})
+            assert "error" in websocket.receive_json()
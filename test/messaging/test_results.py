@@ -0,0 +1,184 @@
+"""
+Tests for the background result materializer behind /result/{request_id}
+"""
+import json
+import threading
+import time
+from api import image_analysis_controller
+from messaging import ResultConsumer
+from messaging.results import REPLAY_MARGIN
+
+
+class FakeMessage:
+    def __init__(self, value, offset=0):
+        self._value = value
+        self._offset = offset
+
+    def error(self):
+        return None
+
+    def value(self):
+        return self._value
+
+    def topic(self):
+        return "image_analysis_results"
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+
+def result(request_id, people):
+    return FakeMessage(json.dumps({"request_id": request_id, "people": people}).encode())
+
+
+class FakePartition:
+    def __init__(self, partition, offset=-1001):
+        self.partition = partition
+        self.offset = offset
+
+
+class FakeConsumer:
+    """Hands out whatever was published since the last consume()."""
+
+    def __init__(self, config):
+        self.config = config
+        self.topics = []
+        self.published = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, on_assign=None):
+        self.topics = topics
+        self.on_assign = on_assign
+
+    def offsets_for_times(self, partitions, timeout):
+        self.times = [p.offset for p in partitions]
+        return [FakePartition(p.partition, 1000 + p.partition) for p in partitions]
+
+    def assign(self, partitions):
+        self.assigned = partitions
+
+    def publish(self, *messages):
+        with self._lock:
+            self.published.extend(messages)
+
+    def consume(self, num_messages, timeout):
+        with self._lock:
+            batch, self.published = self.published[:num_messages], self.published[num_messages:]
+        if not batch:
+            time.sleep(0.01)
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestResultStore:
+
+    def test_results_survive_the_cache(self, store):
+        # Given: A stored result
+        store.add_many({"req-1": ["alice", "bob"]})
+
+        # When: The in-memory copy is gone (another worker, or a restart)
+        store.cache.clear()
+
+        # Then: It is read back from the table
+        assert store.get("req-1") == ["alice", "bob"]
+        assert store.get("req-unknown") is None
+
+    def test_first_write_wins(self, store):
+        # Given: Two workers storing the same result
+        store.add_many({"req-1": ["alice"]})
+        store.add_many({"req-1": ["alice"], "req-2": []})
+
+        # Then: Both results are present once, and an empty result still counts as done
+        store.cache.clear()
+        assert store.get("req-1") == ["alice"]
+        assert store.get("req-2") == []
+
+    def test_purge_drops_old_results(self, store):
+        # Given: A stored result
+        store.add_many({"req-1": ["alice"]})
+
+        # When: Purging everything older than an hour, then everything
+        assert store.purge(3600) == 0
+        assert store.purge(-1) == 1
+
+        # Then: Only the cache still has it
+        store.cache.clear()
+        assert store.get("req-1") is None
+
+
+class TestResultConsumer:
+
+    def test_materializes_messages_in_the_background(self, store):
+        # Given: A running consumer
+        consumers = []
+        consumer = ResultConsumer(store, config={"group.id": "test"},
+                                  factory=lambda config: consumers.append(FakeConsumer(config)) or consumers[-1])
+        consumer.start()
+        try:
+            # When: Results are published, among malformed messages
+            consumers[0].publish(FakeMessage(b"not json"), FakeMessage(b""), result("req-1", ["carol"]),
+                                 FakeMessage(b'{"people": []}'))
+
+            # Then: The good result becomes visible
+            wait_for(lambda: store.get("req-1") is not None)
+            assert store.get("req-1") == ["carol"]
+            assert consumers[0].topics == ["image_analysis_results"]
+            assert consumers[0].on_assign == consumer._on_assign
+        finally:
+            consumer.stop()
+        assert consumers[0].closed
+
+    def test_empty_store_starts_at_the_reset_offset(self, store):
+        # Given: A consumer over an empty store
+        consumer = ResultConsumer(store, factory=FakeConsumer)
+        kafka = FakeConsumer({})
+        partitions = [FakePartition(0), FakePartition(1)]
+
+        # When: Partitions are assigned
+        consumer._on_assign(kafka, partitions)
+
+        # Then: They are taken as they are, so auto.offset.reset applies
+        assert kafka.assigned is partitions
+
+    def test_restart_seeks_to_just_before_the_newest_result(self, store):
+        # Given: A store holding results from an earlier run
+        store.add_many({"req-1": []})
+        last = store.last_stored()
+        consumer = ResultConsumer(store, factory=FakeConsumer)
+        kafka = FakeConsumer({})
+
+        # When: Partitions are assigned
+        consumer._on_assign(kafka, [FakePartition(0), FakePartition(1)])
+
+        # Then: Each partition starts at the offset for that time, less the replay margin
+        assert kafka.times == [(last - REPLAY_MARGIN) * 1000] * 2
+        assert [(p.partition, p.offset) for p in kafka.assigned] == [(0, 1000), (1, 1001)]
+
+    def test_handle_counts_valid_results(self, store):
+        consumer = ResultConsumer(store, factory=FakeConsumer)
+        assert consumer.handle([result("a", []), FakeMessage(b"{}"), result("b", ["x"])]) == 2
+
+
+class TestGetResultEndpoint:
+
+    def test_lookup_without_kafka(self, client, store, monkeypatch):
+        # Given: One materialized result
+        monkeypatch.setattr(image_analysis_controller, "results", store)
+        store.add_many({"req-1": ["dave"]})
+
+        # Then: It is served at once, and unknown requests are still processing
+        assert client.get("/result/req-1").json() == {"status": "done", "people": ["dave"]}
+        assert client.get("/result/req-2").json() == {"status": "processing"}
@@ -0,0 +1,82 @@
+"""
+Tests for the metrics registry and the /metrics endpoint
+"""
+import threading
+import pytest
+from api import metrics_controller
+from monitoring.metrics import Registry
+
+
+class TestMetricsRegistry:
+
+    def test_counter_sums_increments_from_every_thread(self):
+        # Given: A counter incremented from eight threads
+        registry = Registry()
+        counter = registry.counter("jobs", "Jobs done", ("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.labels("a").inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # When / Then: The exposition reports the total
+        assert 'jobs_total{kind="a"} 8000' in registry.exposition()
+
+    def test_histogram_buckets_are_cumulative(self):
+        # Given: A histogram with two buckets
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+        # When: Observing values in each bucket and beyond
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        # Then: Buckets count values less than or equal to their bound
+        text = registry.exposition()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+        assert "latency_seconds_sum 3.65" in text
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter("odd", "Odd labels", ("value",)).labels('a"b\\c').inc()
+        assert 'odd_total{value="a\\"b\\\\c"} 1' in registry.exposition()
+
+
+class TestMetricsEndpoint:
+
+    @pytest.fixture
+    def scrape_headers(self, monkeypatch):
+        monkeypatch.setattr(metrics_controller, "METRICS_TOKEN", "scrape-secret")
+        return {"Authorization": "Bearer scrape-secret"}
+
+    def test_requests_are_labelled_by_route_template(self, client, auth_headers, sample_movies, scrape_headers):
+        # Given: Requests for two different movie ids
+        client.get("/movies/1", headers=auth_headers)
+        client.get("/movies/2", headers=auth_headers)
+
+        # When: Scraping the metrics
+        response = client.get("/metrics", headers=scrape_headers)
+
+        # Then: Both count under the route template, not the raw paths
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'route="/movies/{movie_id}",status="200"' in response.text
+        assert 'route="/movies/1"' not in response.text
+        assert "http_requests_in_flight 1" in response.text
+
+    def test_endpoint_is_off_without_a_token(self, client, monkeypatch):
+        monkeypatch.setattr(metrics_controller, "METRICS_TOKEN", None)
+        assert client.get("/metrics").status_code == 404
+
+    def test_scrape_needs_the_token(self, client, auth_headers, scrape_headers):
+        # When / Then: Neither no credentials nor a user's token are accepted
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers=auth_headers).status_code == 401
@@ -0,0 +1,122 @@
+"""
+Tests for on-demand request and worker profiling
+"""
+import cProfile
+import os
+import pstats
+import threading
+import pytest
+from monitoring import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def single_profiler(monkeypatch):
+    """Enforce Python 3.12's rule that only one profiler may be active at a time"""
+    active = set()
+    lock = threading.Lock()
+    enable, disable = cProfile.Profile.enable, cProfile.Profile.disable
+
+    def checked_enable(self, *args, **kwargs):
+        with lock:
+            if active - {id(self)}:
+                raise ValueError("Another profiling tool is already active")
+            active.add(id(self))
+        enable(self, *args, **kwargs)
+
+    def checked_disable(self):
+        disable(self)
+        with lock:
+            active.discard(id(self))
+
+    monkeypatch.setattr(cProfile.Profile, "enable", checked_enable)
+    monkeypatch.setattr(cProfile.Profile, "disable", checked_disable)
+
+
+class TestRequestProfiling:
+
+    def test_admin_request_is_profiled_to_pstats(self, client, admin_headers, sample_movies, profile_dir):
+        # When: An admin asks for a deterministic profile of a request
+        response = client.get("/movies", headers={**admin_headers, "X-Profile": "pstats"})
+
+        # Then: The request succeeds and the stored profile covers the endpoint
+        assert response.status_code == 200
+        name = response.headers["X-Profile-Result"]
+        stats = pstats.Stats(os.path.join(profile_dir, name))
+        assert any(func[2] == "get_movies" for func in stats.stats)
+
+    def test_sync_endpoint_uses_a_single_profiler(self, client, admin_headers, sample_movies, profile_dir,
+                                                  single_profiler):
+        # When: Profiling a sync endpoint where a second active profiler would fail
+        response = client.get("/movies", headers={**admin_headers, "X-Profile": "pstats"})
+
+        # Then: The endpoint runs under one profiler in its threadpool thread
+        assert response.status_code == 200
+        stats = pstats.Stats(os.path.join(profile_dir, response.headers["X-Profile-Result"]))
+        assert any(func[2] == "get_movies" for func in stats.stats)
+
+    def test_async_endpoint_is_profiled(self, client, admin_headers, profile_dir, single_profiler):
+        # When: Profiling an async endpoint
+        response = client.get("/result/unknown", headers={**admin_headers, "X-Profile": "pstats"})
+
+        # Then: Its coroutine shows up in the profile
+        assert response.status_code == 200
+        stats = pstats.Stats(os.path.join(profile_dir, response.headers["X-Profile-Result"]))
+        assert any(func[2] == "get_result" for func in stats.stats)
+
+    def test_concurrent_pstats_request_is_refused(self, client, admin_headers, profile_dir):
+        # Given: Another request holding the profiler
+        with profiling._cprofile_lock:
+            # When: Asking for a second deterministic profile
+            response = client.get("/movies", headers={**admin_headers, "X-Profile": "pstats"})
+
+        # Then: It is refused instead of clashing with the first
+        assert response.status_code == 409
+        assert os.listdir(profile_dir) == []
+
+    def test_collapsed_stacks_via_query_flag(self, client, admin_headers, sample_movies, profile_dir):
+        # When: Asking for a sampled profile with the query flag
+        response = client.get("/movies?profile=collapsed", headers=admin_headers)
+
+        # Then: Collapsed stacks are stored
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Result"].endswith(".collapsed.txt")
+        assert os.path.exists(os.path.join(profile_dir, response.headers["X-Profile-Result"]))
+
+    def test_non_admin_cannot_profile(self, client, auth_headers, profile_dir):
+        # When: A regular user asks for a profile
+        response = client.get("/movies", headers={**auth_headers, "X-Profile": "pstats"})
+
+        # Then: The request is refused and nothing is stored
+        assert response.status_code == 403
+        assert os.listdir(profile_dir) == []
+
+    def test_unknown_format_is_rejected(self, client, admin_headers):
+        response = client.get("/movies", headers={**admin_headers, "X-Profile": "flame"})
+        assert response.status_code == 400
+
+    def test_requests_without_flag_are_not_profiled(self, client, auth_headers, profile_dir):
+        response = client.get("/movies", headers=auth_headers)
+        assert "X-Profile-Result" not in response.headers
+        assert os.listdir(profile_dir) == []
+
+
+class TestWorkerProfiling:
+
+    def test_admin_can_sample_the_worker(self, client, admin_headers):
+        # When: Profiling the worker briefly
+        response = client.post("/admin/profile?seconds=0.2", headers=admin_headers)
+
+        # Then: Collapsed stacks for the worker's threads come back and are listed
+        assert response.status_code == 200
+        assert " " in response.text.splitlines()[0]
+        listed = client.get("/admin/profiles", headers=admin_headers).json()
+        assert any(name.endswith(".collapsed.txt") for name in listed)
+
+    def test_worker_profiling_requires_admin(self, client, auth_headers):
+        assert client.post("/admin/profile?seconds=0.1", headers=auth_headers).status_code == 403
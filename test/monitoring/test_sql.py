@@ -0,0 +1,69 @@
+"""
+Tests for SQL statement attribution, slow-query logging and N+1 detection
+"""
+import logging
+import pytest
+from sqlalchemy import create_engine, text
+from monitoring import sql
+from monitoring.sql import statement_shape
+from monitoring.timing import request_scope
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sql.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (1, 'a'), (2, 'b'), (3, 'c')"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def thresholds():
+    saved = sql.slow_query_seconds, sql.n_plus_one_threshold
+    yield sql.configure
+    sql.slow_query_seconds, sql.n_plus_one_threshold = saved
+
+
+class TestSqlInstrumentation:
+
+    def test_statements_are_attributed_to_the_current_request(self, engine):
+        # When: Running three queries inside a request
+        with request_scope() as timing, engine.connect() as conn:
+            for i in (1, 2, 3):
+                conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i})
+
+        # Then: They count towards the request under one statement shape
+        assert timing.counts["db"] == 3
+        assert list(timing.statements.values()) == [3]
+
+    def test_repeated_statement_shape_is_reported_once(self, engine, thresholds, caplog):
+        # Given: An N+1 threshold of two
+        thresholds(n_plus_one=2)
+
+        # When: A request runs the same shape five times
+        with caplog.at_level(logging.WARNING, logger="app.sql"), request_scope(), engine.connect() as conn:
+            for i in range(5):
+                conn.execute(text(f"SELECT name FROM items WHERE id = {i}"))
+
+        # Then: One N+1 warning is logged for the shape
+        warnings = [r.getMessage() for r in caplog.records if "N+1" in r.getMessage()]
+        assert len(warnings) == 1
+        assert "WHERE id = ?" in warnings[0]
+
+    def test_slow_query_is_logged_with_its_plan(self, engine, thresholds, caplog):
+        # Given: Every query counts as slow
+        thresholds(slow_query_ms=0)
+
+        # When: Running a lookup by primary key
+        with caplog.at_level(logging.WARNING, logger="app.sql"), engine.connect() as conn:
+            conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 2})
+
+        # Then: The log line includes SQLite's query plan
+        message = next(r.getMessage() for r in caplog.records if "Slow query" in r.getMessage())
+        assert "SEARCH items USING INTEGER PRIMARY KEY" in message
+
+    def test_shape_normalises_literals_and_in_lists(self):
+        assert statement_shape("SELECT * FROM t WHERE a = 5 AND b IN (?, ?, ?) AND c = 'x'") == \
+            statement_shape("SELECT *  FROM t WHERE a = 7 AND b IN (?) AND c = 'y''z'")
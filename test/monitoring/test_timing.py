@@ -0,0 +1,66 @@
+"""
+Tests for the per-request timing middleware and Server-Timing header
+"""
+import json
+import logging
+from monitoring import phase, current_timing
+from monitoring.middleware import server_timing
+from monitoring.timing import RequestTiming
+
+
+def _entries(header):
+    return {entry.split(";")[0]: entry for entry in header.split(", ")}
+
+
+class TestServerTiming:
+
+    def test_authenticated_read_reports_every_phase(self, client, auth_headers, sample_movies):
+        # When: Fetching a movie with a valid token
+        response = client.get("/movies/1", headers=auth_headers)
+
+        # Then: The Server-Timing header breaks the request into its phases
+        assert response.status_code == 200
+        entries = _entries(response.headers["Server-Timing"])
+        assert set(entries) == {"auth", "validate", "db", "app", "serialize", "total"}
+        assert 'desc="1 queries"' in entries["db"]
+
+    def test_unauthenticated_request_still_reports_total(self, client):
+        # When: A request is rejected before reaching the endpoint
+        response = client.get("/movies/1")
+
+        # Then: Only the phases that ran are reported
+        assert response.status_code == 401
+        assert "total" in _entries(response.headers["Server-Timing"])
+        assert "app" not in _entries(response.headers["Server-Timing"])
+
+    def test_request_is_logged_as_json(self, client, auth_headers, sample_movies, caplog):
+        # When: Handling a request with the timing log enabled
+        with caplog.at_level(logging.INFO, logger="app.timing"):
+            client.get("/movies/2", headers=auth_headers)
+
+        # Then: One JSON line describes the request by route template
+        records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.timing"]
+        assert records[-1]["route"] == "/movies/{movie_id}"
+        assert records[-1]["status"] == 200
+        assert records[-1]["db_queries"] == 1
+
+    def test_phase_outside_request_is_a_no_op(self):
+        # Given: No request in progress
+        assert current_timing() is None
+
+        # When / Then: Timing a block does nothing and raises nothing
+        with phase("auth"):
+            pass
+
+    def test_header_format(self):
+        # Given: A timing with two recorded phases
+        timing = RequestTiming()
+        timing.add("db", 0.002)
+        timing.add("db", 0.001)
+        timing.add("auth", 0.0005)
+
+        # When: Formatting it
+        header = server_timing(timing, 0.01)
+
+        # Then: Phases appear in order with millisecond durations
+        assert header == 'auth;dur=0.50, db;dur=3.00;desc="2 queries", total;dur=10.00'